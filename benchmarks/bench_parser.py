@@ -0,0 +1,98 @@
+"""Time and peak-memory benchmark for CourseParser on a Bible-sized course.
+
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --against <git-rev>
+
+``--against`` imports the ``modules`` package of another revision and
+runs it on the same synthetic file, so parser changes can be compared.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.course_parser import CourseParser
+
+from corpus import write_bible
+
+
+def load_parser_class(rev):
+    """Import CourseParser from rev's own modules/ package, side by side."""
+    tmp = tempfile.mkdtemp(prefix=f"worship-{rev}-")
+    archive = subprocess.run(
+        ["git", "-C", str(ROOT), "archive", rev, "modules"],
+        capture_output=True,
+        check=True,
+    ).stdout
+    subprocess.run(["tar", "-x", "-C", tmp], input=archive, check=True)
+
+    current = {k: v for k, v in sys.modules.items() if k.split(".")[0] == "modules"}
+    for name in current:
+        del sys.modules[name]
+    sys.path.insert(0, tmp)
+    try:
+        return importlib.import_module("modules.course_parser").CourseParser
+    finally:
+        sys.path.remove(tmp)
+        shutil.rmtree(tmp, ignore_errors=True)
+        for name in [k for k in sys.modules if k.split(".")[0] == "modules"]:
+            del sys.modules[name]
+        sys.modules.update(current)
+
+
+def measure(parser_cls, path, repeat):
+    parser = parser_cls(os.path.dirname(path))
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            course = parser._parse_md_file(path)
+            best = min(best, time.perf_counter() - start)
+            del course
+        tracemalloc.start()
+        course = parser._parse_md_file(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    lessons = sum(len(s.lessons) for p in course.parts for s in p.sections)
+    return best, peak, lessons
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--against", help="git revision to compare with")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bible.md")
+        verses = write_bible(path)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"synthetic course: {verses} verses, {size_mb:.1f} MB")
+
+        runs = [("working tree", CourseParser)]
+        if args.against:
+            runs.insert(0, (args.against, load_parser_class(args.against)))
+        for label, parser_cls in runs:
+            best, peak, lessons = measure(parser_cls, path, args.repeat)
+            print(
+                f"{label:>14}: {best * 1000:8.1f} ms  "
+                f"peak {peak / 1e6:6.1f} MB  ({lessons} lessons)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,164 @@
+"""Course-parser benchmark suite over synthetic corpora.
+
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 4KB,1MB,256MB --json results.json
+    python benchmarks/bench_suite.py --baseline results.json --threshold 0.15
+
+Each case generates a course in one hierarchy style (flat, mid, full) at
+one size and times ``_parse_md_file`` on it, eager and lazy, then
+``parse_courses`` over the same amount of text split across several files.
+Times are the best of ``--repeat`` runs; peak memory is taken by
+tracemalloc on one extra run (in this process only, so a pooled
+``parse_courses`` reports what the parent retains). ``--json`` writes the
+results; with ``--baseline`` any case slower (or hungrier) than the
+baseline by more than ``--threshold`` is reported and the exit status is 1.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.course_parser import CourseParser
+
+from corpus import STYLES, format_size, parse_size, write_course
+
+DEFAULT_SIZES = "16KB,1MB,16MB"
+DIRECTORY_FILES = 8
+
+
+def _count_lessons(courses):
+    return sum(len(s.lessons) for c in courses for p in c.parts for s in p.sections)
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    total = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        del result
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, total / repeat, peak, result
+
+
+def run_case(workdir, style, size, repeat):
+    """Yield one result dict per (api, mode) for a style/size corpus."""
+    name = f"{style}-{format_size(size)}"
+    single = os.path.join(workdir, name)
+    os.makedirs(single, exist_ok=True)
+    path = os.path.join(single, "course.md")
+    write_course(path, style, size)
+
+    split = os.path.join(workdir, f"{name}-dir")
+    os.makedirs(split, exist_ok=True)
+    for i in range(DIRECTORY_FILES):
+        write_course(os.path.join(split, f"c{i}.md"), style, size // DIRECTORY_FILES)
+
+    jobs = []
+    for lazy in (False, True):
+        parser = CourseParser(single, lazy=lazy)
+        jobs.append(("parse_md_file", lazy, lambda p=parser: [p._parse_md_file(path)]))
+    for lazy in (False, True):
+        parser = CourseParser(split, lazy=lazy)
+        jobs.append(("parse_courses", lazy, parser.parse_courses))
+
+    for api, lazy, fn in jobs:
+        with contextlib.redirect_stdout(io.StringIO()):
+            best, mean, peak, courses = _time(fn, repeat)
+        yield {
+            "case": f"{name}-{api}-{'lazy' if lazy else 'eager'}",
+            "style": style,
+            "bytes": size,
+            "api": api,
+            "lazy": lazy,
+            "lessons": _count_lessons(c for c in courses if c),
+            "best_s": best,
+            "mean_s": mean,
+            "peak_bytes": peak,
+        }
+
+
+def compare(results, baseline, threshold):
+    """Return a line per case that regressed by more than threshold."""
+    previous = {r["case"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        base = previous.get(result["case"])
+        if base is None:
+            continue
+        for key in ("best_s", "peak_bytes"):
+            if base[key] > 0 and result[key] > base[key] * (1 + threshold):
+                change = result[key] / base[key] - 1
+                regressions.append(
+                    f"{result['case']}: {key} {base[key]:.6g} -> "
+                    f"{result[key]:.6g} (+{change:.0%})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--styles", default=",".join(STYLES))
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="e.g. 4KB,1MB,256MB")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--baseline", help="results file to compare against")
+    ap.add_argument("--threshold", type=float, default=0.10)
+    args = ap.parse_args(argv)
+
+    styles = [s for s in args.styles.split(",") if s]
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for style in styles:
+            for size in sizes:
+                for result in run_case(workdir, style, size, args.repeat):
+                    results.append(result)
+                    print(
+                        f"{result['case']:>34}: {result['best_s'] * 1000:9.1f} ms  "
+                        f"peak {result['peak_bytes'] / 1e6:7.1f} MB  "
+                        f"({result['lessons']} lessons)"
+                    )
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""Synthetic course generators for the parser benchmarks.
+
+Every generator streams to disk, so corpora of hundreds of MB cost little
+memory to produce. Output is deterministic for a given style and size.
+"""
+
+VERSE = (
+    "[{n}] And God said, Let there be light: and there was light. And God saw"
+    " the light,\nthat it was good: and God divided the light from the darkness."
+)
+
+# Hierarchy styles CourseParser accepts, by the deepest heading level used.
+STYLES = ("flat", "mid", "full")
+
+_UNITS = {"KB": 1 << 10, "MB": 1 << 20, "GB": 1 << 30}
+
+
+def parse_size(text):
+    """'64KB' -> 65536; a bare number is bytes."""
+    text = text.strip().upper()
+    for unit, scale in _UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[: -len(unit)]) * scale)
+    return int(text)
+
+
+def format_size(size):
+    for unit in ("GB", "MB", "KB"):
+        if size >= _UNITS[unit] and size % _UNITS[unit] == 0:
+            return f"{size // _UNITS[unit]}{unit}"
+    return f"{size}B"
+
+
+def _lesson_body(n, verses):
+    """Indented verses with the prose, blank and skip lines real courses have."""
+    out = []
+    if n % 7 == 0:
+        out.append("A note in prose, which is not part of the lesson.\n\n")
+    if n % 11 == 0:
+        out.append("    #! recite from memory first\n")
+    for v in range(n * verses + 1, (n + 1) * verses + 1):
+        first, second = VERSE.format(n=v).split("\n")
+        out.append(f"    {first}\n")
+        out.append(f"\t{second}\n" if v % 5 == 0 else f"    {second}\n")
+        out.append("\n")
+    return "".join(out)
+
+
+def write_course(path, style, target_bytes, verses_per_lesson=10):
+    """
+    Write a course of about target_bytes in the given style and return the
+    number of lessons. flat is `##` lessons; mid adds `##` parts over `###`
+    lessons; full is `##` parts, `###` sections and `####` lessons.
+    """
+    if style not in STYLES:
+        raise ValueError(f"unknown style {style!r}")
+    lessons_per_section = 8
+    sections_per_part = 12
+    written = 0
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        header = f"# Synthetic {style} {format_size(target_bytes)}\n\n"
+        f.write(header)
+        written += len(header)
+        while written < target_bytes or n == 0:
+            chunk = []
+            if style == "mid" and n % lessons_per_section == 0:
+                chunk.append(f"## Part {n // lessons_per_section + 1}\n\n")
+            if style == "full":
+                per_part = lessons_per_section * sections_per_part
+                if n % per_part == 0:
+                    chunk.append(f"## Part {n // per_part + 1}\n\n")
+                if n % lessons_per_section == 0:
+                    section = n % per_part // lessons_per_section + 1
+                    chunk.append(f"### Section {section}\n\n")
+            level = {"flat": "##", "mid": "###", "full": "####"}[style]
+            chunk.append(f"{level} Lesson {n + 1}\n\n")
+            chunk.append(_lesson_body(n, verses_per_lesson))
+            text = "".join(chunk)
+            f.write(text)
+            written += len(text.encode("utf-8"))
+            n += 1
+    return n
+
+
+def write_bible(path, books=66, chapters=18, verses=26, verses_per_lesson=10):
+    """Full hierarchy: ## book, ### chapter, #### passage; ~31k verses."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Synthetic Bible\n\n")
+        for b in range(1, books + 1):
+            f.write(f"## Book {b}\n\n")
+            for c in range(1, chapters + 1):
+                f.write(f"### Chapter {c}\n\n")
+                for start in range(1, verses + 1, verses_per_lesson):
+                    end = min(start + verses_per_lesson - 1, verses)
+                    f.write(f"#### Verses {start}-{end}\n\n")
+                    for v in range(start, end + 1):
+                        for line in VERSE.format(n=v).splitlines():
+                            f.write(f"    {line}\n")
+                        f.write("\n")
+    return books * chapters * verses
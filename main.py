@@ -31,14 +31,77 @@ features:
   worship -b -l
   worship -b 2
   worship -b -d 2
+
+  check course files without opening the TUI; exits 1 on any error
+  # worship check [<dir_or_file>...]
+  worship check
+  worship check ~/courses
+
+  print every lesson line containing all the given words, across all courses
+  # worship search <terms>
+  worship search shadow
+  worship search still waters
+
+  pack the courses directory into one file that loads without parsing
+  # worship compile [<courses_dir>] [-o <pack>] [-z]
+  worship compile
+  worship compile ~/courses -o ~/courses.pack -z
 """
 
 
+def _compile(argv: list[str], courses_dir: str, pack_path: str) -> int:
+    from modules.course_pack import PackError, compile_courses
+
+    args = list(argv)
+    compress = "-z" in args
+    if compress:
+        args.remove("-z")
+    if "-o" in args:
+        i = args.index("-o")
+        if i + 1 >= len(args):
+            print("Usage: worship compile [<courses_dir>] [-o <pack>] [-z]")
+            return 1
+        pack_path = args[i + 1]
+        del args[i : i + 2]
+    if len(args) > 1:
+        print("Usage: worship compile [<courses_dir>] [-o <pack>] [-z]")
+        return 1
+    if args:
+        courses_dir = args[0]
+
+    try:
+        n_courses, n_lessons = compile_courses(courses_dir, pack_path, compress)
+    except (OSError, PackError) as e:
+        print(f"Error: {e}")
+        return 1
+    print(f"Packed {n_courses} courses, {n_lessons} lessons into {pack_path}")
+    return 0
+
+
+def _load_courses(courses_dir: str, pack_path: str) -> list:
+    from modules.course_cache import CourseCache
+    from modules.course_pack import PackError, load_pack
+    from modules.course_parser import CourseParser
+
+    # An up-to-date pack is one open-and-mmap; otherwise parse the markdown.
+    if os.path.exists(pack_path):
+        try:
+            courses = load_pack(pack_path, courses_dir)
+        except PackError:
+            courses = None
+        if courses:
+            return courses
+
+    parser = CourseParser(courses_dir, cache=CourseCache(), lazy=True)
+    return parser.parse_courses()
+
+
 def _run_app(argv: list[str]) -> int:
     import curses
 
-    from modules.course_parser import CourseParser
+    from modules.course_pack import DEFAULT_PACK_NAME
     from modules.flag_handler import handle_bookmark_flags
+    from modules.library_index import LibraryIndex
     from modules.menu import Menu
 
     os.environ.setdefault("TERM", "xterm-256color")
@@ -47,20 +110,35 @@ def _run_app(argv: list[str]) -> int:
     script_path = os.path.realpath(__file__)
     script_dir = os.path.dirname(script_path)
     courses_dir = os.path.join(script_dir, "courses")
+    pack_path = os.path.join(script_dir, DEFAULT_PACK_NAME)
+
+    if argv[:1] == ["compile"]:
+        return _compile(argv[1:], courses_dir, pack_path)
+    if argv[:1] == ["check"]:
+        from modules.course_check import run_check
+
+        return run_check(argv[1:] or [courses_dir])
 
-    parser = CourseParser(courses_dir)
-    courses = parser.parse_courses()
+    courses = _load_courses(courses_dir, pack_path)
     if not courses:
         print("No valid courses found in the courses directory.")
         return 1
 
-    handle_bookmark_flags(courses)
+    if argv[:1] == ["search"]:
+        from modules.search_index import run_search
+
+        return run_search(courses, " ".join(argv[1:]))
+
+    index = LibraryIndex(courses)
+    handle_bookmark_flags(courses, index)
 
     doc_mode = True
     if "-d" in argv or "--doc" in argv:
         doc_mode = True
 
-    menu = Menu(courses, doc_mode=doc_mode)
+    # The search index is built on the first `/` (Menu._run_search), so
+    # sessions that never search keep lesson bodies lazy.
+    menu = Menu(courses, doc_mode=doc_mode, index=index)
     try:
         curses.wrapper(menu.run)
     except KeyboardInterrupt:
@@ -3,10 +3,13 @@ import os
 from pathlib import Path
 import curses
 from .key_utils import is_quit_request
+from .input_scheduler import InputScheduler
+from .frame import present
 
 
 class Bookmarks:
     BOOKMARKS_FILE = Path(os.path.expanduser("~/.config/worship/bookmarks.conf"))
+    DD_TIMEOUT = 0.5
 
     def __init__(self):
         self._ensure_config_dir()
@@ -14,28 +17,20 @@ class Bookmarks:
     def _ensure_config_dir(self):
         self.BOOKMARKS_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    def add(self, courses, display_name, lesson_name):
+    def add(self, index, display_name, lesson_name, lesson=None):
         # Find real hierarchy
         course_name = part_name = section_name = ""
 
-        for course in courses:
-            if display_name == course.name or display_name.startswith(
-                course.name + ":"
-            ):
-                for part in course.parts:
-                    for section in part.sections:
-                        for lesson in section.lessons:
-                            if lesson.name == lesson_name:
-                                course_name = course.name
-                                part_name = part.name
-                                section_name = section.name
-                                break
-                        if course_name:
-                            break
-                    if course_name:
-                        break
-                if course_name:
-                    break
+        course = index.course_for_display(display_name)
+        if course is not None:
+            entry = None
+            if lesson is not None:
+                entry = index.locate(course.name, lesson)
+            entry = entry or index.find(course.name, lesson_name)
+            if entry:
+                course_name = entry.course.name
+                part_name = entry.part.name
+                section_name = entry.section.name
 
         if not course_name:
             course_name = (
@@ -125,28 +120,26 @@ class Bookmarks:
             self.BOOKMARKS_FILE.unlink(missing_ok=True)
 
     def show_menu_and_jump(self, stdscr, courses):
+        scheduler = InputScheduler(stdscr)
         items = self._parse_bookmarks()
         if not items:
             max_y, max_x = stdscr.getmaxyx()
             msg = "No bookmarks yet. Press any key..."
             try:
                 stdscr.addstr(max_y // 2, (max_x - len(msg)) // 2, msg, curses.A_BOLD)
-                stdscr.refresh()
-                stdscr.nodelay(False)
-                stdscr.getch()
-                stdscr.nodelay(True)
+                present(stdscr, screen="bookmarks")
+                scheduler.wait_for_key()
             except:
                 pass
             return None
 
         selected = 0
-        last_d_time = 0  # Timestamp of last 'd' press
         need_redraw = True
         curses.curs_set(0)
 
         while True:
             if need_redraw:
-                stdscr.clear()
+                stdscr.erase()
                 max_y, max_x = stdscr.getmaxyx()
 
                 try:
@@ -178,22 +171,21 @@ class Bookmarks:
                 except:
                     pass
 
-                stdscr.refresh()
+                present(stdscr, screen="bookmarks")
                 need_redraw = False
 
-            key = stdscr.getch()
+            key = scheduler.wait()
             if key == -1:
                 continue
+            if key == curses.KEY_RESIZE:
+                need_redraw = True
+                continue
 
             if is_quit_request(key):
                 if key in (ord("q"), ord("Q")):
                     raise SystemExit
                 return None
 
-            current_time = curses.getsyx()[
-                1
-            ]  # Rough timestamp via curses internal counter
-
             if key in (ord("j"), curses.KEY_DOWN):
                 selected = (selected + 1) % len(items)
                 need_redraw = True
@@ -206,10 +198,9 @@ class Bookmarks:
             elif key == 27:  # ESC
                 return None
             elif key == ord("d"):
-                # Only accept second 'd' if within ~500ms
-                if last_d_time and (
-                    current_time - last_d_time < 50
-                ):  # adjust sensitivity if needed
+                # Only accept second 'd' while the first one's window is open
+                if scheduler.active("dd"):
+                    scheduler.cancel("dd")
                     display, _, _, _, _ = items[selected]
                     self.remove(display)
                     items = self._parse_bookmarks()
@@ -219,7 +210,7 @@ class Bookmarks:
                     if selected >= len(items):
                         selected = len(items) - 1
                     need_redraw = True
-                # Always update timestamp on first 'd'
-                last_d_time = current_time
+                else:
+                    scheduler.schedule("dd", self.DD_TIMEOUT)
             else:
-                last_d_time = 0  # Reset on any other key
+                scheduler.cancel("dd")  # Reset on any other key
@@ -1,5 +1,6 @@
 import curses
 from .ascii import boom_art
+from .frame import present
 
 
 class Boom:
@@ -7,7 +8,7 @@ class Boom:
         self.message = message
 
     def display(self, stdscr):
-        stdscr.clear()
+        stdscr.erase()
         max_y, max_x = stdscr.getmaxyx()
         art_lines = boom_art.splitlines()
         content_width = max(len(line) for line in art_lines)
@@ -31,6 +32,6 @@ class Boom:
             )
         except curses.error:
             pass
-        stdscr.refresh()
+        present(stdscr, screen="boom")
         stdscr.nodelay(False)
         stdscr.getch()
@@ -0,0 +1,114 @@
+# ~/Apps/worship/modules/course_cache.py
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from .lesson_body import file_stamp
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / "worship"
+
+
+def file_digest(filepath):
+    h = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _restamped(course, st):
+    # The header vouches that the file still holds the bytes the tree was
+    # parsed from, so lazy bodies take its current stamp; after a touch or
+    # checkout their pickled one would make every read StaleStoreError.
+    stamp = file_stamp(st)
+    for part in course.parts:
+        for section in part.sections:
+            for lesson in section.lessons:
+                if lesson.body is not None:
+                    lesson.body.store.restamp(stamp)
+    return course
+
+
+class CourseCache:
+    """
+    Disk cache of parsed Course trees, one pickle per source file.
+
+    Each entry is a small header (path, mtime, size, content digest) followed
+    by the pickled Course, so a stale entry is rejected without unpickling
+    the tree. When only the mtime/size moved (touch, checkout) the content
+    digest decides, and a matching entry is re-stamped instead of re-parsed.
+    """
+
+    VERSION = 3
+
+    def __init__(self, cache_dir=None):
+        root = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.cache_dir = root / "courses"
+
+    def _entry_path(self, filepath, variant=""):
+        key = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+        suffix = f".{variant}" if variant else ""
+        return self.cache_dir / f"{key}{suffix}.pickle"
+
+    def load(self, filepath, st=None, variant=""):
+        """Return the cached Course for filepath, or None when stale/missing."""
+        st = st or os.stat(filepath)
+        entry_path = self._entry_path(filepath, variant)
+        try:
+            f = open(entry_path, "rb")
+        except OSError:
+            return None
+        with f:
+            try:
+                header = pickle.load(f)
+                if header.get("version") != self.VERSION:
+                    return None
+                if header["path"] != os.path.abspath(filepath):
+                    return None
+                if header["mtime_ns"] != st.st_mtime_ns or header["size"] != st.st_size:
+                    if header["size"] != st.st_size:
+                        return None
+                    if header["digest"] != file_digest(filepath):
+                        return None
+                    course = _restamped(pickle.load(f), st)
+                    self.store(
+                        filepath,
+                        course,
+                        st=st,
+                        digest=header["digest"],
+                        variant=variant,
+                    )
+                    return course
+                return _restamped(pickle.load(f), st)
+            except Exception:
+                return None
+
+    def store(self, filepath, course, st=None, digest=None, variant=""):
+        st = st or os.stat(filepath)
+        header = {
+            "version": self.VERSION,
+            "path": os.path.abspath(filepath),
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "digest": digest or file_digest(filepath),
+        }
+        tmp = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(course, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._entry_path(filepath, variant))
+        except Exception:
+            # A read-only or full cache dir just means we parse next time too.
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
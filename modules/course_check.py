@@ -0,0 +1,82 @@
+# ~/Apps/worship/modules/course_check.py
+"""Headless validation of course files (`worship check`)."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .course_parser import CourseParseError, CourseParser, available_cpus
+
+# Checking is pure parsing, so a pool pays off sooner than at startup.
+PARALLEL_MIN_FILES = 4
+
+
+def course_files(paths):
+    """Expand directories to their .md files; files are taken as given."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".md")
+            )
+        else:
+            files.append(path)
+    return files
+
+
+def check_file(filepath):
+    """
+    Parse filepath and return (filepath, errors, warnings), each problem a
+    (lineno or None, reason) pair. Plain tuples, so results cross the pool.
+    """
+    parser = CourseParser(os.path.dirname(filepath) or ".")
+    parser.warnings = []
+    errors = []
+    try:
+        parser.parse_file(filepath)
+    except CourseParseError as e:
+        errors.append((e.lineno, e.reason))
+    except OSError as e:
+        errors.append((None, e.strerror or str(e)))
+    warnings = [(w.lineno, w.reason) for w in parser.warnings]
+    return filepath, errors, warnings
+
+
+def check_files(filepaths):
+    """check_file over every path, in order, over a process pool if worthwhile."""
+    workers = min(available_cpus(), len(filepaths))
+    if workers > 1 and len(filepaths) >= PARALLEL_MIN_FILES:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(filepaths) // (workers * 4))
+                return list(pool.map(check_file, filepaths, chunksize=chunksize))
+        except (OSError, BrokenProcessPool, NotImplementedError):
+            pass  # no usable pool here: go serial
+    return [check_file(filepath) for filepath in filepaths]
+
+
+def _where(filepath, lineno):
+    return f"{filepath}:{lineno}" if lineno else filepath
+
+
+def run_check(paths, out=print):
+    """Report every problem as file:line: severity: reason; 1 on any error."""
+    filepaths = course_files(paths)
+    if not filepaths:
+        out("No .md course files found.")
+        return 1
+
+    n_errors = n_warnings = 0
+    for filepath, errors, warnings in check_files(filepaths):
+        problems = [(lineno, "error", reason) for lineno, reason in errors]
+        problems += [(lineno, "warning", reason) for lineno, reason in warnings]
+        problems.sort(key=lambda p: p[0] or 0)
+        for lineno, severity, reason in problems:
+            out(f"{_where(filepath, lineno)}: {severity}: {reason}")
+        n_errors += len(errors)
+        n_warnings += len(warnings)
+
+    out(f"{len(filepaths)} files checked: " f"{n_errors} errors, {n_warnings} warnings")
+    return 1 if n_errors else 0
@@ -0,0 +1,290 @@
+# ~/Apps/worship/modules/course_pack.py
+"""
+Single-file binary pack of a whole courses/ directory (`worship compile`).
+
+Layout, all integers little-endian:
+
+    header    HEADER: magic, version, flags, counts and table offsets
+    bodies    one record per lesson: a flag byte (0 raw, 1 zlib) + UTF-8 text
+    strings   every name and source filename, back to back
+    nodes     NODE per course, part and section, in tree order; a course
+              carries its source file's name, mtime and size, and `count`
+              is the number of children (lessons, for a section)
+    lessons   LESSON per lesson, in tree order: name and body byte span
+
+Loading maps the file and walks the two fixed-size tables; no markdown is
+read and lesson bodies stay in the map until a view asks for them. Only the
+small string and node tables are copied out of the map.
+"""
+
+import os
+import struct
+import tempfile
+import zlib
+
+from .lesson_body import LessonBody, LessonStore
+from .structs import Course, Lesson, Part, Section
+
+MAGIC = b"WSPK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIIQQQ")
+NODE = struct.Struct("<BxxxIIIIqqI")
+LESSON = struct.Struct("<IIQI")
+COURSE, PART, SECTION = 1, 2, 3
+RAW, ZLIB = b"\x00", b"\x01"
+DEFAULT_PACK_NAME = "courses.pack"
+
+
+class PackError(Exception):
+    pass
+
+
+class PackStore(LessonStore):
+    """LessonStore over a pack: bodies are stored already tokenised."""
+
+    def _content(self, raw):
+        if raw[:1] == ZLIB:
+            return zlib.decompress(raw[1:]).decode("utf-8")
+        return bytes(raw[1:]).decode("utf-8")
+
+
+class _Strings:
+    def __init__(self):
+        self.blob = bytearray()
+        self.seen = {}
+
+    def add(self, text):
+        ref = self.seen.get(text)
+        if ref is None:
+            data = text.encode("utf-8")
+            ref = self.seen[text] = (len(self.blob), len(data))
+            self.blob += data
+        return ref
+
+
+def write_pack(courses, pack_path, sources, compress=False):
+    """
+    Write courses to pack_path atomically. sources maps each course's
+    source_file to the os.stat_result taken before it was parsed.
+    """
+    strings = _Strings()
+    nodes = bytearray()
+    lessons = bytearray()
+    n_nodes = n_lessons = 0
+
+    directory = os.path.dirname(os.path.abspath(pack_path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\0" * HEADER.size)
+            offset = HEADER.size
+            for course in courses:
+                st = sources[course.source_file]
+                source = os.path.basename(course.source_file)
+                nodes += NODE.pack(
+                    COURSE,
+                    *strings.add(course.name),
+                    *strings.add(source),
+                    st.st_mtime_ns,
+                    st.st_size,
+                    len(course.parts),
+                )
+                n_nodes += 1
+                for part in course.parts:
+                    nodes += NODE.pack(
+                        PART, *strings.add(part.name), 0, 0, 0, 0, len(part.sections)
+                    )
+                    n_nodes += 1
+                    for section in part.sections:
+                        nodes += NODE.pack(
+                            SECTION,
+                            *strings.add(section.name),
+                            0,
+                            0,
+                            0,
+                            0,
+                            len(section.lessons),
+                        )
+                        n_nodes += 1
+                        for lesson in section.lessons:
+                            body = _encode_body(lesson.content, compress)
+                            f.write(body)
+                            lessons += LESSON.pack(
+                                *strings.add(lesson.name), offset, len(body)
+                            )
+                            offset += len(body)
+                            n_lessons += 1
+
+            strings_off = offset
+            f.write(strings.blob)
+            nodes_off = strings_off + len(strings.blob)
+            f.write(nodes)
+            lessons_off = nodes_off + len(nodes)
+            f.write(lessons)
+            f.seek(0)
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    VERSION,
+                    0,
+                    len(courses),
+                    n_nodes,
+                    n_lessons,
+                    strings_off,
+                    nodes_off,
+                    lessons_off,
+                )
+            )
+        os.replace(tmp, pack_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return n_lessons
+
+
+def _encode_body(content, compress):
+    data = content.encode("utf-8")
+    if compress:
+        packed = zlib.compress(data, 9)
+        if len(packed) < len(data):
+            return ZLIB + packed
+    return RAW + data
+
+
+def load_pack(pack_path, courses_dir=None):
+    """
+    Return the list of Courses in pack_path. With courses_dir, return None
+    instead when the pack no longer matches the .md files there (one was
+    added, removed or changed since it was compiled). Raises PackError for
+    a file that is not a pack this version can read.
+    """
+    # Stamped from the pack it maps now; rewritten by a later compile, its
+    # bodies raise StaleStoreError like a changed .md file's do.
+    store = PackStore(pack_path)
+    try:
+        courses, sources = _read_pack(store, pack_path, courses_dir)
+    except BaseException:
+        store.close()
+        raise
+    if courses_dir is not None and not _sources_match(courses_dir, sources):
+        store.close()
+        return None
+    return courses
+
+
+def _read_pack(store, pack_path, courses_dir):
+    try:
+        view = store._mapped()
+    except (OSError, ValueError) as e:
+        raise PackError(f"cannot map {pack_path}: {e}")
+    try:
+        (
+            magic,
+            version,
+            _flags,
+            n_courses,
+            n_nodes,
+            n_lessons,
+            strings_off,
+            nodes_off,
+            lessons_off,
+        ) = HEADER.unpack_from(view)
+    except struct.error:
+        raise PackError(f"{pack_path}: truncated header")
+    if magic != MAGIC or version != VERSION:
+        raise PackError(f"{pack_path}: not a version {VERSION} course pack")
+    if not (
+        HEADER.size <= strings_off <= nodes_off
+        and nodes_off + n_nodes * NODE.size <= lessons_off
+        and lessons_off + n_lessons * LESSON.size <= len(view)
+    ):
+        raise PackError(f"{pack_path}: truncated tables")
+
+    strings = view[strings_off:nodes_off]
+    base_dir = os.path.abspath(courses_dir or os.path.dirname(pack_path))
+
+    def text(off, length):
+        if off + length > len(strings):
+            raise PackError(f"{pack_path}: corrupt string table")
+        return strings[off : off + length].decode("utf-8")
+
+    nodes = NODE.iter_unpack(view[nodes_off : nodes_off + n_nodes * NODE.size])
+    lessons = LESSON.iter_unpack(
+        view[lessons_off : lessons_off + n_lessons * LESSON.size]
+    )
+    sources = {}
+    courses = []
+    try:
+        for _ in range(n_courses):
+            kind, name_off, name_len, src_off, src_len, mtime_ns, size, n_parts = next(
+                nodes
+            )
+            if kind != COURSE:
+                raise PackError(f"{pack_path}: corrupt hierarchy table")
+            source = text(src_off, src_len)
+            sources[source] = (mtime_ns, size)
+            parts = []
+            for _ in range(n_parts):
+                part_node = next(nodes)
+                if part_node[0] != PART:
+                    raise PackError(f"{pack_path}: corrupt hierarchy table")
+                sections = []
+                for _ in range(part_node[-1]):
+                    section_node = next(nodes)
+                    if section_node[0] != SECTION:
+                        raise PackError(f"{pack_path}: corrupt hierarchy table")
+                    section_lessons = []
+                    for _ in range(section_node[-1]):
+                        l_off, l_len, body_off, body_len = next(lessons)
+                        if body_off + body_len > strings_off:
+                            raise PackError(f"{pack_path}: corrupt lesson table")
+                        body = LessonBody(store, body_off, body_off + body_len)
+                        section_lessons.append(Lesson(text(l_off, l_len), body=body))
+                    sections.append(Section(text(*section_node[1:3]), section_lessons))
+                parts.append(Part(text(*part_node[1:3]), sections))
+            source_file = os.path.join(base_dir, source)
+            courses.append(
+                Course(text(name_off, name_len), parts, source_file=source_file)
+            )
+    except (StopIteration, UnicodeDecodeError):
+        raise PackError(f"{pack_path}: corrupt hierarchy table")
+    return courses, sources
+
+
+def _sources_match(courses_dir, sources):
+    try:
+        names = [n for n in os.listdir(courses_dir) if n.endswith(".md")]
+    except OSError:
+        return False
+    if set(names) != set(sources):
+        return False
+    for name in names:
+        try:
+            st = os.stat(os.path.join(courses_dir, name))
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) != sources[name]:
+            return False
+    return True
+
+
+def compile_courses(courses_dir, pack_path, compress=False):
+    """Parse every course in courses_dir and pack it; returns (courses, lessons)."""
+    from .course_parser import CourseParser
+
+    sources = {}
+    for name in os.listdir(courses_dir):
+        if name.endswith(".md"):
+            filepath = os.path.join(os.path.abspath(courses_dir), name)
+            sources[filepath] = os.stat(filepath)
+    courses = CourseParser(courses_dir).parse_courses()
+    packed = {course.source_file for course in courses}
+    failed = sorted(set(sources) - packed)
+    if failed:
+        # A pack missing a course would never match the directory again.
+        raise PackError(f"not packing, failed to parse: {', '.join(failed)}")
+    n_lessons = write_pack(courses, pack_path, sources, compress=compress)
+    return len(courses), n_lessons
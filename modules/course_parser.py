@@ -1,270 +1,437 @@
 # ~/Apps/rtutor/modules/course_parser.py
+import hashlib
 import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from modules.structs import Course, Part, Section, Lesson
+from modules.course_cache import CourseCache, file_digest
+from modules.lesson_body import (
+    RESIDENT,
+    LessonBody,
+    LessonStore,
+    file_stamp,
+    tokenise_body,
+)
+
+# Column-0 heading markers and the level they open.
+HEADING_PREFIXES = ((b"# ", 1), (b"## ", 2), (b"### ", 3), (b"#### ", 4))
+# Indented "### " / "#### " lines still count towards the hierarchy depth.
+INDENTED_HEADING_RX = re.compile(rb"^[ \t][ \t\r\x0b\x0c]*(####?) ", re.M)
+# A lesson has content iff its body holds at least one indented line.
+CONTENT_RX = re.compile(rb"^(?:    |\t)", re.M)
+BLOCK_SIZE = 1 << 18
+
+# Below both thresholds a process pool costs more to start than it saves.
+PARALLEL_MIN_FILES = 8
+PARALLEL_MIN_BYTES = 8 << 20
+
+# What each heading level means, keyed by the deepest level in the file:
+#   2 -> flat: # course, ## lesson
+#   3 -> mid:  # course, ## part, ### lesson
+#   4 -> full: # course, ## part, ### section, #### lesson
+HIERARCHY = {
+    2: {2: "lesson"},
+    3: {2: "part", 3: "lesson"},
+    4: {2: "part", 3: "section", 4: "lesson"},
+}
+
+
+# Where a lesson body sits in its source file; digest covers the raw bytes.
+LessonSpan = namedtuple("LessonSpan", "lesson start end digest")
+
+
+class CourseParseError(Exception):
+    def __init__(self, filepath, lineno, reason):
+        self.filepath = filepath
+        self.lineno = lineno
+        self.reason = reason
+        where = f"{filepath}:{lineno}" if lineno else filepath
+        super().__init__(f"{where}: {reason}")
+
+
+def _headings(block):
+    """Yield (start, end, level, name) for each column-0 heading in block."""
+    start = 0 if block.startswith(b"#") else (block.find(b"\n#") + 1 or -1)
+    while start >= 0:
+        end = block.find(b"\n", start)
+        if end < 0:
+            end = len(block)
+        for prefix, level in HEADING_PREFIXES:
+            if block.startswith(prefix, start):
+                yield start, end, level, block[start + level + 1 : end]
+                break
+        start = block.find(b"\n#", end) + 1 or -1
+
+
+def _blocks(f, size=BLOCK_SIZE):
+    """Yield (offset, data) reads of f that always end on a line boundary."""
+    offset = 0
+    tail = b""
+    while True:
+        data = f.read(size)
+        if not data:
+            if tail:
+                yield offset, tail
+            return
+        data = tail + data
+        cut = data.rfind(b"\n") + 1
+        if not cut:
+            tail = data
+            continue
+        yield offset, data[:cut]
+        offset += cut
+        tail = data[cut:]
+
+
+class _OpenHeading:
+    """A heading whose body is still streaming past."""
+
+    __slots__ = ("level", "name", "lineno", "start", "chunks", "hasher", "has_content")
+
+    def __init__(self, level, name, lineno, start, keep_chunks):
+        self.level = level
+        self.name = name
+        self.lineno = lineno
+        self.start = start  # file offset of the body
+        self.chunks = [] if keep_chunks else None
+        self.hasher = hashlib.blake2b(digest_size=8)
+        self.has_content = False
+
+    def feed(self, view, start, end):
+        data = view[start:end]
+        self.hasher.update(data)
+        if self.chunks is not None:
+            self.chunks.append(bytes(data))
+        if not self.has_content:
+            self.has_content = bool(CONTENT_RX.search(view.obj, start, end))
+
+
+def available_cpus():
+    """CPUs this process may run on, for sizing a process pool."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _parse_job(job):
+    """Process-pool entry point: (filepath, lazy, with_digest) -> (course, digest)."""
+    filepath, lazy, with_digest = job
+    parser = CourseParser(os.path.dirname(filepath), lazy=lazy)
+    return parser._parse_one(filepath, with_digest)
 
 
 class CourseParser:
-    def __init__(self, courses_dir):
+    def __init__(self, courses_dir, cache=None, lazy=False, max_resident_lessons=None):
         self.courses_dir = os.path.abspath(courses_dir)
+        self.cache = cache  # optional CourseCache; None parses every time
+        # Lazy mode only indexes headings and body byte ranges; Lesson.content
+        # is then read through mmap on first access (see lesson_body).
+        self.lazy = lazy
+        # A list here collects non-fatal CourseParseErrors (see course_check).
+        self.warnings = None
+        if max_resident_lessons:
+            RESIDENT.resize(max_resident_lessons)
 
     def parse_courses(self):
         """Parse all .md files in the courses_dir into a list of Course objects."""
-        courses = []
         if not os.path.isdir(self.courses_dir):
             raise FileNotFoundError(f"Directory {self.courses_dir} does not exist")
 
-        for filename in os.listdir(self.courses_dir):
-            if filename.endswith(".md"):
-                filepath = os.path.join(self.courses_dir, filename)
-                course = self._parse_md_file(filepath)
-                if course:
-                    courses.append(course)
-                else:
-                    print(f"Failed to parse course from: {filepath}")
+        filepaths = [
+            os.path.join(self.courses_dir, filename)
+            for filename in sorted(os.listdir(self.courses_dir))
+            if filename.endswith(".md")
+        ]
+        loaded = {}
+        misses = []
+        for filepath in filepaths:
+            course, st = self._load_cached(filepath)
+            if course is not None:
+                loaded[filepath] = course
+            else:
+                misses.append((filepath, st))
+
+        for (filepath, st), (course, digest) in zip(misses, self._parse_many(misses)):
+            loaded[filepath] = course
+            if course and st is not None:
+                self._store_cached(filepath, course, st, digest)
+
+        courses = []
+        for filepath in filepaths:
+            course = loaded[filepath]
+            if course:
+                courses.append(course)
+            else:
+                print(f"Failed to parse course from: {filepath}")
         return courses
 
+    def _parse_many(self, misses):
+        """Parse files in order, over a process pool once the batch is big."""
+        with_digest = self.cache is not None
+        jobs = [(filepath, self.lazy, with_digest) for filepath, _ in misses]
+        total_bytes = sum(st.st_size for _, st in misses if st is not None)
+        workers = min(available_cpus(), len(jobs))
+        if workers > 1 and (
+            len(jobs) >= PARALLEL_MIN_FILES or total_bytes >= PARALLEL_MIN_BYTES
+        ):
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    chunksize = max(1, len(jobs) // (workers * 4))
+                    return list(pool.map(_parse_job, jobs, chunksize=chunksize))
+            except (OSError, BrokenProcessPool, NotImplementedError):
+                pass  # no usable pool here (sandbox, missing sem_open): go serial
+        return [self._parse_one(filepath, with_digest) for filepath, _ in misses]
+
+    def _parse_one(self, filepath, with_digest):
+        # Hash before parsing so an edit racing the parse leaves a stale key
+        digest = file_digest(filepath) if with_digest else None
+        return self._parse_md_file(filepath), digest
+
+    def _load_cached(self, filepath):
+        """Return (cached Course or None, stat or None) for filepath."""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None, None
+        if self.cache is None:
+            return None, st
+        return self.cache.load(filepath, st, variant=self._variant()), st
+
+    def _store_cached(self, filepath, course, st, digest):
+        if self.cache is not None:
+            self.cache.store(
+                filepath, course, st=st, digest=digest, variant=self._variant()
+            )
+
+    def _variant(self):
+        return "lazy" if self.lazy else ""
+
+    def load_course(self, filepath):
+        """Return the Course for filepath, from the cache when it is still valid."""
+        course, st = self._load_cached(filepath)
+        if course is not None:
+            return course
+        if st is None:
+            return self._parse_md_file(filepath)
+        course, digest = self._parse_one(filepath, self.cache is not None)
+        if course:
+            self._store_cached(filepath, course, st, digest)
+        return course
+
+    def parse_file(self, filepath):
+        """
+        Parse filepath afresh, bypassing the cache. Raises CourseParseError
+        or OSError; non-fatal problems go to self.warnings when it is a list.
+        """
+        with open(filepath, "rb") as f:
+            return self._parse_stream(f, filepath)
+
     def _parse_md_file(self, filepath):
         """Parse a single .md file into a Course object."""
-        course_name = None
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                lines = f.readlines()
+            return self.parse_file(filepath)
+        except CourseParseError as e:
+            print(f"Error: {e}")
+            return None
         except Exception as e:
             print(f"Error reading {filepath}: {e}")
             return None
 
-        # Detect hierarchy levels
-        has_parts = any(line.lstrip().startswith("### ") for line in lines)
-        has_sections = any(line.lstrip().startswith("#### ") for line in lines)
-
-        if has_sections:
-            # Full hierarchy: # course, ## part, ### section, #### lesson
-            parts = []
-            current_part = None
-            current_section = None
-            current_lesson_name = None
-            lesson_content = []
-            in_code_block = False
-
-            for line in lines:
-                line = line.rstrip("\n")
-
-                if line.startswith("# "):
-                    if course_name:
-                        print(f"Error: Multiple course names in {filepath}")
-                        return None
-                    course_name = line[2:].strip()
-                    continue
-
-                if line.startswith("## "):
-                    if current_lesson_name and lesson_content:
-                        content = "\n".join(lesson_content) + "\n" * 7
-                        current_section.lessons.append(
-                            Lesson(current_lesson_name, content)
-                        )
-                        lesson_content = []
-                    if current_section:
-                        current_part.sections.append(current_section)
-                    if current_part:
-                        parts.append(current_part)
-                    current_part = Part(line[3:].strip(), [])
-                    current_section = None
-                    current_lesson_name = None
-                    in_code_block = False
-                    continue
-
-                if line.startswith("### "):
-                    if current_lesson_name and lesson_content:
-                        content = "\n".join(lesson_content) + "\n" * 7
-                        current_section.lessons.append(
-                            Lesson(current_lesson_name, content)
-                        )
-                        lesson_content = []
-                    if current_section:
-                        current_part.sections.append(current_section)
-                    if not current_part:
-                        return None
-                    current_section = Section(line[4:].strip(), [])
-                    current_lesson_name = None
-                    in_code_block = False
-                    continue
-
-                if line.startswith("#### "):
-                    if current_lesson_name and lesson_content:
-                        content = "\n".join(lesson_content) + "\n" * 7
-                        current_section.lessons.append(
-                            Lesson(current_lesson_name, content)
-                        )
-                        lesson_content = []
-                    if not current_section:
-                        print(f"Error: Lesson without section in {filepath}")
-                        return None
-                    current_lesson_name = line[5:].strip()
-                    in_code_block = False
-                    continue
-
-                if current_lesson_name and (
-                    line.startswith("    ") or line.startswith("\t")
-                ):
-                    in_code_block = True
-                    content_line = line[4:] if line.startswith("    ") else line[1:]
-                    lesson_content.append(content_line.rstrip())
-                    continue
-
-                if in_code_block and not line.strip():
-                    lesson_content.append("")
-                    continue
-
-                if (
-                    in_code_block
-                    and line.strip()
-                    and not (line.startswith("    ") or line.startswith("\t"))
-                ):
-                    in_code_block = False
-
-            # Final save
-            if current_lesson_name and lesson_content:
-                content = "\n".join(lesson_content) + "\n" * 7
-                current_section.lessons.append(Lesson(current_lesson_name, content))
-            if current_section:
-                current_part.sections.append(current_section)
-            if current_part:
-                parts.append(current_part)
-
-            if course_name and parts:
-                return Course(course_name, parts, source_file=filepath)
-            return None
-
-        elif has_parts:
-            # Mid hierarchy: # course, ## part, ### lesson
-            parts = []
-            current_part = None
-            current_lesson_name = None
-            lesson_content = []
-            in_code_block = False
-
-            for line in lines:
-                line = line.rstrip("\n")
-
-                if line.startswith("# "):
+    def reparse(self, course):
+        """
+        Re-read course.source_file after an edit. Lessons whose heading and
+        raw body bytes are unchanged (per course.source_map) are reused as
+        the same objects; only changed regions are tokenised again.
+        Raises CourseParseError.
+        """
+        filepath = course.source_file
+        st = os.stat(filepath)
+        digest = file_digest(filepath) if self.cache is not None else None
+        reuse = {}
+        for span in course.source_map or ():
+            key = (span.lesson.name, span.digest)
+            reuse.setdefault(key, []).append(span.lesson)
+        with open(filepath, "rb") as f:
+            new_course = self._parse_stream(f, filepath, reuse=reuse)
+        self._store_cached(filepath, new_course, st, digest)
+        return new_course
+
+    def _parse_stream(self, f, filepath, reuse=None):
+        """
+        Single pass over a binary file object, read in line-aligned blocks.
+        Headings are located with bytes.find and recorded as (level, name,
+        lineno, content, span) tokens as the file streams by; body lines are
+        never looped over here. The hierarchy depth is only known at EOF, so
+        HIERARCHY turns the tokens into the Course tree afterwards. In lazy
+        mode the content is a LessonBody byte span instead of a string.
+        Raises CourseParseError.
+        """
+        # Body offsets are taken from the file as it is now; a later edit
+        # makes them stale, and the store refuses to read them (lesson_body).
+        try:
+            stamp = file_stamp(os.fstat(f.fileno()))
+        except (AttributeError, OSError):
+            stamp = None  # not a real file (tests); stamped on first read
+        store = LessonStore(filepath, stamp)
+        course_name = None
+        depth = 2
+        tokens = []
+        heading = None  # _OpenHeading whose body is being read
+        lineno_base = 1
+        end = 0
+
+        for offset, block in _blocks(f):
+            view = memoryview(block)
+            end = offset + len(block)
+            region = 0  # start of the not yet attributed body bytes
+            counted = 0
+            lineno = lineno_base
+            for start, line_end, level, raw_name in _headings(block):
+                lineno += block.count(b"\n", counted, start)
+                counted = start
+                name = self._decode(raw_name, filepath, lineno).strip()
+                if level == 1:
                     if course_name:
-                        print(f"Error: Multiple course names in {filepath}")
-                        return None
-                    course_name = line[2:].strip()
-                    continue
-
-                if line.startswith("## "):
-                    if current_lesson_name and lesson_content:
-                        content = "\n".join(lesson_content) + "\n" * 7
-                        current_part.sections[-1].lessons.append(
-                            Lesson(current_lesson_name, content)
+                        raise CourseParseError(
+                            filepath, lineno, "multiple course names"
                         )
-                        lesson_content = []
-                    if current_part:
-                        parts.append(current_part)
-                    current_part = Part(line[3:].strip(), [Section("Main", [])])
-                    current_lesson_name = None
-                    in_code_block = False
-                    continue
+                    course_name = name
+                    continue  # the title line never ends a lesson body
+
+                if heading:
+                    heading.feed(view, region, start)
+                    tokens.append(
+                        self._close(filepath, heading, offset + start, store, reuse)
+                    )
+                if level > depth:
+                    depth = level
+                region = line_end + 1
+                heading = _OpenHeading(
+                    level, name, lineno, offset + region, not self.lazy
+                )
 
-                if line.startswith("### "):
-                    if current_lesson_name and lesson_content:
-                        content = "\n".join(lesson_content) + "\n" * 7
-                        current_part.sections[-1].lessons.append(
-                            Lesson(current_lesson_name, content)
+            # Indented "### " lines only matter while the depth is undecided;
+            # the substring test keeps the regex off blocks that cannot match.
+            if (depth < 3 and b"### " in block) or (depth == 3 and b"#### " in block):
+                for m in INDENTED_HEADING_RX.finditer(block):
+                    level = len(m.group(1))
+                    if level > depth and self.warnings is not None:
+                        self._warn(
+                            filepath,
+                            lineno_base + block.count(b"\n", 0, m.start()),
+                            f"indented '{'#' * level} ' line makes this a "
+                            f"depth-{level} course",
                         )
-                        lesson_content = []
-                    if not current_part:
-                        print(f"Error: Lesson without part in {filepath}")
-                        return None
-                    current_lesson_name = line[4:].strip()
-                    in_code_block = False
-                    continue
+                    depth = max(depth, level)
 
-                if current_lesson_name and (
-                    line.startswith("    ") or line.startswith("\t")
-                ):
-                    in_code_block = True
-                    content_line = line[4:] if line.startswith("    ") else line[1:]
-                    lesson_content.append(content_line.rstrip())
-                    continue
-
-                if in_code_block and not line.strip():
-                    lesson_content.append("")
-                    continue
+            if heading:
+                heading.feed(view, region, len(block))
+            lineno_base += block.count(b"\n")
 
-                if (
-                    in_code_block
-                    and line.strip()
-                    and not (line.startswith("    ") or line.startswith("\t"))
-                ):
-                    in_code_block = False
-
-            # Final save
-            if current_lesson_name and lesson_content:
-                content = "\n".join(lesson_content) + "\n" * 7
-                current_part.sections[-1].lessons.append(
-                    Lesson(current_lesson_name, content)
-                )
-            if current_part:
-                parts.append(current_part)
-
-            if course_name and parts:
-                return Course(course_name, parts, source_file=filepath)
-            return None
+        if heading:
+            tokens.append(self._close(filepath, heading, end, store, reuse))
+        return self._build_course(filepath, course_name, depth, tokens, store)
 
+    @staticmethod
+    def _decode(raw, filepath, lineno):
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise CourseParseError(filepath, lineno, f"invalid UTF-8 ({e.reason})")
+
+    def _close(self, filepath, heading, end, store, reuse):
+        span = (heading.start, end, heading.hasher.digest())
+        if not heading.has_content:
+            content = None
+        elif reuse and reuse.get((heading.name, span[2])):
+            content = reuse[(heading.name, span[2])].pop(0)
+        elif self.lazy:
+            content = LessonBody(store, heading.start, end)
         else:
-            # Flat structure: # course, ## lesson
-            lessons = []
-            current_lesson_name = None
-            lesson_content = []
-            in_code_block = False
-
-            for line in lines:
-                line = line.rstrip("\n")
-
-                if line.startswith("# "):
-                    if course_name:
-                        print(f"Error: Multiple course names in {filepath}")
-                        return None
-                    course_name = line[2:].strip()
-                    continue
-
-                if line.startswith("## "):
-                    if current_lesson_name and lesson_content:
-                        content = "\n".join(lesson_content) + "\n" * 7
-                        lessons.append(Lesson(current_lesson_name, content))
-                        lesson_content = []
-                    current_lesson_name = line[3:].strip()
-                    in_code_block = False
-                    continue
-
-                if current_lesson_name and (
-                    line.startswith("    ") or line.startswith("\t")
-                ):
-                    in_code_block = True
-                    content_line = line[4:] if line.startswith("    ") else line[1:]
-                    lesson_content.append(content_line.rstrip())
-                    continue
-
-                if in_code_block and not line.strip():
-                    lesson_content.append("")
+            text = self._decode(b"".join(heading.chunks), filepath, heading.lineno)
+            content = tokenise_body(text)
+        return heading.level, heading.name, heading.lineno, content, span
+
+    def _warn(self, filepath, lineno, reason):
+        if self.warnings is not None:
+            self.warnings.append(CourseParseError(filepath, lineno, reason))
+
+    def _build_course(self, filepath, course_name, depth, tokens, store):
+        roles = HIERARCHY[depth]
+        containers = []  # (lineno, kind, children) checked for emptiness
+        parts = []  # (name, [(section name, [lessons])]) until the tree is frozen
+        lessons = []  # flat hierarchy only
+        source_map = []
+        part = section = None
+
+        for level, name, lineno, content, (start, end, digest) in tokens:
+            role = roles.get(level)
+            if role == "part":
+                section = ("Main", []) if depth == 3 else None
+                part = (name, [section] if section else [])
+                parts.append(part)
+                if section:
+                    containers.append((lineno, "part", "lessons", section[1]))
+                else:
+                    containers.append((lineno, "part", "sections", part[1]))
+            elif role == "section":
+                if not part:
+                    raise CourseParseError(filepath, lineno, "section without part")
+                section = (name, [])
+                part[1].append(section)
+                containers.append((lineno, "section", "lessons", section[1]))
+            elif role == "lesson":
+                if depth == 2:
+                    target = lessons
+                elif not section:
+                    missing = "part" if depth == 3 else "section"
+                    raise CourseParseError(
+                        filepath, lineno, f"lesson without {missing}"
+                    )
+                else:
+                    target = section[1]
+                if isinstance(content, Lesson):
+                    lesson = content  # unchanged since the last parse
+                    if lesson.body is not None:
+                        lesson.body.move(store, start, end)
+                elif isinstance(content, LessonBody):
+                    lesson = Lesson(name, body=content)
+                elif content is not None:
+                    lesson = Lesson(name, content)
+                else:
+                    self._warn(filepath, lineno, "lesson has no indented lines")
                     continue
-
-                if (
-                    in_code_block
-                    and line.strip()
-                    and not (line.startswith("    ") or line.startswith("\t"))
-                ):
-                    in_code_block = False
-
-            # Final save
-            if current_lesson_name and lesson_content:
-                content = "\n".join(lesson_content) + "\n" * 7
-                lessons.append(Lesson(current_lesson_name, content))
-
-            if course_name and lessons:
-                sections = [Section("Main", lessons)]
-                parts = [Part("Main", sections)]
-                return Course(course_name, parts, source_file=filepath)
-            return None
+                target.append(lesson)
+                source_map.append(LessonSpan(lesson, start, end, digest))
+
+        if not course_name:
+            raise CourseParseError(filepath, None, "missing '# ' course title")
+        for lineno, kind, what, children in containers:
+            if not children:
+                self._warn(filepath, lineno, f"{kind} has no {what}")
+        if depth == 2:
+            if not lessons:
+                raise CourseParseError(filepath, None, "no lessons")
+            parts = [("Main", [("Main", lessons)])]
+        elif not parts:
+            raise CourseParseError(filepath, None, "no parts")
+        parts = [
+            Part(part_name, [Section(*section) for section in sections])
+            for part_name, sections in parts
+        ]
+        return Course(course_name, parts, source_file=filepath, source_map=source_map)
+
+
+def reload_course(course):
+    """
+    Re-parse a lazy course whose source file changed under its LessonStore
+    (StaleStoreError on a body read). Unchanged lessons are reused, as after
+    an edit. Raises OSError or CourseParseError.
+    """
+    parser = CourseParser(
+        os.path.dirname(course.source_file), cache=CourseCache(), lazy=True
+    )
+    return parser.reparse(course)
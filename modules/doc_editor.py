@@ -9,10 +9,13 @@ class DocEditor:
     Encapsulates logic to edit a lesson in the source markdown using Vim.
     Usage: instantiate with source_file path, then call edit_lesson(stdscr, lesson_name, current_idx).
     Returns (reloaded_lessons, course_name, new_idx) on success, or None on failure/no-change.
+    When the Course the lesson came from is passed in, only the lessons whose source
+    changed are re-parsed; the reloaded Course is left in self.course.
     """
 
-    def __init__(self, source_file):
+    def __init__(self, source_file, course=None):
         self.source_file = source_file
+        self.course = course
 
     def _show_msg(self, stdscr, msg, max_y, max_x, delay_ms=1500):
         try:
@@ -76,12 +79,24 @@ class DocEditor:
 
         # === RELOAD COURSE AFTER EDITING ===
         try:
+            from modules.course_cache import CourseCache
             from modules.course_parser import CourseParser
 
-            parser = CourseParser(os.path.dirname(self.source_file))
-            new_course = parser._parse_md_file(self.source_file)
+            course = self.course
+            if course is not None and course.source_map is not None:
+                lazy = any(span.lesson.body is not None for span in course.source_map)
+                parser = CourseParser(
+                    os.path.dirname(self.source_file), cache=CourseCache(), lazy=lazy
+                )
+                new_course = parser.reparse(course)
+            else:
+                parser = CourseParser(
+                    os.path.dirname(self.source_file), cache=CourseCache()
+                )
+                new_course = parser.load_course(self.source_file)
             if not new_course:
                 return None
+            self.course = new_course
 
             reloaded_lessons = []
             for part in new_course.parts:
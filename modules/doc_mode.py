@@ -1,14 +1,26 @@
 # ~/Apps/rtutor/modules/doc_mode.py
 import curses
 import sys
-import time
-import re
 import subprocess
+from bisect import bisect_right
+from itertools import chain
 from .rote_mode import RoteMode
 from .touch_type_mode import TouchTypeMode
 from .doc_editor import DocEditor
+from .course_parser import CourseParseError
 from .bookmarks import Bookmarks
 from .key_utils import is_quit_request
+from .input_scheduler import InputScheduler
+from .lesson_body import StaleStoreError
+from .lesson_model import lesson_model
+from .lesson_search import LessonSearch, SectionSearch, fold
+from .line_renderer import TAB, draw_runs, span_runs
+from .viewport import ScrollingBody
+from .frame import present
+from .fuzzy_finder import FinderScreen
+from .library_index import sequencer_name
+
+MATCH_ATTR = curses.A_BOLD | curses.A_UNDERLINE  # search matches on screen
 
 
 class DocMode:
@@ -23,56 +35,64 @@ class DocMode:
         self.visual_start_line = None
         self.visual_start_col = None
         self.bookmarks = Bookmarks()
+        self.scheduler = None
+        self.toast = None  # transient status message shown in the bottom line
+        self.body = ScrollingBody()
+        self._shown_marks = {}  # highlighted spans on screen, by line
+        self.model = None  # LessonModel of the lesson on screen
+        self.layout = None  # its WrapLayout at the current pane width
 
         if hasattr(sequencer, "target_lesson_name"):
             for i, lesson in enumerate(sequencer.lessons):
                 if lesson.name == sequencer.target_lesson_name:
                     self.idx = i
                     break
+        # (line, col) to open the lesson at, e.g. a library search hit
+        self.target_cursor = getattr(sequencer, "target_cursor", None)
 
-        # For comma-then-j/k
-        self.last_comma_time = 0
+        # For comma-then-j/k (armed as the "comma" scheduler timer)
         self.COMMA_TIMEOUT = 0.35
 
-        # For ya copy all
-        self.last_y_time = 0
+        # For ya copy all (armed as the "ya" scheduler timer)
         self.YA_TIMEOUT = 0.35
+        self.TOAST_TIMEOUT = 0.8
+
+        # Footer refresh while a large section is searched in the background
+        self.SEARCH_POLL = 0.2
 
-        # For search - Vim style
+        # For search - Vim style, matched as the term is typed
         self.search_mode = False
         self.search_term = ""  # current term being typed
         self.last_search_term = ""  # last successful search term
-        self.match_lines = []  # list of line indices that match the last successful term
-        self.current_match_idx = (
-            -1
-        )  # index in match_lines of currently highlighted match
-        self.search_direction_forward = True  # True = n goes forward, False = backward
-
-    def get_display_col(self, line, char_idx):
-        col = 0
-        for i in range(min(char_idx, len(line))):
-            if line[i] == "\t":
-                col += 4
-            else:
-                col += 1
-        return col
-
-    def set_col_to_desired(self, line):
-        line_len = len(line)
-        display = 0
-        col = 0
-        for i in range(line_len):
-            if display > self.desired_display_col:
-                break
-            col = i
-            if line[i] == "\t":
-                display += 4
-            else:
-                display += 1
-        else:
-            col = line_len
+        self.search = None  # LessonSearch of the lesson on screen
+        self.section_search = None  # SectionSearch over all the lessons
+        self._search_origin = None  # (line, col, offset) when / was pressed
+
+    def get_display_col(self, line_idx, char_idx):
+        cols = self.model.display_cols(line_idx)
+        return cols[min(char_idx, len(cols) - 1)]
+
+    def _row_x(self):
+        """Screen column of the cursor within its soft-wrapped row."""
+        line = self.cursor_line
+        k = self.layout.row_of(line, self.cursor_col) - self.layout.first_row[line]
+        start, _ = self.layout.span(line, k)
+        return self.get_display_col(line, self.cursor_col) - self.get_display_col(
+            line, start
+        )
+
+    def set_col_to_desired(self, line_idx, k=0):
+        # On row k of the line: the last character starting at or before
+        # the desired column, or the end of the line when its last row is
+        # too short to reach it.
+        cols = self.model.display_cols(line_idx)
+        start, end = self.layout.span(line_idx, k)
+        target = cols[start] + self.desired_display_col
+        col = max(start, bisect_right(cols, target, start, end) - 1)
+        if end == len(cols) - 1 and col == end - 1:
+            col = end
         self.cursor_col = col
-        self.desired_display_col = self.get_display_col(line, col)
+        self.desired_display_col = cols[col] - cols[start]
 
     def move_left(self, lines, total_lines):
         if self.cursor_col > 0:
@@ -80,9 +100,7 @@ class DocMode:
         elif self.cursor_line > 0:
             self.cursor_line -= 1
             self.cursor_col = len(lines[self.cursor_line])
-        self.desired_display_col = self.get_display_col(
-            lines[self.cursor_line], self.cursor_col
-        )
+        self.desired_display_col = self._row_x()
 
     def move_right(self, lines, total_lines):
         line_len = len(lines[self.cursor_line])
@@ -91,44 +109,204 @@ class DocMode:
         elif self.cursor_line < total_lines - 1:
             self.cursor_line += 1
             self.cursor_col = 0
-        self.desired_display_col = self.get_display_col(
-            lines[self.cursor_line], self.cursor_col
-        )
-
-    def move_down(self, lines, total_lines):
-        if self.cursor_line < total_lines - 1:
-            self.cursor_line += 1
-            self.set_col_to_desired(lines[self.cursor_line])
+        self.desired_display_col = self._row_x()
+
+    def move_down(self, lines, total_lines, count=1):
+        row = self.layout.row_of(self.cursor_line, self.cursor_col)
+        target = min(row + count, self.layout.total_rows - 1)
+        if target > row:
+            self.cursor_line, k = self.layout.locate(target)
+            self.set_col_to_desired(self.cursor_line, k)
+
+    def move_up(self, lines, total_lines, count=1):
+        row = self.layout.row_of(self.cursor_line, self.cursor_col)
+        target = max(row - count, 0)
+        if target < row:
+            self.cursor_line, k = self.layout.locate(target)
+            self.set_col_to_desired(self.cursor_line, k)
+
+    def adjust_offset(self, available_height):
+        row = self.layout.row_of(self.cursor_line, self.cursor_col)
+        if row < self.offset:
+            self.offset = row
+        elif row > self.offset + available_height - 1:
+            self.offset = row - available_height + 1
+        self.offset = max(0, min(self.offset, self.layout.total_rows - available_height))
+
+    def _selection_bounds(self):
+        """((line, col), (line, col)) of the visual selection, first end first."""
+        if (
+            self.mode != "visual"
+            or self.visual_start_line is None
+            or self.visual_start_col is None
+        ):
+            return None
+        anchor = (self.visual_start_line, self.visual_start_col)
+        cursor = (self.cursor_line, self.cursor_col)
+        return (anchor, cursor) if anchor <= cursor else (cursor, anchor)
+
+    def _selection_spans(self, first, last):
+        """
+        {line: (start, end)} display columns the selection covers on lines
+        first..last-1, worked out once per frame so each row renders as at
+        most three runs (before, selected, after).
+        """
+        bounds = self._selection_bounds()
+        if bounds is None:
+            return {}
+        (start_l, start_c), (end_l, end_c) = bounds
+        spans = {}
+        for i in range(max(first, start_l), min(last, end_l + 1)):
+            cols = self.model.display_cols(i)
+            start = cols[min(start_c, len(cols) - 1)] if i == start_l else 0
+            end = cols[min(end_c, len(cols) - 1)] if i == end_l else cols[-1]
+            if end > start:
+                spans[i] = (start, end)
+        return spans
+
+    def _marks(self, first, last):
+        """
+        {line: ((start, end, attr), ...)} display-column spans to highlight
+        on lines first..last-1: the visual selection and the search matches.
+        """
+        marks = {
+            i: ((start, end, curses.A_REVERSE),)
+            for i, (start, end) in self._selection_spans(first, last).items()
+        }
+        search = self._lesson_search()
+        if search.term:
+            for i in range(first, last):
+                matches = search.on_line(i)
+                if matches:
+                    cols = self.model.display_cols(i)
+                    marks[i] = marks.get(i, ()) + tuple(
+                        (cols[start], cols[end], MATCH_ATTR)
+                        for _, start, end in matches
+                    )
+        return marks
+
+    def _lesson_search(self):
+        """The LessonSearch of the lesson on screen, at the last search term."""
+        if self.search is None or self.search.lines is not self.model.lines:
+            self.search = LessonSearch(self.model.lines)
+            section = self._section_search()
+            if section is not None:
+                self.search.adopt(self.last_search_term, section.spans(self.idx))
+            else:
+                self.search.update(self.last_search_term)
+        return self.search
+
+    def _section_search(self):
+        """The SectionSearch of the last search term, or None without one."""
+        term = self.last_search_term
+        section = self.section_search
+        if not term:
+            return None
+        if (
+            section is None
+            or section.lessons is not self.sequencer.lessons
+            or section.term != fold(term)
+        ):
+            if section is not None:
+                section.cancel()
+            known = None
+            search = self.search
+            if search is not None and search.lines is self.model.lines:
+                if search.term == fold(term):
+                    known = {self.idx: search.spans}
+            section = SectionSearch(self.sequencer.lessons, term, known)
+            self.section_search = section
+        return section
+
+    def _match_info(self):
+        """Footer text counting the last term's matches over every lesson."""
+        section = self._section_search()
+        if section is None:
+            return ""
+        if not section.background:
+            section.fill()
+        found, complete = section.count()
+        if not complete:
+            return f"  [{found}+ matches]"
+        k = section.ordinal(self.idx, self.cursor_line, self.cursor_col)
+        return f"  [{k}/{found} matches]" if k else f"  [{found} matches]"
+
+    def _jump_to_match(self, match, available_height):
+        """Put the cursor on a (line, start, end) match, its row at the top."""
+        line, start, _ = match
+        self.cursor_line, self.cursor_col = line, start
+        self.offset = self.layout.first_row[line]
+        self.desired_display_col = self._row_x()
+        self.adjust_offset(available_height)
+
+    def _end_search(self, accept):
+        """Leave search mode, keeping the typed term or going back to the last."""
+        self.search_mode = False
+        if accept:
+            self.last_search_term = self.search_term.strip()
+        else:
+            line, col, offset = self._search_origin
+            self.cursor_line, self.cursor_col, self.offset = line, col, offset
+            self.desired_display_col = self._row_x()
+        self._lesson_search().update(self.last_search_term)
+        self._section_search()  # large sections start counting now
+        curses.curs_set(1)
 
-    def move_up(self, lines, total_lines):
-        if self.cursor_line > 0:
-            self.cursor_line -= 1
-            self.set_col_to_desired(lines[self.cursor_line])
+    def _open_path(self, item):
+        """Switch to a finder item's section, at its lesson or the first one."""
+        course, part, section = item.course, item.part, item.section
+        if section is None:
+            found = [
+                (p, s)
+                for p in ([part] if part else course.parts)
+                for s in p.sections
+                if s.lessons
+            ]
+            if not found:
+                return
+            part, section = found[0]
+        if not section.lessons:
+            return
+        self.sequencer.course = course
+        self.sequencer.source_file = course.source_file
+        self.sequencer.lessons = section.lessons
+        self.sequencer.name = sequencer_name(course, part, section)
+        self.idx = section.lessons.index(item.lesson) if item.lesson else 0
+        self.mode = "normal"
+        self.offset = 0
+        self.cursor_line = 0
+        self.cursor_col = 0
+        self.desired_display_col = 0
 
-    def adjust_offset(self, total_lines, available_height):
-        visible_top = self.offset
-        visible_bottom = self.offset + available_height - 1
-        if self.cursor_line < visible_top:
-            self.offset = self.cursor_line
-        elif self.cursor_line > visible_bottom:
-            self.offset = self.cursor_line - available_height + 1
-        self.offset = max(0, min(self.offset, total_lines - available_height))
+    def _reload_course(self, stdscr):
+        """
+        Re-parse the course after its file changed on disk under the lazy
+        tree. Returns False when it no longer parses and DocMode must leave.
+        """
+        try:
+            self.idx = self.sequencer.reload(self.idx)
+        except (OSError, CourseParseError):
+            return False
+        self.mode = "normal"
+        self.visual_start_line = None
+        self.visual_start_col = None
+        self.search = None
+        if self.section_search is not None:
+            self.section_search.cancel()
+            self.section_search = None
+        self.offset = 0
+        self.cursor_line = 0
+        self.cursor_col = 0
+        self.desired_display_col = 0
+        self.body.invalidate()
+        self._show_msg(stdscr, "Course file changed on disk; reloaded")
+        return True
 
     def get_selected_text(self, lines):
-        if self.visual_start_line is None:
+        bounds = self._selection_bounds()
+        if bounds is None:
             return ""
-        start_l = min(self.visual_start_line, self.cursor_line)
-        end_l = max(self.visual_start_line, self.cursor_line)
-        start_c = (
-            self.visual_start_col
-            if self.visual_start_line <= self.cursor_line
-            else self.cursor_col
-        )
-        end_c = (
-            self.cursor_col
-            if self.visual_start_line <= self.cursor_line
-            else self.visual_start_col
-        )
+        (start_l, start_c), (end_l, end_c) = bounds
         selected = []
         for l in range(start_l, end_l + 1):
             line = lines[l]
@@ -143,18 +321,16 @@ class DocMode:
             selected.append(frag)
         return "\n".join(selected)
 
-    def _show_msg(self, stdscr, msg, delay_sec=0.8):
-        max_y, max_x = stdscr.getmaxyx()
-        try:
-            stdscr.addstr(max_y - 1, 0, msg[:max_x], curses.A_BOLD)
-            stdscr.clrtoeol()
-            stdscr.refresh()
-            time.sleep(delay_sec)
-        except Exception:
-            pass
+    def _show_msg(self, stdscr, msg, delay_sec=None):
+        # Shown by the next redraw and cleared when the "toast" timer fires,
+        # instead of sleeping with the whole UI frozen.
+        self.toast = msg
+        self.scheduler.schedule(
+            "toast", self.TOAST_TIMEOUT if delay_sec is None else delay_sec
+        )
 
     def show_help(self, stdscr):
-        stdscr.clear()
+        stdscr.erase()
         max_y, max_x = stdscr.getmaxyx()
         help_text = [
             "Doc Mode Help:",
@@ -171,14 +347,16 @@ class DocMode:
             "p: previous lesson",
             "i: edit lesson (if source available)",
             "b: bookmark",
+            "f: find any course, part, section or lesson by name",
             "",
             "Modes:",
             "t: Activate touch type mode",
             "r: Activate rote mode",
             "",
             "Search:",
-            "/: enter search mode (type term, enter to search, esc to cancel, backspace to delete)",
-            "n/N: next/prev match",
+            "/: search as you type (enter to keep the match, esc to go back, backspace to delete)",
+            "n/N: next/prev match, into the next/prev lesson that has one",
+            "Esc: clear the search (n/p change lesson again)",
             "",
             "Visual:",
             "v: enter visual mode",
@@ -204,153 +382,399 @@ class DocMode:
             )
         except curses.error:
             pass
-        stdscr.refresh()
-        stdscr.nodelay(False)
-        stdscr.getch()
-        stdscr.nodelay(True)
+        present(stdscr, screen="help")
+        self.scheduler.wait_for_key()
+
+    def _body_height(self, stdscr):
+        max_y, _ = stdscr.getmaxyx()
+        return max(0, max_y - 3 - 2)  # two title rows + gap, counter + status
+
+    def _handle_key(self, stdscr, key):
+        """Apply one key. Returns what run() should return when it leaves DocMode."""
+        current_lesson = self.sequencer.lessons[self.idx]
+        self.model = lesson_model(current_lesson)
+        self.layout = self.model.layout(stdscr.getmaxyx()[1])
+        lines = self.model.lines
+        total_lines = len(lines)
+        available_height = self._body_height(stdscr)
+        source_file = getattr(self.sequencer, "source_file", None)
+
+        if key == 27 and not self.search_mode and self.mode == "visual":
+            # Esc leaves visual mode before it drops a search or DocMode.
+            self.mode = "normal"
+            self.visual_start_line = None
+            self.visual_start_col = None
+            return None
+
+        if key == 27 and not self.search_mode and self.last_search_term:
+            # The first Esc in normal mode drops the search, so n/p page
+            # through lessons again; the next one leaves.
+            self.last_search_term = ""
+            self._lesson_search().update("")
+            if self.section_search is not None:
+                self.section_search.cancel()
+                self.section_search = None
+            return None
+
+        if not self.search_mode and is_quit_request(key):
+            if key in (ord("q"), ord("Q")):
+                raise SystemExit
+            return False
+
+        # === ENTER / EXIT SEARCH MODE ===
+        if key == ord("/"):
+            if self.search_mode:
+                self._end_search(accept=False)
+            else:
+                self.search_mode = True
+                self.search_term = ""
+                self._search_origin = (self.cursor_line, self.cursor_col, self.offset)
+                self._lesson_search().update("")
+                curses.curs_set(1)
+            return None
+
+        # === KEYS IN SEARCH MODE ===
+        if self.search_mode:
+            if key in (curses.KEY_ENTER, ord("\n"), ord("\r"), 10, 13):
+                term = self.search_term.strip()
+                if term and not self.search.spans:
+                    self._show_msg(stdscr, f"No match for '{term}'")
+                self._end_search(accept=bool(term and self.search.spans))
+                return None
+
+            if key == 27:  # ESC
+                self._end_search(accept=False)
+                return None
+
+            if key in (curses.KEY_BACKSPACE, 127, 8):
+                self.search_term = self.search_term[:-1]
+            elif 32 <= key <= 126:
+                self.search_term += chr(key)
+            else:
+                return None
+
+            # Show the first match after where the search started, as typed.
+            line, col, offset = self._search_origin
+            match = None
+            if self.search_term.strip():
+                self.search.update(self.search_term.strip())
+                match = self.search.step(line, col)
+            else:
+                self.search.update("")
+            if match:
+                self._jump_to_match(match, available_height)
+            else:
+                self.cursor_line, self.cursor_col, self.offset = line, col, offset
+                self.desired_display_col = self._row_x()
+            return None
+
+        # === NORMAL AND VISUAL MODE KEYS ===
+        if self.mode == "visual":
+            if key == ord("y"):
+                text = self.get_selected_text(lines)
+                try:
+                    subprocess.run(["wl-copy"], input=text.encode(), check=True)
+                    self._show_msg(stdscr, "Copied to clipboard!")
+                except Exception:
+                    self._show_msg(stdscr, "Failed to copy (wl-copy not available?)")
+                self.mode = "normal"
+                self.visual_start_line = None
+                self.visual_start_col = None
+            elif key == ord("h") or key == curses.KEY_LEFT:
+                self.move_left(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == ord("l") or key == curses.KEY_RIGHT:
+                self.move_right(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == ord("j") or key == curses.KEY_DOWN:
+                if self.scheduler.active("comma"):
+                    self.cursor_line = total_lines - 1
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+                else:
+                    self.move_down(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == ord("k") or key == curses.KEY_UP:
+                if self.scheduler.active("comma"):
+                    self.cursor_line = 0
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+                else:
+                    self.move_up(lines, total_lines)
+                self.adjust_offset(available_height)
+            # Ignore other keys in visual mode
+        else:  # normal mode
+            if key == ord("?"):
+                self.show_help(stdscr)
+                self.body.invalidate()
+            elif key in (ord("n"), ord("N")) and self.last_search_term:
+                found = self._section_search().step(
+                    self.idx, self.cursor_line, self.cursor_col, key == ord("n")
+                )
+                if found is not None:
+                    idx, match = found
+                    if idx != self.idx:
+                        self.idx = idx
+                        self.model = lesson_model(self.sequencer.lessons[idx])
+                        self.layout = self.model.layout(stdscr.getmaxyx()[1])
+                    self._jump_to_match(match, available_height)
+                    return None
+            if key == ord("v"):
+                self.mode = "visual"
+                self.visual_start_line = self.cursor_line
+                self.visual_start_col = self.cursor_col
+            elif key == ord("h") or key == curses.KEY_LEFT:
+                self.move_left(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == ord("l") or key == curses.KEY_RIGHT:
+                self.move_right(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == ord("j") or key == curses.KEY_DOWN:
+                if self.scheduler.active("comma"):
+                    self.cursor_line = total_lines - 1
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+                else:
+                    self.move_down(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == ord("k") or key == curses.KEY_UP:
+                if self.scheduler.active("comma"):
+                    self.cursor_line = 0
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+                else:
+                    self.move_up(lines, total_lines)
+                self.adjust_offset(available_height)
+            elif key == 10:  # Ctrl+J
+                half_page = max(1, available_height // 2)
+                self.move_down(lines, total_lines, half_page)
+                self.adjust_offset(available_height)
+            elif key == 11:  # Ctrl+K
+                half_page = max(1, available_height // 2)
+                self.move_up(lines, total_lines, half_page)
+                self.adjust_offset(available_height)
+            elif key == ord(","):
+                self.scheduler.schedule("comma", self.COMMA_TIMEOUT)
+            elif key == ord("n"):
+                if self.idx < len(self.sequencer.lessons) - 1:
+                    self.idx += 1
+                    self.offset = 0
+                    self.cursor_line = 0
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+            elif key == ord("p"):
+                if self.idx > 0:
+                    self.idx -= 1
+                    self.offset = 0
+                    self.cursor_line = 0
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+            elif key == 3:  # Ctrl+C
+                sys.exit(0)
+            elif key == 27:  # Esc
+                return False
+            elif key == ord("b"):
+                self.bookmarks.add(
+                    self.sequencer.index,
+                    self.sequencer.name,
+                    current_lesson.name,
+                    lesson=current_lesson,
+                )
+                self._show_msg(stdscr, "Bookmarked!")
+            elif key == ord("f"):
+                item = FinderScreen(self.sequencer.index.paths()).run(stdscr)
+                if item:
+                    self._open_path(item)
+                curses.curs_set(1)
+                self.body.invalidate()
+            elif key in (ord("r"), ord("R")):
+                rote = RoteMode(self.sequencer.name, current_lesson)
+                rote.run(stdscr)
+                self.body.invalidate()
+            elif key in (ord("t"), ord("T")):
+                jump = TouchTypeMode(
+                    self.sequencer.name, self.sequencer.lessons, self.idx
+                )
+                final_idx = jump.run(stdscr)
+                if final_idx is not None:
+                    if final_idx >= len(self.sequencer.lessons):
+                        return True
+                    self.idx = final_idx
+                    self.offset = 0
+                    self.cursor_line = 0
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+                self.body.invalidate()
+            elif key in (ord("i"), ord("I")):
+                editor = DocEditor(source_file, course=self.sequencer.course)
+                result = editor.edit_lesson(stdscr, current_lesson.name, self.idx)
+                if result:
+                    reloaded_lessons, course_name, new_idx = result
+                    self.sequencer.course = editor.course
+                    self.sequencer.index.replace(editor.course)
+                    self.sequencer.lessons = reloaded_lessons
+                    self.sequencer.name = course_name
+                    self.idx = new_idx
+                    self.offset = 0
+                    self.cursor_line = 0
+                    self.cursor_col = 0
+                    self.desired_display_col = 0
+                self.body.invalidate()
+            elif key == ord("y"):
+                self.scheduler.schedule("ya", self.YA_TIMEOUT)
+            elif key == ord("a"):
+                if self.scheduler.active("ya"):
+                    text = current_lesson.content
+                    try:
+                        subprocess.run(["wl-copy"], input=text.encode(), check=True)
+                        self._show_msg(stdscr, "Copied entire lesson to clipboard!")
+                    except Exception:
+                        self._show_msg(
+                            stdscr, "Failed to copy (wl-copy not available?)"
+                        )
+                    self.scheduler.cancel("ya")
+
+        return None
 
     def run(self, stdscr):
         curses.curs_set(1)
-        stdscr.nodelay(True)
-        source_file = getattr(self.sequencer, "source_file", None)
+        try:
+            stdscr.idlok(True)  # let curses scroll the body with the terminal
+        except curses.error:
+            pass
+        self.scheduler = InputScheduler(stdscr)
         need_redraw = True
 
         while True:
             current_lesson = self.sequencer.lessons[self.idx]
-            lines = current_lesson.content.splitlines()
+            try:
+                model = lesson_model(current_lesson)
+            except StaleStoreError:
+                if not self._reload_course(stdscr):
+                    return False
+                continue
+            self.model = model
+            lines = model.lines
             total_lines = len(lines)
 
             max_y, max_x = stdscr.getmaxyx()
             header_rows = 3
             footer_rows = 2
             available_height = max(0, max_y - header_rows - footer_rows)
-            max_allowed_offset = max(0, total_lines - available_height)
+            layout = model.layout(max_x)
+            if self.layout is not None and self.layout.model is model:
+                if layout is not self.layout:
+                    # Keep the same line at the top across a resize.
+                    top_line = self.layout.locate(self.offset)[0]
+                    self.offset = layout.first_row[top_line]
+            self.layout = layout
+            if self.target_cursor is not None:
+                line, col = self.target_cursor
+                self.cursor_line = min(line, total_lines - 1)
+                self.cursor_col = min(col, len(lines[self.cursor_line]))
+                self.offset = layout.first_row[self.cursor_line]
+                self.desired_display_col = self._row_x()
+                self.target_cursor = None
+            total_rows = layout.total_rows
+            max_allowed_offset = max(0, total_rows - available_height)
 
             # Clamp offset
             self.offset = max(0, min(self.offset, max_allowed_offset))
-            self.adjust_offset(total_lines, available_height)
+            self.adjust_offset(available_height)
 
             if need_redraw:
-                stdscr.clear()
-
-                # Title on two lines
-                line1 = self.sequencer.name
-                line2 = f"DOC_MODE: {current_lesson.name}"
-                try:
-                    stdscr.addstr(
-                        0, 0, line1[:max_x], curses.color_pair(1) | curses.A_BOLD
-                    )
-                    stdscr.addstr(
-                        1, 0, line2[:max_x], curses.color_pair(1) | curses.A_BOLD
-                    )
-                    stdscr.clrtoeol()
-                except curses.error:
-                    pass
-
-                # Empty line
+                frame = (current_lesson, max_y, max_x)
+                shown_rows = min(self.offset + available_height, total_rows)
+                first_line = layout.locate(self.offset)[0]
+                last_line = layout.locate(shown_rows - 1)[0] + 1
                 try:
-                    stdscr.move(2, 0)
-                    stdscr.clrtoeol()
-                except curses.error:
-                    pass
+                    marks = self._marks(first_line, last_line)
+                    match_info = self._match_info()
+                except StaleStoreError:
+                    if not self._reload_course(stdscr):
+                        return False
+                    continue
+                body_rows = self.body.rows_to_paint(
+                    stdscr, header_rows, available_height, frame, self.offset
+                )
+                if body_rows is not None:
+                    # Rows the selection or the matches grew onto, left or
+                    # changed on need painting as well as any scrolled in.
+                    moved = {
+                        row - self.offset
+                        for i in marks.keys() | self._shown_marks.keys()
+                        if marks.get(i) != self._shown_marks.get(i)
+                        for row in range(layout.first_row[i], layout.first_row[i + 1])
+                        if 0 <= row - self.offset < available_height
+                    }
+                    body_rows = sorted(moved.union(body_rows))
+                else:
+                    stdscr.erase()
 
-                # Render content
-                start_line = self.offset
-                end_line = min(start_line + available_height, total_lines)
-                for row_idx in range(start_line, end_line):
-                    row = header_rows + (row_idx - start_line)
-                    line = lines[row_idx]
-                    display_pos = 0
-                    for char_idx, char in enumerate(line):
-                        is_selected = False
-                        visual_start_col = self.visual_start_col
-                        if (
-                            self.mode == "visual"
-                            and self.visual_start_line is not None
-                            and visual_start_col is not None
-                        ):
-                            start_l = min(self.visual_start_line, self.cursor_line)
-                            end_l = max(self.visual_start_line, self.cursor_line)
-                            start_c = (
-                                min(visual_start_col, self.cursor_col)
-                                if start_l == end_l
-                                else (
-                                    visual_start_col
-                                    if row_idx == self.visual_start_line
-                                    else 0
-                                )
-                            )
-                            end_c = (
-                                max(visual_start_col, self.cursor_col)
-                                if start_l == end_l
-                                else (
-                                    self.cursor_col
-                                    if row_idx == self.cursor_line
-                                    else len(line)
-                                )
-                            )
-                            if start_l <= row_idx <= end_l:
-                                if (
-                                    start_l < row_idx < end_l
-                                    or (start_l == row_idx and char_idx >= start_c)
-                                    or (end_l == row_idx and char_idx < end_c)
-                                    or (
-                                        start_l == end_l and start_c <= char_idx < end_c
-                                    )
-                                ):
-                                    is_selected = True
-                        attr = curses.A_REVERSE if is_selected else 0
-                        if char == "\t":
-                            for _ in range(4):
-                                if display_pos >= max_x:
-                                    break
-                                try:
-                                    stdscr.addch(
-                                        row,
-                                        display_pos,
-                                        " ",
-                                        curses.color_pair(1) | attr,
-                                    )
-                                except curses.error:
-                                    pass
-                                display_pos += 1
-                        else:
-                            if display_pos >= max_x:
-                                break
-                            try:
-                                stdscr.addch(
-                                    row, display_pos, char, curses.color_pair(1) | attr
-                                )
-                            except curses.error:
-                                pass
-                            display_pos += 1
+                    # Title on two lines
+                    line1 = self.sequencer.name
+                    line2 = f"DOC_MODE: {current_lesson.name}"
                     try:
-                        stdscr.move(row, display_pos)
+                        stdscr.addstr(
+                            0, 0, line1[:max_x], curses.color_pair(1) | curses.A_BOLD
+                        )
+                        stdscr.addstr(
+                            1, 0, line2[:max_x], curses.color_pair(1) | curses.A_BOLD
+                        )
                         stdscr.clrtoeol()
                     except curses.error:
                         pass
 
-                # Clear below content
-                for row in range(
-                    header_rows + (end_line - start_line), max_y - footer_rows
-                ):
+                    # Empty line
                     try:
-                        stdscr.move(row, 0)
+                        stdscr.move(2, 0)
                         stdscr.clrtoeol()
                     except curses.error:
                         pass
 
+                    body_rows = range(available_height)
+
+                # Render content, soft-wrapped; rows past the end are cleared
+                for body_row in body_rows:
+                    row = header_rows + body_row
+                    if self.offset + body_row >= total_rows:
+                        try:
+                            stdscr.move(row, 0)
+                            stdscr.clrtoeol()
+                        except curses.error:
+                            pass
+                        continue
+                    row_idx, k = layout.locate(self.offset + body_row)
+                    start, end = layout.span(row_idx, k)
+                    cols = model.display_cols(row_idx)
+                    text = lines[row_idx][start:end].replace("\t", TAB)
+                    spans = []
+                    for mark_start, mark_end, attr in marks.get(row_idx, ()):
+                        mark_start = max(mark_start, cols[start]) - cols[start]
+                        mark_end = min(mark_end, cols[end]) - cols[start]
+                        if mark_end > mark_start:
+                            spans.append((mark_start, mark_end, attr))
+                    draw_runs(
+                        stdscr,
+                        row,
+                        span_runs(text, spans),
+                        max_x,
+                        curses.color_pair(1),
+                    )
+                self._shown_marks = marks
+
                 # Footer info
                 counter = f"Lesson {self.idx + 1}/{len(self.sequencer.lessons)}"
                 scroll_info = ""
-                if total_lines > available_height:
-                    top = self.offset + 1
-                    bottom = min(self.offset + available_height, total_lines)
-                    scroll_info = f"  [{top}-{bottom}/{total_lines}]"
+                if total_rows > available_height:
+                    scroll_info = f"  [{first_line + 1}-{last_line}/{total_lines}]"
 
                 try:
                     stdscr.addstr(
-                        max_y - 2, 0, counter + scroll_info, curses.color_pair(1)
+                        max_y - 2,
+                        0,
+                        (counter + scroll_info + match_info)[:max_x],
+                        curses.color_pair(1),
                     )
                     stdscr.clrtoeol()
                 except curses.error:
@@ -366,6 +790,12 @@ class DocMode:
                         stdscr.clrtoeol()
                     except curses.error:
                         pass
+                elif self.toast:
+                    try:
+                        stdscr.addstr(max_y - 1, 0, self.toast[:max_x], curses.A_BOLD)
+                        stdscr.clrtoeol()
+                    except curses.error:
+                        pass
                 else:
                     instr = "Press ? for help"
                     try:
@@ -376,10 +806,12 @@ class DocMode:
 
                 # Set cursor position
                 if not self.search_mode:
-                    cursor_row = header_rows + (self.cursor_line - self.offset)
-                    cursor_display_col = self.get_display_col(
-                        lines[self.cursor_line], self.cursor_col
+                    cursor_row = header_rows + (
+                        layout.row_of(self.cursor_line, self.cursor_col) - self.offset
                     )
+                    # A space hanging off a full row puts the cursor on its
+                    # last cell rather than off the pane.
+                    cursor_display_col = min(self._row_x(), max_x - 1)
                     if (
                         cursor_row >= header_rows
                         and cursor_row < max_y - footer_rows
@@ -390,320 +822,35 @@ class DocMode:
                 else:
                     curses.curs_set(1)
 
-                stdscr.refresh()
+                present(stdscr, screen="doc")
                 need_redraw = False
 
-            key = stdscr.getch()
+            section = self.section_search
+            if section is not None and section.background and not section.count()[1]:
+                self.scheduler.schedule("search", self.SEARCH_POLL)
+            key = self.scheduler.wait()
+            if "toast" in self.scheduler.fired:
+                self.toast = None
+                need_redraw = True
+            if "search" in self.scheduler.fired:
+                need_redraw = True  # more of the section's matches counted
             if key == -1:
                 continue
 
-            if not self.search_mode and is_quit_request(key):
-                if key in (ord("q"), ord("Q")):
-                    raise SystemExit
-                return False
-
-            current_time = time.time()
-
-            # === ENTER / EXIT SEARCH MODE ===
-            if key == ord("/"):
-                if self.search_mode:
-                    self.search_mode = False
-                    curses.curs_set(1)
-                    stdscr.nodelay(True)
-                    need_redraw = True
-                else:
-                    self.search_mode = True
-                    self.search_term = ""
-                    curses.curs_set(1)
-                    stdscr.nodelay(False)
-                    need_redraw = True
-                continue
-
-            # === KEYS IN SEARCH MODE ===
-            if self.search_mode:
-                if key in (curses.KEY_ENTER, ord("\n"), ord("\r"), 10, 13):
-                    term = self.search_term.strip()
-
-                    if not term:
-                        self.search_mode = False
-                        curses.curs_set(1)
-                        stdscr.nodelay(True)
-                        need_redraw = True
-                        continue
-
-                    if self.last_search_term != term:
-                        pattern = re.compile(re.escape(term), re.IGNORECASE)
-                        self.match_lines = [
-                            i for i, line in enumerate(lines) if pattern.search(line)
-                        ]
-                        self.last_search_term = term
-                        self.current_match_idx = -1
-
-                    if not self.match_lines:
-                        self._show_msg(stdscr, f"No match for '{term}'")
-                        self.search_mode = False
-                        curses.curs_set(1)
-                        stdscr.nodelay(True)
-                        need_redraw = True
-                        continue
-
-                    # Advance forward
-                    self.search_direction_forward = True
-                    self.current_match_idx = (self.current_match_idx + 1) % len(
-                        self.match_lines
-                    )
-                    match_line = self.match_lines[self.current_match_idx]
-
-                    # Place match at the very top of the screen
-                    self.offset = max(0, match_line)
-
-                    # Set cursor to the start of the match
-                    pattern = re.compile(re.escape(term), re.IGNORECASE)
-                    match = pattern.search(lines[match_line])
-                    if match:
-                        self.cursor_col = match.start()
-                    else:
-                        self.cursor_col = 0
-                    self.cursor_line = match_line
-                    self.desired_display_col = self.get_display_col(
-                        lines[match_line], self.cursor_col
-                    )
-                    self.adjust_offset(total_lines, available_height)
-
-                    need_redraw = True
-
-                    # Exit search mode after successful jump
-                    self.search_mode = False
-                    curses.curs_set(1)
-                    stdscr.nodelay(True)
-
-                elif key == 27:  # ESC
-                    self.search_mode = False
-                    curses.curs_set(1)
-                    stdscr.nodelay(True)
-                    need_redraw = True
-
-                elif key in (curses.KEY_BACKSPACE, 127, 8):
-                    if self.search_term:
-                        self.search_term = self.search_term[:-1]
-                        need_redraw = True
-
-                elif 32 <= key <= 126:
-                    self.search_term += chr(key)
-                    need_redraw = True
-
-                continue
-
-            # === NORMAL AND VISUAL MODE KEYS ===
-            redraw_needed = False
-
-            if self.mode == "visual":
-                if key == ord("y"):
-                    text = self.get_selected_text(lines)
-                    try:
-                        subprocess.run(["wl-copy"], input=text.encode(), check=True)
-                        self._show_msg(stdscr, "Copied to clipboard!")
-                    except Exception:
-                        self._show_msg(
-                            stdscr, "Failed to copy (wl-copy not available?)"
-                        )
-                    self.mode = "normal"
-                    self.visual_start_line = None
-                    self.visual_start_col = None
-                    redraw_needed = True
-                elif key == ord("h") or key == curses.KEY_LEFT:
-                    self.move_left(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord("l") or key == curses.KEY_RIGHT:
-                    self.move_right(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord("j") or key == curses.KEY_DOWN:
-                    if (current_time - self.last_comma_time) < self.COMMA_TIMEOUT:
-                        self.cursor_line = total_lines - 1
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                    else:
-                        self.move_down(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord("k") or key == curses.KEY_UP:
-                    if (current_time - self.last_comma_time) < self.COMMA_TIMEOUT:
-                        self.cursor_line = 0
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                    else:
-                        self.move_up(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == 27:  # ESC
-                    self.mode = "normal"
-                    self.visual_start_line = None
-                    self.visual_start_col = None
-                    redraw_needed = True
-                # Ignore other keys in visual mode
-            else:  # normal mode
-                if key == ord("?"):
-                    self.show_help(stdscr)
-                    redraw_needed = True
-                elif (
-                    key in (ord("n"), ord("N"))
-                    and self.match_lines
-                    and self.last_search_term
-                ):
-                    direction = 1 if key == ord("n") else -1
-                    self.current_match_idx = (self.current_match_idx + direction) % len(
-                        self.match_lines
-                    )
-                    match_line = self.match_lines[self.current_match_idx]
-                    self.offset = max(0, match_line)
-                    pattern = re.compile(
-                        re.escape(self.last_search_term), re.IGNORECASE
-                    )
-                    match = pattern.search(lines[match_line])
-                    if match:
-                        self.cursor_col = match.start()
-                    else:
-                        self.cursor_col = 0
-                    self.cursor_line = match_line
-                    self.desired_display_col = self.get_display_col(
-                        lines[match_line], self.cursor_col
-                    )
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
+            # Apply everything already queued (key repeat, pasted chords)
+            # before drawing again; the chord timers still see each key in
+            # order, so ",j" and "ya" work inside a burst.
+            for key in chain((key,), self.scheduler.drain()):
+                if key == curses.KEY_RESIZE:
                     continue
-                if key == ord("v"):
-                    self.mode = "visual"
-                    self.visual_start_line = self.cursor_line
-                    self.visual_start_col = self.cursor_col
-                    redraw_needed = True
-                elif key == ord("h") or key == curses.KEY_LEFT:
-                    self.move_left(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord("l") or key == curses.KEY_RIGHT:
-                    self.move_right(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord("j") or key == curses.KEY_DOWN:
-                    if (current_time - self.last_comma_time) < self.COMMA_TIMEOUT:
-                        self.cursor_line = total_lines - 1
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                    else:
-                        self.move_down(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord("k") or key == curses.KEY_UP:
-                    if (current_time - self.last_comma_time) < self.COMMA_TIMEOUT:
-                        self.cursor_line = 0
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                    else:
-                        self.move_up(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == 10:  # Ctrl+J
-                    half_page = max(1, available_height // 2)
-                    for _ in range(half_page):
-                        self.move_down(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == 11:  # Ctrl+K
-                    half_page = max(1, available_height // 2)
-                    for _ in range(half_page):
-                        self.move_up(lines, total_lines)
-                    self.adjust_offset(total_lines, available_height)
-                    redraw_needed = True
-                elif key == ord(","):
-                    self.last_comma_time = current_time
-                elif key == ord("n"):
-                    if self.idx < len(self.sequencer.lessons) - 1:
-                        self.idx += 1
-                        self.offset = 0
-                        self.cursor_line = 0
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                        self.match_lines = []
-                        self.last_search_term = ""
-                        redraw_needed = True
-                elif key == ord("p"):
-                    if self.idx > 0:
-                        self.idx -= 1
-                        self.offset = 0
-                        self.cursor_line = 0
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                        self.match_lines = []
-                        self.last_search_term = ""
-                        redraw_needed = True
-                elif key == 3:  # Ctrl+C
-                    sys.exit(0)
-                elif key == 27:  # Esc
-                    return False
-                elif key == ord("b"):
-                    import os
-
-                    script_dir = os.path.dirname(
-                        os.path.dirname(os.path.abspath(__file__))
-                    )
-                    courses_dir = os.path.join(script_dir, "courses")
-                    from modules.course_parser import CourseParser
-
-                    parser = CourseParser(courses_dir)
-                    all_courses = parser.parse_courses()
-                    self.bookmarks.add(
-                        all_courses, self.sequencer.name, current_lesson.name
-                    )
-                    self._show_msg(stdscr, "Bookmarked!")
-                    redraw_needed = True
-                elif key in (ord("r"), ord("R")):
-                    rote = RoteMode(self.sequencer.name, current_lesson)
-                    rote.run(stdscr)
-                    redraw_needed = True
-                elif key in (ord("t"), ord("T")):
-                    jump = TouchTypeMode(
-                        self.sequencer.name, self.sequencer.lessons, self.idx
-                    )
-                    final_idx = jump.run(stdscr)
-                    if final_idx is not None:
-                        if final_idx >= len(self.sequencer.lessons):
-                            return True
-                        self.idx = final_idx
-                        self.offset = 0
-                        self.cursor_line = 0
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                    redraw_needed = True
-                elif key in (ord("i"), ord("I")):
-                    editor = DocEditor(source_file)
-                    result = editor.edit_lesson(stdscr, current_lesson.name, self.idx)
-                    if result:
-                        reloaded_lessons, course_name, new_idx = result
-                        self.sequencer.lessons = reloaded_lessons
-                        self.sequencer.name = course_name
-                        self.idx = new_idx
-                        self.offset = 0
-                        self.cursor_line = 0
-                        self.cursor_col = 0
-                        self.desired_display_col = 0
-                    redraw_needed = True
-                elif key == ord("y"):
-                    self.last_y_time = current_time
-                elif key == ord("a"):
-                    if (current_time - self.last_y_time) < self.YA_TIMEOUT:
-                        text = current_lesson.content
-                        try:
-                            subprocess.run(["wl-copy"], input=text.encode(), check=True)
-                            self._show_msg(stdscr, "Copied entire lesson to clipboard!")
-                        except Exception:
-                            self._show_msg(
-                                stdscr, "Failed to copy (wl-copy not available?)"
-                            )
-                        self.last_y_time = 0
-
-            if redraw_needed:
-                need_redraw = True
+                try:
+                    result = self._handle_key(stdscr, key)
+                except StaleStoreError:
+                    if not self._reload_course(stdscr):
+                        return False
+                    break  # the rest of the burst was meant for the old tree
+                if result is not None:
+                    return result
+            need_redraw = True
 
         return False
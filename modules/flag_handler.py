@@ -3,9 +3,10 @@ import sys
 import curses
 from .bookmarks import Bookmarks
 from .lesson_sequencer import LessonSequencer
+from .library_index import LibraryIndex
 
 
-def handle_bookmark_flags(courses):
+def handle_bookmark_flags(courses, index=None):
     flags = ["-b", "--bookmark"]
     idx = -1
     for f in flags:
@@ -20,6 +21,7 @@ def handle_bookmark_flags(courses):
         if a.strip():
             args.append(a)
 
+    index = index or LibraryIndex(courses)
     bookmarks = Bookmarks()
     items = bookmarks._parse_bookmarks()
     if not items:
@@ -34,50 +36,46 @@ def handle_bookmark_flags(courses):
         num = int(args[0]) - 1
         if 0 <= num < len(items):
             display, course_name, part_name, section_name, lesson_name = items[num]
-            course = next((c for c in courses if c.name == course_name), None)
+            course = index.course(course_name)
             if not course:
                 print("Course not found.")
                 sys.exit(1)
 
             if section_name:
-                part = next((p for p in course.parts if p.name == part_name), None)
-                if not part:
+                if not index.node(course_name, part_name):
                     print("Part not found.")
                     sys.exit(1)
-                section = next(
-                    (s for s in part.sections if s.name == section_name), None
-                )
+                section = index.node(course_name, part_name, section_name)
                 if not section:
                     print("Section not found.")
                     sys.exit(1)
                 lessons = section.lessons
                 seq_name = f"{course_name}: {part_name}: {section_name}"
             elif part_name:
-                part = next((p for p in course.parts if p.name == part_name), None)
+                part = index.node(course_name, part_name)
                 if not part:
                     print("Part not found.")
                     sys.exit(1)
-                lessons = []
-                for s in part.sections:
-                    lessons.extend(s.lessons)
+                lessons = [l for s in part.sections for l in s.lessons]
                 seq_name = f"{course_name}: {part_name}"
             else:
-                lessons = []
-                for p in course.parts:
-                    for s in p.sections:
-                        lessons.extend(s.lessons)
+                lessons = [
+                    l for p in course.parts for s in p.sections for l in s.lessons
+                ]
                 seq_name = course_name
 
-            target_idx = next(
-                (i for i, l in enumerate(lessons) if l.name == lesson_name), None
-            )
-            if target_idx is None:
+            if not index.find(course_name, lesson_name, part_name, section_name):
                 print("Lesson not found.")
                 sys.exit(1)
 
             def _run_bookmark(stdscr):
                 sequencer = LessonSequencer(
-                    seq_name, lessons, doc_mode=True, source_file=course.source_file
+                    seq_name,
+                    lessons,
+                    doc_mode=True,
+                    source_file=course.source_file,
+                    course=course,
+                    index=index,
                 )
                 sequencer.target_lesson_name = lesson_name
                 sequencer.run(stdscr)
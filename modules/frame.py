@@ -0,0 +1,64 @@
+# ~/Apps/worship/modules/frame.py
+"""Frame output shared by every curses screen.
+
+Screens build a frame with ``erase()`` (not ``clear()``, which makes
+curses resend every cell) and hand it to ``present``, which stages the
+windows with ``noutrefresh`` and sends only the changed cells in one
+``doupdate``.
+
+Set ``WORSHIP_FRAME_STATS=/path/to/log`` to append one ``screen<TAB>bytes``
+line per frame with the number of bytes written to the terminal, taken
+from the process's write counter in ``/proc/self/io`` (Linux only).
+"""
+
+import curses
+import os
+
+STATS_ENV = "WORSHIP_FRAME_STATS"
+
+
+def bytes_written():
+    """Bytes this process has written so far, or None where unknown."""
+    try:
+        with open("/proc/self/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"wchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class FrameStats:
+    """Running per-frame byte counts, logged to a file as they happen."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = 0
+        self.total = 0
+
+    def record(self, screen, nbytes):
+        self.frames += 1
+        self.total += nbytes
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{screen}\t{nbytes}\n")
+        except OSError:
+            pass
+
+
+STATS = FrameStats(os.environ[STATS_ENV]) if os.environ.get(STATS_ENV) else None
+
+
+def present(*windows, screen="frame"):
+    """Stage windows with noutrefresh and commit them with one doupdate."""
+    for win in windows:
+        win.noutrefresh()
+    if STATS is None:
+        curses.doupdate()
+        return
+    before = bytes_written()
+    curses.doupdate()
+    after = bytes_written()
+    if before is not None and after is not None:
+        STATS.record(screen, after - before)
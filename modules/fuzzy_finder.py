@@ -0,0 +1,317 @@
+# ~/Apps/worship/modules/fuzzy_finder.py
+import curses
+import time
+from itertools import compress, islice, repeat
+from operator import sub
+
+from .frame import present
+from .input_scheduler import InputScheduler
+from .lesson_search import fold
+from .line_renderer import draw_runs, span_runs
+
+ENTER_KEYS = (curses.KEY_ENTER, 10, 13)
+BACKSPACE_KEYS = (curses.KEY_BACKSPACE, 127, 8)
+BOUNDARIES = " >:/-_.("  # a match right after one of these reads as a word start
+
+# Above this many survivors, rank by the width of the leftmost match alone.
+RESCORE_MAX = 500
+
+# Survivors are narrowed from the shorter query's this many at a time, and
+# only as far as the ranking needs; the rest is left for idle time.
+CHUNK = 2048
+
+# best() ranks at most this many survivors while the rest are unknown.
+RANK_MAX = 4 * CHUNK
+
+
+class _Survivors:
+    """
+    The texts matching one query, found in library order on demand: their
+    indices, folded texts, and where their leftmost match starts and ends.
+    The empty query's (everyone) is complete from the start; each longer
+    one narrows its parent's chunk by chunk, pulling the parent along.
+    """
+
+    def __init__(self, parent, ch="", repeated=False):
+        self.parent = parent
+        self.ch = ch
+        self.repeated = repeated
+        self.index, self.texts, self.firsts, self.ends = [], [], [], []
+        self.done = False
+        self._read = 0  # how many of the parent's survivors were narrowed
+
+    @classmethod
+    def everyone(cls, folded):
+        survivors = cls(None)
+        survivors.index = list(range(len(folded)))
+        survivors.texts = folded
+        survivors.firsts = None  # each match is one character so far
+        survivors.ends = [0] * len(folded)
+        survivors.done = True
+        return survivors
+
+    def fill(self, wanted):
+        """Narrow until there are wanted survivors or the parent runs out."""
+        while len(self.index) < wanted and self.step():
+            pass
+
+    def step(self):
+        """Narrow one chunk (the parent's, if it has none ready); False once done."""
+        parent = self.parent
+        if self.done:
+            return False
+        if not parent.done and len(parent.index) < self._read + CHUNK:
+            parent.step()
+            return True
+        start = self._read
+        stop = min(start + CHUNK, len(parent.index))
+        texts = parent.texts[start:stop]
+        ends = parent.ends[start:stop]
+        # text[end] is the previous query character, so unless ch repeats
+        # it, searching from end finds the same as searching past it.
+        if self.repeated:
+            ends = list(map((1).__add__, ends))
+        found = list(map(str.find, texts, repeat(self.ch), ends))
+        index = parent.index[start:stop]
+        firsts = found if parent.firsts is None else parent.firsts[start:stop]
+        if -1 in found:
+            keep = list(map((-1).__ne__, found))
+            index = compress(index, keep)
+            texts = compress(texts, keep)
+            firsts = compress(firsts, keep)
+            found = compress(found, keep)
+        self.index += index
+        self.texts += texts
+        self.firsts += firsts
+        self.ends += found
+        self._read = stop
+        self.done = parent.done and stop == len(parent.index)
+        return not self.done
+
+
+class FuzzyMatcher:
+    """
+    fzf-style subsequence matching over a fixed list of texts.
+
+    The survivors of the query so far are kept as parallel lists of where
+    their leftmost match starts and ends, so typing one more character is
+    a single str.find per survivor, mapped and filtered in C. They are
+    only narrowed as far as best() needs, so a near-universal query such
+    as "p" costs a chunk rather than a walk over the whole library; until
+    refine() finishes the walk, count is a lower bound (complete is False).
+    Deleting a character goes back to the survivors already found for the
+    shorter query.
+    """
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.folded = [fold(text) for text in texts]
+        everyone = _Survivors.everyone(self.folded)
+        self._stack = [("", everyone)]  # (query, _Survivors)
+        self._best = None  # ((query, limit, complete), result) of the last best()
+        self.query = ""
+
+    @property
+    def count(self):
+        """Survivors of the query found so far; all of them when complete."""
+        return len(self._stack[-1][1].index) if self.query else 0
+
+    @property
+    def complete(self):
+        return self._stack[-1][1].done
+
+    def update(self, query):
+        """Match query instead of the current one; returns the survivor count."""
+        query = fold(query)
+        stack = self._stack
+        while len(stack) > 1 and not query.startswith(stack[-1][0]):
+            stack.pop()
+        survivors = stack[-1][1]
+        for n in range(len(stack[-1][0]), len(query)):
+            repeated = n > 0 and query[n] == query[n - 1]
+            survivors = _Survivors(survivors, query[n], repeated)
+            stack.append((query[: n + 1], survivors))
+        self.query = query
+        # Enough to know which way best() ranks them.
+        survivors.fill(RESCORE_MAX + 1)
+        return self.count
+
+    def refine(self, budget_sec):
+        """Narrow the query's survivors for up to budget_sec; returns complete."""
+        survivors = self._stack[-1][1]
+        deadline = time.monotonic() + budget_sec
+        while survivors.step() and time.monotonic() < deadline:
+            pass
+        return survivors.done
+
+    def positions(self, i, end):
+        """
+        Indices of the query's characters in text i for the tightest match
+        ending at end, found by walking back from it.
+        """
+        text, query = self.folded[i], self.query
+        positions = [end]
+        for ch in reversed(query[:-1]):
+            positions.append(text.rfind(ch, 0, positions[-1]))
+        positions.reverse()
+        return positions
+
+    def _score(self, i, end):
+        # Lower is better: gaps inside the match, less a bonus for each
+        # matched character that starts a word or follows the one before.
+        positions = self.positions(i, end)
+        text = self.folded[i]
+        score = positions[-1] - positions[0] + 1 - len(positions)
+        prev = -2
+        for k in positions:
+            if k == 0 or text[k - 1] in BOUNDARIES:
+                score -= 2
+            elif k == prev + 1:
+                score -= 1
+            prev = k
+        return score, len(text), i
+
+    def best(self, limit):
+        """The limit best matches as (index, end), best first."""
+        if not self.query:
+            return []
+        survivors = self._stack[-1][1]
+        key = (self.query, limit, survivors.done)
+        if self._best is not None and self._best[0] == key:
+            return self._best[1]
+        survivors.fill(RESCORE_MAX + 1)
+        if survivors.done and len(survivors.index) <= RESCORE_MAX:
+            ranked = sorted(
+                zip(survivors.index, survivors.ends), key=lambda m: self._score(*m)
+            )
+            top = ranked[:limit]
+        else:
+            top = self._narrowest(survivors, limit)
+        # Found again as is until the query changes or the walk completes.
+        self._best = ((self.query, limit, survivors.done), top)
+        return top
+
+    def _narrowest(self, survivors, limit):
+        # Too many to score each: take the narrowest leftmost matches,
+        # collecting each width in turn (few distinct widths, most of
+        # them cut short once limit is reached) in library order. Nothing
+        # is narrower than a match without gaps, so once limit of those
+        # are found the rest of the library cannot change the answer;
+        # short of that, only the first RANK_MAX survivors are ranked
+        # until refine() has found them all.
+        tight = len(self.query) - 1
+        widths = list(map(sub, survivors.ends, survivors.firsts))
+        found = widths.count(tight)
+        while found < limit and len(widths) < RANK_MAX and not survivors.done:
+            seen = len(widths)
+            survivors.fill(seen + CHUNK)
+            more = list(map(sub, survivors.ends[seen:], survivors.firsts[seen:]))
+            found += more.count(tight)
+            widths += more
+        index, ends = survivors.index, survivors.ends
+        top = []
+        for width in sorted(set(widths)):
+            rows = compress(range(len(widths)), map(width.__eq__, widths))
+            top.extend(islice(rows, limit - len(top)))
+            if len(top) == limit:
+                break
+        return [(index[k], ends[k]) for k in top]
+
+
+class FinderScreen:
+    """
+    Jump to any course, part, section or lesson by typing a few letters of
+    its path. Returns the chosen PathEntry, or None on Esc.
+    """
+
+    REFINE_SEC = 0.005  # narrowing done per idle slice
+
+    def __init__(self, paths):
+        self.paths = paths
+        self.matcher = FuzzyMatcher([entry.text for entry in paths])
+        self.query = ""
+        self.selected = 0
+        self.shown = []  # (index, end) of the rows on screen, best first
+
+    def _draw(self, stdscr):
+        stdscr.erase()
+        max_y, max_x = stdscr.getmaxyx()
+        height = max(0, max_y - 4)
+        if self.query:
+            self.shown = self.matcher.best(height)
+        else:
+            self.shown = [(i, None) for i in range(min(height, len(self.paths)))]
+        self.selected = min(self.selected, max(0, len(self.shown) - 1))
+
+        try:
+            stdscr.addstr(0, 0, "Find"[:max_x], curses.color_pair(1))
+        except curses.error:
+            pass
+
+        for row, (i, end) in enumerate(self.shown):
+            text = self.paths[i].text
+            selected = row == self.selected
+            spans = []
+            if end is not None:
+                spans = [
+                    (k + 2, k + 3, curses.A_BOLD)
+                    for k in self.matcher.positions(i, end)
+                ]
+            attr = curses.color_pair(1) if selected else curses.color_pair(2)
+            runs = span_runs(("> " if selected else "  ") + text, spans)
+            draw_runs(stdscr, 3 + row, runs, max_x - 1, attr)
+
+        total = self.matcher.count if self.query else len(self.paths)
+        more = "" if not self.query or self.matcher.complete else "+"
+        status = (
+            f"{total}{more}/{len(self.paths)} | Up/Down move | Enter open | Esc back"
+        )
+        try:
+            stdscr.addstr(max_y - 1, 0, status[: max_x - 1], curses.color_pair(1))
+        except curses.error:
+            pass
+
+        prompt = f"> {self.query}"[-(max_x - 1) :] if max_x > 1 else ""
+        try:
+            stdscr.addstr(1, 0, prompt, curses.color_pair(2))
+        except curses.error:
+            pass
+        present(stdscr, screen="finder")
+
+    def run(self, stdscr):
+        scheduler = InputScheduler(stdscr)
+        curses.curs_set(1)
+        try:
+            while True:
+                self._draw(stdscr)
+                if self.query and not self.matcher.complete:
+                    # Finish the count (and settle a capped ranking) in
+                    # slices between keys rather than on the keystroke.
+                    scheduler.schedule("refine", 0)
+                else:
+                    scheduler.cancel("refine")
+                pressed = False
+                for key in scheduler.keys():
+                    pressed = True
+                    if key == 27:  # Esc
+                        return None
+                    elif key in ENTER_KEYS:
+                        if self.shown:
+                            return self.paths[self.shown[self.selected][0]]
+                    elif key in (curses.KEY_DOWN, 14):  # Down / Ctrl+N
+                        if self.shown:
+                            self.selected = (self.selected + 1) % len(self.shown)
+                    elif key in (curses.KEY_UP, 16):  # Up / Ctrl+P
+                        if self.shown:
+                            self.selected = (self.selected - 1) % len(self.shown)
+                    elif key in BACKSPACE_KEYS:
+                        self.query = self.query[:-1]
+                        self.selected = 0
+                    elif 32 <= key <= 126:
+                        self.query += chr(key)
+                        self.selected = 0
+                if not pressed and "refine" in scheduler.fired:
+                    self.matcher.refine(self.REFINE_SEC)
+                self.matcher.update(self.query)
+        finally:
+            curses.curs_set(0)
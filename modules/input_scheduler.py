@@ -0,0 +1,90 @@
+"""Blocking keyboard scheduler shared by every curses screen.
+
+Screens used to poll ``getch`` with ``nodelay(True)`` and loop straight
+back on ``-1``, which pins a CPU core while the terminal sits idle.  The
+scheduler instead blocks in curses' own ``timeout()`` wait on stdin and
+only wakes for a key, a ``KEY_RESIZE`` or the earliest timer a screen
+has registered (chord windows, status toasts).
+"""
+
+import curses
+import math
+import time
+
+
+class InputScheduler:
+    def __init__(self, stdscr, clock=time.monotonic):
+        self.stdscr = stdscr
+        self.clock = clock
+        self._timers = {}  # name -> monotonic deadline
+        self.fired = set()  # timers that expired during the last wait
+
+    def schedule(self, name, delay_sec):
+        """(Re)arm a named timer that expires ``delay_sec`` from now."""
+        self._timers[name] = self.clock() + delay_sec
+
+    def cancel(self, name):
+        self._timers.pop(name, None)
+
+    def active(self, name):
+        """Return True while the named timer is armed and not yet expired."""
+        deadline = self._timers.get(name)
+        return deadline is not None and self.clock() < deadline
+
+    def _timeout_ms(self):
+        if not self._timers:
+            return -1  # block until a key or resize arrives
+        remaining = min(self._timers.values()) - self.clock()
+        return max(0, math.ceil(remaining * 1000))
+
+    def _expire(self):
+        now = self.clock()
+        for name, deadline in list(self._timers.items()):
+            if deadline <= now:
+                del self._timers[name]
+                self.fired.add(name)
+
+    def wait(self):
+        """Block until a key arrives or a timer fires; return the key or -1.
+
+        The window is left non-blocking afterwards so callers can drain
+        whatever else is already queued with plain ``getch`` calls.
+        """
+        self.fired = set()
+        self.stdscr.timeout(self._timeout_ms())
+        try:
+            key = self.stdscr.getch()
+        except curses.error:
+            key = -1
+        self._expire()
+        self.stdscr.timeout(0)
+        return key
+
+    def keys(self):
+        """Yield the next key (blocking) followed by every key already queued."""
+        key = self.wait()
+        if key != -1:
+            yield key
+            yield from self.drain()
+
+    def drain(self):
+        """Yield the keys already queued without ever blocking."""
+        while True:
+            # A sub-screen run from the caller's loop may have switched the
+            # window back to blocking mode; draining must never block.
+            self.stdscr.timeout(0)
+            try:
+                key = self.stdscr.getch()
+            except curses.error:
+                key = -1
+            if key == -1:
+                return
+            yield key
+
+    def wait_for_key(self):
+        """Block with no timers considered; used by 'press any key' prompts."""
+        self.stdscr.timeout(-1)
+        try:
+            return self.stdscr.getch()
+        finally:
+            self.stdscr.timeout(0)
@@ -0,0 +1,195 @@
+# ~/Apps/worship/modules/lesson_body.py
+import itertools
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_RESIDENT = 64
+
+
+def tokenise_body(text):
+    """
+    Turn the raw source text under a lesson heading into lesson content.
+    Only indented (4 spaces or a tab) lines count; blank lines are kept while
+    inside such a block and any other prose ends it. Returns None when the
+    region holds no content at all.
+    """
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    if "\r" in text:
+        lines = [line.rstrip("\r") for line in lines]
+
+    body = []
+    append = body.append
+    in_code_block = False
+    for line in lines:
+        first = line[:1]
+        if first == " " and line.startswith("    "):
+            in_code_block = True
+            append(line[4:].rstrip())
+        elif first == "\t":
+            in_code_block = True
+            append(line[1:].rstrip())
+        elif first == "#" and line.startswith("# "):
+            continue  # the course title line never belongs to a lesson
+        elif in_code_block:
+            if line.strip():
+                in_code_block = False
+            else:
+                append("")
+    if not body:
+        return None
+    return "\n".join(body)
+
+
+class ResidentBodies:
+    """
+    LRU of decoded lesson bodies shared by every LessonStore. Background
+    readers (the search index, section search) share it with the UI, so
+    every access holds the lock.
+    """
+
+    def __init__(self, max_resident=DEFAULT_MAX_RESIDENT):
+        self.max_resident = max_resident
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, touch=True):
+        with self._lock:
+            content = self._items.get(key)
+            if content is not None and touch:
+                self._items.move_to_end(key)
+        return content
+
+    def put(self, key, content):
+        with self._lock:
+            self._items[key] = content
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_resident:
+                self._items.popitem(last=False)
+
+    def resize(self, max_resident):
+        with self._lock:
+            self.max_resident = max(1, max_resident)
+            while len(self._items) > self.max_resident:
+                self._items.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+RESIDENT = ResidentBodies()
+_store_ids = itertools.count()
+
+
+class StaleStoreError(Exception):
+    """A course file changed since its lesson offsets were taken."""
+
+
+def file_stamp(st):
+    """The (mtime_ns, size) of an os.stat_result, as LessonStore checks it."""
+    return (st.st_mtime_ns, st.st_size)
+
+
+class LessonStore:
+    """
+    Read-only mmap of one course file. The map is opened on the first body
+    read. Offsets into it are only good for the file they were taken from,
+    so once the file's size or mtime differs from that stamp the store
+    refuses to read (StaleStoreError) instead of slicing the new bytes;
+    trees holding it must be re-parsed.
+    """
+
+    def __init__(self, filepath, stamp=None):
+        self.filepath = filepath
+        # Resident bodies are keyed per store instance, so a re-indexed file
+        # never serves text cached under its old offsets.
+        self._id = next(_store_ids)
+        self._map = None
+        self._lock = threading.Lock()  # opening the map, from any thread
+        # file_stamp() of the file the offsets index; None takes whatever
+        # is on disk at the first read.
+        self._stamp = stamp
+
+    def __getstate__(self):
+        return {"filepath": self.filepath, "stamp": self._stamp}
+
+    def __setstate__(self, state):
+        self.__init__(state["filepath"], state.get("stamp"))
+
+    def restamp(self, stamp):
+        """Vouch that the file as stamped holds the same bytes as indexed."""
+        with self._lock:
+            if stamp != self._stamp:
+                self.close()
+                self._stamp = stamp
+
+    def _mapped(self):
+        with self._lock:
+            if self._map is None:
+                with open(self.filepath, "rb") as f:
+                    # Stamped from the file actually mapped, not a stat of
+                    # the path that a replace could slip in after.
+                    self._check(file_stamp(os.fstat(f.fileno())))
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._check(file_stamp(os.stat(self.filepath)))
+            return self._map
+
+    def _check(self, stamp):
+        if self._stamp is None:
+            self._stamp = stamp
+        elif stamp != self._stamp:
+            self.close()
+            raise StaleStoreError(f"{self.filepath} changed since it was indexed")
+
+    def read(self, start, end, resident=True):
+        """
+        The body at start:end. With resident=False (one-pass scans) a body
+        not already resident is decoded without entering RESIDENT, so the
+        scan never evicts what the views are using.
+        """
+        key = (self._id, start, end)
+        content = RESIDENT.get(key, touch=resident)
+        if content is None:
+            content = self._content(self._mapped()[start:end])
+            if resident:
+                RESIDENT.put(key, content)
+        return content
+
+    def _content(self, raw):
+        return tokenise_body(raw.decode("utf-8", errors="replace")) or ""
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class LessonBody:
+    """Byte span of a lesson body inside a LessonStore (or a PackStore)."""
+
+    __slots__ = ("store", "start", "end")
+
+    def __init__(self, store, start, end):
+        self.store = store
+        self.start = start
+        self.end = end
+
+    def __getstate__(self):
+        return (self.store, self.start, self.end)
+
+    def __setstate__(self, state):
+        self.store, self.start, self.end = state
+
+    def read(self, resident=True):
+        return self.store.read(self.start, self.end, resident)
+
+    def move(self, store, start, end):
+        """Point at the same bytes after an edit shifted them within the file."""
+        self.store = store
+        self.start = start
+        self.end = end
@@ -0,0 +1,114 @@
+# ~/Apps/worship/modules/lesson_model.py
+from collections import OrderedDict
+from itertools import accumulate
+
+from .viewport import lesson_lines
+from .wrap_layout import WrapLayout
+
+SKIP_PREFIXES = ("#!", "//!", "--!")
+TAB_WIDTH = 4
+MAX_MODELS = 64
+MAX_LAYOUTS = 4  # pane widths kept per lesson, e.g. across a resize and back
+
+
+class LessonModel:
+    """
+    Everything the typing and doc views derive from a lesson's text, built
+    once: the rows, the tab-stripped typing target of each row, which rows
+    are skipped (#!, //!, --! comments) and the characters to type in total.
+    Display-column prefix arrays are filled in per row on first use.
+    """
+
+    __slots__ = (
+        "lines",
+        "targets",
+        "skip",
+        "total_chars",
+        "_cols",
+        "_target_cols",
+        "_widths",
+        "_layouts",
+    )
+
+    def __init__(self, content):
+        self.lines = lesson_lines(content)
+        self.targets = [line.replace("\t", "") for line in self.lines]
+        self.skip = [line.lstrip().startswith(SKIP_PREFIXES) for line in self.lines]
+        self.total_chars = sum(
+            len(target) for target, skip in zip(self.targets, self.skip) if not skip
+        )
+        self._cols = [None] * len(self.lines)
+        self._target_cols = [None] * len(self.lines)
+        self._widths = None
+        self._layouts = OrderedDict()  # pane width -> WrapLayout
+
+    def __len__(self):
+        return len(self.lines)
+
+    def display_cols(self, i):
+        """cols[k] is the screen column of lines[i][k]; cols[-1] the row width."""
+        cols = self._cols[i]
+        if cols is None:
+            line = self.lines[i]
+            if "\t" not in line:
+                cols = range(len(line) + 1)
+            else:
+                widths = (TAB_WIDTH if ch == "\t" else 1 for ch in line)
+                cols = list(accumulate(widths, initial=0))
+            self._cols[i] = cols
+        return cols
+
+    def widths(self):
+        """Display width of every row, computed once."""
+        if self._widths is None:
+            self._widths = [
+                self.display_cols(i)[-1] if "\t" in line else len(line)
+                for i, line in enumerate(self.lines)
+            ]
+        return self._widths
+
+    def layout(self, width):
+        """The memoised WrapLayout of this lesson at a pane width."""
+        layout = self._layouts.get(width)
+        if layout is None:
+            layout = WrapLayout(self, width)
+            self._layouts[width] = layout
+            while len(self._layouts) > MAX_LAYOUTS:
+                self._layouts.popitem(last=False)
+        else:
+            self._layouts.move_to_end(width)
+        return layout
+
+    def target_cols(self, i):
+        """
+        cols[k] is where the cursor sits once k target characters of row i
+        are typed: on the next character to type (after any tabs), or at
+        the end of the row.
+        """
+        cols = self._target_cols[i]
+        if cols is None:
+            line = self.lines[i]
+            if "\t" not in line:
+                cols = range(len(line) + 1)
+            else:
+                prefix = self.display_cols(i)
+                cols = [prefix[k] for k, ch in enumerate(line) if ch != "\t"]
+                cols.append(prefix[-1])
+            self._target_cols[i] = cols
+        return cols
+
+
+_models = OrderedDict()
+
+
+def lesson_model(lesson):
+    """Return the memoised LessonModel for lesson (an LRU of MAX_MODELS)."""
+    model = _models.get(lesson)
+    if model is not None:
+        _models.move_to_end(lesson)
+        return model
+    model = LessonModel(lesson.content)
+    _models[lesson] = model
+    while len(_models) > MAX_MODELS:
+        _models.popitem(last=False)
+    return model
@@ -0,0 +1,186 @@
+# ~/Apps/worship/modules/lesson_search.py
+import threading
+from bisect import bisect_left, bisect_right
+
+from .lesson_body import StaleStoreError
+from .viewport import lesson_lines
+
+# Sections with at least this many lessons are searched on a thread as
+# soon as a term is accepted, so the section-wide count fills in on its own.
+BACKGROUND_MIN_LESSONS = 32
+
+
+def fold(text):
+    """Lower-case text without changing its length, so indices still line up."""
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+class LessonSearch:
+    """
+    Case-insensitive matches of one term in a lesson's lines, kept as
+    (line, start, end) character spans in reading order.
+
+    A match of a longer term can only start where the shorter one matched,
+    so as the term grows while it is typed only the previous spans are
+    re-checked, and deleting a character goes back to the spans already
+    found for the shorter term. n/N are a bisect over the spans.
+    """
+
+    def __init__(self, lines):
+        self.lines = lines
+        self._folded = [None] * len(lines)
+        self._stack = [("", None)]  # (term, spans) for each prefix typed
+        self.term = ""
+        self.spans = []
+
+    def _line(self, i):
+        folded = self._folded[i]
+        if folded is None:
+            folded = self._folded[i] = fold(self.lines[i])
+        return folded
+
+    def update(self, term):
+        """Match term instead of the current one; returns the spans."""
+        term = fold(term)
+        stack = self._stack
+        while len(stack) > 1 and not term.startswith(stack[-1][0]):
+            stack.pop()
+        prefix, spans = stack[-1]
+        if term != prefix:
+            n = len(term)
+            if spans is None:
+                spans = []
+                for i in range(len(self.lines)):
+                    line = self._line(i)
+                    start = line.find(term)
+                    while start != -1:
+                        spans.append((i, start, start + n))
+                        start = line.find(term, start + 1)
+            else:
+                spans = [
+                    (i, start, start + n)
+                    for i, start, _ in spans
+                    if self._line(i).startswith(term, start)
+                ]
+            stack.append((term, spans))
+        self.term = term
+        self.spans = spans or []
+        return self.spans
+
+    def adopt(self, term, spans):
+        """Take spans found for term elsewhere (e.g. by a SectionSearch)."""
+        self.term = fold(term)
+        self.spans = spans
+        self._stack = [("", None), (self.term, spans)]
+
+    def on_line(self, i):
+        """The spans on line i, in order."""
+        spans = self.spans
+        lo = bisect_left(spans, (i,))
+        return spans[lo : bisect_left(spans, (i + 1,), lo)]
+
+    def step(self, line, col, forward=True):
+        """
+        The span after (or before) position line:col, wrapping round the
+        lesson, or None when there are no spans.
+        """
+        spans = self.spans
+        if not spans:
+            return None
+        if forward:
+            k = bisect_right(spans, (line, col, float("inf")))
+            return spans[k % len(spans)]
+        k = bisect_left(spans, (line, col))
+        return spans[k - 1]
+
+
+class SectionSearch:
+    """
+    The matches of one term across a sequencer's lessons, as a list of
+    (line, start, end) spans per lesson. Lessons are searched on first
+    need, or all of them in the background for large sections; either way
+    each lesson is searched once per term.
+    """
+
+    def __init__(self, lessons, term, known=None):
+        self.lessons = lessons
+        self.term = fold(term)
+        self._spans = [None] * len(lessons)
+        for i, spans in (known or {}).items():
+            self._spans[i] = spans
+        self._cancelled = False
+        self.background = len(lessons) >= BACKGROUND_MIN_LESSONS
+        if self.background:
+            thread = threading.Thread(target=self._fill_background)
+            thread.daemon = True
+            thread.start()
+
+    def fill(self):
+        """Search every lesson not searched yet."""
+        for i in range(len(self.lessons)):
+            if self._cancelled:
+                return
+            self.spans(i)
+
+    def _fill_background(self):
+        try:
+            self.fill()
+        except StaleStoreError:
+            # The file changed under the lessons: hand the rest back to the
+            # foreground, whose next fill() re-raises where DocMode reloads.
+            self.background = False
+
+    def cancel(self):
+        """Stop the background search, e.g. once another term replaced it."""
+        self._cancelled = True
+
+    def spans(self, i):
+        """The spans of lesson i, searching it now if nobody has yet."""
+        spans = self._spans[i]
+        if spans is None:
+            # Possibly on the background thread: read past the shared LRU
+            # so a section-wide scan never evicts the bodies on screen.
+            text = self.lessons[i].read(resident=False)
+            search = LessonSearch(lesson_lines(text))
+            spans = self._spans[i] = search.update(self.term)
+        return spans
+
+    def count(self):
+        """(matches found so far, whether every lesson has been searched)."""
+        found = [spans for spans in self._spans if spans is not None]
+        return sum(map(len, found)), len(found) == len(self._spans)
+
+    def ordinal(self, i, line, col):
+        """1-based number of the match at lesson i, line:col across the section."""
+        spans = self.spans(i)
+        k = bisect_left(spans, (line, col))
+        if k == len(spans) or spans[k][:2] != (line, col):
+            return None
+        return sum(len(self.spans(j)) for j in range(i)) + k + 1
+
+    def step(self, i, line, col, forward=True):
+        """
+        (lesson, span) of the next (or previous) match after lesson i,
+        line:col, moving into later (earlier) lessons and wrapping round
+        the section; None when the term is nowhere in it.
+        """
+        spans = self.spans(i)
+        if forward:
+            k = bisect_right(spans, (line, col, float("inf")))
+            if k < len(spans):
+                return i, spans[k]
+        else:
+            k = bisect_left(spans, (line, col))
+            if k > 0:
+                return i, spans[k - 1]
+        n = len(self.lessons)
+        direction = 1 if forward else -1
+        for d in range(1, n + 1):
+            j = (i + d * direction) % n
+            spans = self.spans(j)
+            if spans:
+                return j, spans[0] if forward else spans[-1]
+        return None
@@ -3,15 +3,72 @@ import curses
 import sys
 from .doc_mode import DocMode
 from .boom import Boom
+from .course_parser import CourseParseError, reload_course
+from .input_scheduler import InputScheduler
+from .lesson_body import StaleStoreError
+from .lesson_model import lesson_model
+from .typing_engine import TypingEngine
+from .typing_view import DirtyRows, draw_typing_line
 from .key_utils import is_quit_request
+from .frame import present
 
 
 class LessonSequencer:
-    def __init__(self, name, lessons, doc_mode=False, source_file=None):
+    def __init__(
+        self,
+        name,
+        lessons,
+        index,
+        doc_mode=False,
+        source_file=None,
+        course=None,
+    ):
         self.name = name
         self.lessons = lessons
         self.doc_mode = doc_mode
         self.source_file = source_file
+        self.course = course
+        self.index = index  # LibraryIndex of every loaded course
+
+    def reload(self, idx):
+        """
+        Re-parse the course after its file changed under the lazy tree
+        (StaleStoreError), swapping in the new lessons of the same sections.
+        Returns where lesson idx is now, by name, or idx clamped; raises
+        OSError or CourseParseError when the file no longer parses.
+        """
+        course = self.course or self.index.course_for_display(self.name)
+        if course is None or not course.source_file:
+            raise OSError(f"{self.name}: no source file to reload")
+        name = self.lessons[idx].name
+        shown = set(map(id, self.lessons))
+        sections = {
+            (part.name, section.name)
+            for part in course.parts
+            for section in part.sections
+            if any(id(lesson) in shown for lesson in section.lessons)
+        }
+        course = reload_course(course)
+        self.index.replace(course)
+        self.course = course
+        self.source_file = course.source_file
+        lessons = [
+            lesson
+            for part in course.parts
+            for section in part.sections
+            if (part.name, section.name) in sections
+            for lesson in section.lessons
+        ]
+        self.lessons = lessons or [
+            lesson
+            for part in course.parts
+            for section in part.sections
+            for lesson in section.lessons
+        ]
+        for i, lesson in enumerate(self.lessons):
+            if lesson.name == name:
+                return i
+        return min(idx, len(self.lessons) - 1)
 
     def run(self, stdscr):
         curses.start_color()
@@ -31,28 +88,31 @@ class LessonSequencer:
         return self._run_ordinary(stdscr)
 
     def _run_ordinary(self, stdscr):
-        stdscr.nodelay(True)
+        scheduler = InputScheduler(stdscr)
 
-        for lesson in self.lessons:
-            stdscr.clear()
-            stdscr.refresh()
+        i = 0
+        while i < len(self.lessons):
+            lesson = self.lessons[i]
+            stdscr.erase()
             curses.curs_set(2)
 
-            lines = lesson.content.splitlines() or [""]
+            try:
+                model = lesson_model(lesson)
+            except StaleStoreError:
+                try:
+                    i = self.reload(i)
+                except (OSError, CourseParseError):
+                    return False
+                continue
+            lines = model.lines
             total_lines = len(lines)
-
-            processed_lines = []
-            is_skip = []
-            for line in lines:
-                non_tabs = [c for c in line if c != "\t"]
-                processed_lines.append(non_tabs)
-                is_skip.append(line.lstrip().startswith(("#!", "//!", "--!")))
+            targets = model.targets
 
             offset = 0
-            current_line = 0
-            user_inputs = [[] for _ in lines]
+            engine = TypingEngine(model)
             lesson_finished = False
             need_redraw = True
+            dirty = DirtyRows()
 
             while True:
                 max_y, max_x = stdscr.getmaxyx()
@@ -63,7 +123,7 @@ class LessonSequencer:
                 if total_lines > available_height:
                     visible_top = offset
                     visible_bottom = offset + available_height - 1
-                    current_visible_row = current_line - offset
+                    current_visible_row = engine.line - offset
 
                     scroll_trigger_row = int(available_height * 0.6)
 
@@ -71,10 +131,10 @@ class LessonSequencer:
                         scroll_amount = current_visible_row - scroll_trigger_row
                         offset += scroll_amount
 
-                    lines_below = total_lines - 1 - current_line
+                    lines_below = total_lines - 1 - engine.line
                     if lines_below <= 20:
                         desired_offset = max(
-                            0, current_line - int(available_height * 0.3)
+                            0, engine.line - int(available_height * 0.3)
                         )
                         offset = max(offset, desired_offset)
 
@@ -87,81 +147,46 @@ class LessonSequencer:
                 visible_range = range(start_idx, end_idx)
 
                 if need_redraw:
-                    # Title on two lines
-                    line1 = self.name
-                    line2 = f"TYPE_MODE: {lesson.name}"
-                    try:
-                        stdscr.addstr(
-                            0, 0, line1[:max_x], curses.color_pair(1) | curses.A_BOLD
-                        )
-                        stdscr.addstr(
-                            1, 0, line2[:max_x], curses.color_pair(1) | curses.A_BOLD
-                        )
-                        stdscr.clrtoeol()
-                    except curses.error:
-                        pass
-
-                    try:
-                        stdscr.move(2, 0)
-                        stdscr.clrtoeol()
-                    except curses.error:
-                        pass
-
-                    for local_i, global_i in enumerate(visible_range):
-                        row = content_start_y + local_i
-                        line = lines[global_i]
-                        user_input = user_inputs[global_i]
-                        display_pos = 0
-                        input_pos = 0
-
-                        for char in line:
-                            if char == "\t":
-                                for _ in range(4):
-                                    try:
-                                        stdscr.addch(
-                                            row, display_pos, " ", curses.color_pair(1)
-                                        )
-                                    except:
-                                        pass
-                                    display_pos += 1
-                            else:
-                                ch = char
-                                if input_pos < len(user_input):
-                                    if (
-                                        input_pos < len(processed_lines[global_i])
-                                        and user_input[input_pos]
-                                        == processed_lines[global_i][input_pos]
-                                    ):
-                                        ch = user_input[input_pos]
-                                    else:
-                                        ch = "█"
-                                    input_pos += 1
-                                if ch == "\n":
-                                    ch = "↵"
-                                try:
-                                    stdscr.addch(
-                                        row, display_pos, ch, curses.color_pair(1)
-                                    )
-                                except:
-                                    pass
-                                display_pos += 1
-
-                        while input_pos < len(user_input):
-                            try:
-                                stdscr.addch(
-                                    row, display_pos, "█", curses.color_pair(1)
-                                )
-                            except:
-                                pass
-                            display_pos += 1
-                            input_pos += 1
+                    full = dirty.sync((offset, max_y, max_x))
+                    if full:
+                        # Title on two lines
+                        line1 = self.name
+                        line2 = f"TYPE_MODE: {lesson.name}"
+                        try:
+                            stdscr.addstr(
+                                0,
+                                0,
+                                line1[:max_x],
+                                curses.color_pair(1) | curses.A_BOLD,
+                            )
+                            stdscr.addstr(
+                                1,
+                                0,
+                                line2[:max_x],
+                                curses.color_pair(1) | curses.A_BOLD,
+                            )
+                            stdscr.clrtoeol()
+                        except curses.error:
+                            pass
 
                         try:
-                            stdscr.move(row, display_pos)
+                            stdscr.move(2, 0)
                             stdscr.clrtoeol()
-                        except:
+                        except curses.error:
                             pass
 
+                    for local_i, global_i in enumerate(visible_range):
+                        if not dirty.needs(global_i):
+                            continue
+                        draw_typing_line(
+                            stdscr,
+                            content_start_y + local_i,
+                            lines[global_i],
+                            targets[global_i],
+                            engine.inputs[global_i],
+                            max_x,
+                        )
+
                     # Clear remaining lines
                     content_end_row = content_start_y + (end_idx - start_idx)
                     clear_start = content_end_row
@@ -169,20 +194,17 @@ class LessonSequencer:
                         max_y - 2 if total_lines - end_idx > 7 else content_end_row
                     )
 
-                    for r in range(clear_start, clear_end):
-                        try:
-                            stdscr.move(r, 0)
-                            stdscr.clrtoeol()
-                        except curses.error:
-                            pass
+                    if full:
+                        for r in range(clear_start, clear_end):
+                            try:
+                                stdscr.move(r, 0)
+                                stdscr.clrtoeol()
+                            except curses.error:
+                                pass
 
                     # Stats + scroll indicator
-                    typed = sum(
-                        len(ui) for i, ui in enumerate(user_inputs) if not is_skip[i]
-                    )
-                    total = sum(
-                        len(p) for i, p in enumerate(processed_lines) if not is_skip[i]
-                    )
+                    typed = engine.typed
+                    total = model.total_chars
                     stats = f"Typed {typed}/{total} chars"
 
                     scroll_info = ""
@@ -210,19 +232,11 @@ class LessonSequencer:
                         pass
 
                     if not lesson_finished:
-                        cursor_row = content_start_y + (current_line - offset)
-                        cursor_col = 0
-                        input_pos = 0
-                        for char in lines[current_line]:
-                            if char == "\t":
-                                cursor_col += 4
-                            else:
-                                if input_pos < len(user_inputs[current_line]):
-                                    input_pos += 1
-                                    cursor_col += 1
-                                else:
-                                    break
-                        cursor_col += len(user_inputs[current_line]) - input_pos
+                        cursor_row = content_start_y + (engine.line - offset)
+                        cols = model.target_cols(engine.line)
+                        typed_here = len(engine.inputs[engine.line])
+                        cursor_col = cols[min(typed_here, len(cols) - 1)]
+                        cursor_col += max(0, typed_here - (len(cols) - 1))
                         try:
                             stdscr.move(cursor_row, cursor_col)
                         except:
@@ -230,18 +244,17 @@ class LessonSequencer:
                     else:
                         curses.curs_set(0)
 
-                    stdscr.refresh()
+                    present(stdscr, screen="type")
                     need_redraw = False
+                    dirty.clean()
 
                 # === Input handling ===
                 changed = False
                 next_lesson = False
 
-                while True:
-                    key = stdscr.getch()
-                    if key == -1:
-                        break
+                for key in scheduler.keys():
                     changed = True
+                    dirty.mark(engine.line)
 
                     if is_quit_request(key, typing_active=not lesson_finished):
                         if key in (ord("q"), ord("Q")) and lesson_finished:
@@ -257,57 +270,28 @@ class LessonSequencer:
                             break  # exit key-drain loop early
                     else:
                         if key == 18:  # Ctrl+R
-                            user_inputs = [[] for _ in lines]
-                            current_line = 0
+                            dirty.mark_all()
+                            engine.reset()
                             lesson_finished = False
-                        elif is_skip[current_line]:
-                            if key in (curses.KEY_ENTER, 10, 13):
-                                if current_line < total_lines - 1:
-                                    current_line += 1
                         else:
-                            if key in (curses.KEY_BACKSPACE, 127, 8):
-                                if user_inputs[current_line]:
-                                    user_inputs[current_line].pop()
-                            elif key in (curses.KEY_ENTER, 10, 13):
-                                if (
-                                    user_inputs[current_line]
-                                    == processed_lines[current_line]
-                                ):
-                                    if current_line < total_lines - 1:
-                                        current_line += 1
-                            elif key == 9:  # Tab
-                                cur_len = len(user_inputs[current_line])
-                                req_len = len(processed_lines[current_line])
-                                if cur_len < req_len:
-                                    remaining = "".join(
-                                        processed_lines[current_line][cur_len:]
-                                    )
-                                    if remaining.startswith("    "):
-                                        user_inputs[current_line].extend(
-                                            [" ", " ", " ", " "]
-                                        )
-                            elif 32 <= key <= 126:
-                                ch = chr(key)
-                                if len(user_inputs[current_line]) < len(
-                                    processed_lines[current_line]
-                                ):
-                                    user_inputs[current_line].append(ch)
+                            engine.press(key)
+
+                dirty.mark(engine.line)
 
                 # After processing all pending keys
                 if next_lesson:
-                    break  # Exit the outer while True → go to next lesson in for-loop
+                    break  # Exit the outer while True → go to the next lesson
 
                 # Check if lesson just completed
-                if all(
-                    is_skip[i] or user_inputs[i] == processed_lines[i]
-                    for i in range(total_lines)
-                ):
+                if engine.finished:
                     lesson_finished = True
                     changed = True
 
                 if changed:
                     need_redraw = True
 
+            i += 1
+
         # All lessons completed
         boom = Boom("Press any key to exit.")
         boom.display(stdscr)
@@ -0,0 +1,158 @@
+# ~/Apps/worship/modules/library_index.py
+from collections import namedtuple
+
+# A lesson's place in the library; position counts lessons across the whole
+# course in reading order (part by part, section by section).
+LessonEntry = namedtuple("LessonEntry", "course part section lesson position")
+
+# A course, part, section or lesson as the fuzzy finder lists it; the levels
+# below the one it names are None.
+PathEntry = namedtuple("PathEntry", "text course part section lesson")
+
+
+def path_text(course, part=None, section=None, lesson=None):
+    """The "Course > Part > Section > Lesson" text, minus default Main levels."""
+    names = [course.name]
+    names += [node.name for node in (part, section) if node and node.name != "Main"]
+    if lesson is not None:
+        names.append(lesson.name)
+    return " > ".join(names)
+
+
+def sequencer_name(course, part, section):
+    """The title the menus give a LessonSequencer over this section."""
+    if len(part.sections) > 1 or section.name != "Main":
+        return f"{course.name}: {part.name}: {section.name}"
+    if len(course.parts) > 1 or part.name != "Main":
+        return f"{course.name}: {part.name}"
+    return course.name
+
+
+class _CourseIndex:
+    def __init__(self, course):
+        self.course = course
+        self.nodes = {(): course}
+        self.by_name = {}  # lesson name -> first LessonEntry in the course
+        self.by_path = {}  # (part, section, lesson name) -> LessonEntry
+        self.by_lesson = {}  # Lesson -> LessonEntry
+        self.entries = []  # LessonEntry by position
+        position = 0
+        for part in course.parts:
+            self.nodes.setdefault((part.name,), part)
+            for section in part.sections:
+                self.nodes.setdefault((part.name, section.name), section)
+                for lesson in section.lessons:
+                    entry = LessonEntry(course, part, section, lesson, position)
+                    self.by_name.setdefault(lesson.name, entry)
+                    self.by_path.setdefault(
+                        (part.name, section.name, lesson.name), entry
+                    )
+                    self.by_lesson[lesson] = entry
+                    self.entries.append(entry)
+                    position += 1
+
+
+class LibraryIndex:
+    """
+    Name lookups over every loaded course, built once per load. Courses,
+    parts and sections are found by their name path and lessons by name
+    (optionally qualified by part/section) or by identity, each with one
+    dict lookup. First occurrence wins, as with the scans it replaces.
+    """
+
+    def __init__(self, courses):
+        self._courses = {}
+        for course in courses:
+            self._courses.setdefault(course.name, _CourseIndex(course))
+        self._paths = None
+
+    def replace(self, course):
+        """Re-index course, e.g. after DocEditor re-parsed its file."""
+        self._courses[course.name] = _CourseIndex(course)
+        self._paths = None
+
+    def paths(self):
+        """
+        A PathEntry for every course, part, section and lesson, courses in
+        name order and the rest in reading order; built once per change.
+        Default Main parts and sections have no entry of their own.
+        """
+        if self._paths is None:
+            paths = []
+            for name in sorted(self._courses, key=str.lower):
+                course = self._courses[name].course
+                paths.append(PathEntry(path_text(course), course, None, None, None))
+                for part in course.parts:
+                    if part.name != "Main":
+                        text = path_text(course, part)
+                        paths.append(PathEntry(text, course, part, None, None))
+                    for section in part.sections:
+                        if section.name != "Main":
+                            text = path_text(course, part, section)
+                            paths.append(PathEntry(text, course, part, section, None))
+                        for lesson in section.lessons:
+                            text = path_text(course, part, section, lesson)
+                            paths.append(PathEntry(text, course, part, section, lesson))
+            self._paths = paths
+        return self._paths
+
+    def course(self, course_name):
+        index = self._courses.get(course_name)
+        return index.course if index else None
+
+    def node(self, course_name, part_name="", section_name=""):
+        """Return the Course, Part or Section at that path, or None."""
+        index = self._courses.get(course_name)
+        if index is None:
+            return None
+        path = tuple(name for name in (part_name, section_name) if name)
+        if section_name and not part_name:
+            return None
+        return index.nodes.get(path)
+
+    def find(self, course_name, lesson_name, part_name="", section_name=""):
+        """Return the LessonEntry for lesson_name in that course, or None."""
+        index = self._courses.get(course_name)
+        if index is None:
+            return None
+        if part_name and section_name:
+            return index.by_path.get((part_name, section_name, lesson_name))
+        entry = index.by_name.get(lesson_name)
+        if entry and part_name and entry.part.name != part_name:
+            # The name repeats across parts; fall back to the part's own scan.
+            part = index.nodes.get((part_name,))
+            for section in part.sections if part else ():
+                entry = index.by_path.get((part_name, section.name, lesson_name))
+                if entry:
+                    return entry
+            return None
+        return entry
+
+    def locate(self, course_name, lesson):
+        """Return the LessonEntry of this exact Lesson object, or None."""
+        index = self._courses.get(course_name)
+        return index.by_lesson.get(lesson) if index else None
+
+    def at(self, course_name, position):
+        """Return the LessonEntry at a course-wide lesson position, or None."""
+        index = self._courses.get(course_name)
+        if index is None or not 0 <= position < len(index.entries):
+            return None
+        return index.entries[position]
+
+    def course_for_display(self, display_name):
+        """
+        Return the course a sequencer title like "Course: Part: Section"
+        belongs to. Course names may contain ": " themselves, so each prefix
+        ending before a separator is tried, longest first.
+        """
+        index = self._courses.get(display_name)
+        if index:
+            return index.course
+        cut = display_name.rfind(":")
+        while cut > 0:
+            index = self._courses.get(display_name[:cut])
+            if index:
+                return index.course
+            cut = display_name.rfind(":", 0, cut)
+        return None
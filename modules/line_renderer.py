@@ -0,0 +1,94 @@
+# ~/Apps/worship/modules/line_renderer.py
+import curses
+
+from .lesson_model import TAB_WIDTH
+
+MISMATCH = "█"
+TAB = " " * TAB_WIDTH
+
+
+def draw_runs(stdscr, row, runs, width, base_attr=0):
+    """
+    Paint (text, attr) runs left to right from column 0 of row and clear the
+    rest of it. Neighbouring runs with the same attr are joined first, so a
+    row costs one addstr per attribute change rather than one call per cell.
+    Returns the column after the last cell written.
+    """
+    merged = []
+    for text, attr in runs:
+        if not text:
+            continue
+        if merged and merged[-1][1] == attr:
+            merged[-1][0] += text
+        else:
+            merged.append([text, attr])
+
+    col = 0
+    for text, attr in merged:
+        if col >= width:
+            break
+        text = text[: width - col]
+        try:
+            stdscr.addstr(row, col, text, base_attr | attr)
+        except curses.error:
+            pass  # the bottom-right cell still gets written
+        col += len(text)
+
+    try:
+        stdscr.move(row, col)
+        stdscr.clrtoeol()
+    except curses.error:
+        pass
+    return col
+
+
+def span_runs(text, spans):
+    """
+    Split display text into runs for draw_runs. spans are (start, end, attr)
+    display-column ranges; where they overlap the attrs are combined.
+    """
+    if not spans:
+        return [(text, 0)]
+    cuts = {0, len(text)}
+    for start, end, _ in spans:
+        cuts.add(max(0, min(start, len(text))))
+        cuts.add(max(0, min(end, len(text))))
+    cuts = sorted(cuts)
+    runs = []
+    for start, end in zip(cuts, cuts[1:]):
+        attr = 0
+        for s, e, a in spans:
+            if s <= start and end <= e:
+                attr |= a
+        runs.append((text[start:end], attr))
+    return runs
+
+
+def typed_text(line, target, user_input):
+    """
+    A typing row as it appears on screen: tabs expanded, each typed character
+    shown over the one it replaced, or MISMATCH where it was wrong.
+    """
+    typed = len(user_input)
+    if "\t" not in line:
+        if not typed:
+            return line
+        head = "".join(
+            ch if ch == want else MISMATCH for ch, want in zip(user_input, target)
+        )
+        return head + line[typed:] + MISMATCH * (typed - len(target))
+
+    pieces = []
+    pos = 0
+    for char in line:
+        if char == "\t":
+            pieces.append(TAB)
+        elif pos < typed:
+            ch = user_input[pos]
+            pieces.append(ch if ch == char else MISMATCH)
+            pos += 1
+        else:
+            pieces.append(char)
+    if pos < typed:
+        pieces.append(MISMATCH * (typed - pos))
+    return "".join(pieces)
@@ -2,14 +2,26 @@
 import curses
 from .ascii import title_ascii_art
 from .key_utils import is_quit_request
+from .input_scheduler import InputScheduler
+from .library_index import LibraryIndex, sequencer_name
+from .frame import present
 
 
 class Menu:
-    def __init__(self, courses, doc_mode=False):
-        self.courses = sorted(courses, key=lambda c: c.name.lower())
+    def __init__(self, courses, doc_mode=False, index=None, search=None):
+        self._courses = sorted(courses, key=lambda c: c.name.lower())
+        self.index = index or LibraryIndex(self._courses)
+        self.search = search  # SearchIndex, built on first use when None
+        self._searched = None  # the courses it was last started on
         self.title_ascii_art = title_ascii_art
         self.doc_mode = doc_mode
 
+    @property
+    def courses(self):
+        # Read through the index, so a course DocEditor re-parsed is the one
+        # opened next rather than the tree the menu was started with.
+        return [self.index.course(c.name) or c for c in self._courses]
+
     def run(self, stdscr):
         curses.curs_set(0)
         curses.start_color()
@@ -17,7 +29,7 @@ class Menu:
         curses.init_pair(1, curses.COLOR_CYAN, -1)
         curses.init_pair(2, curses.COLOR_WHITE, -1)
         stdscr.bkgd(" ", curses.color_pair(2))
-        stdscr.nodelay(True)
+        scheduler = InputScheduler(stdscr)
 
         selected = 0
         need_redraw = True
@@ -36,7 +48,7 @@ class Menu:
             menu_width = max((len(f"> {c.name}") for c in self.courses), default=0)
 
             if need_redraw:
-                stdscr.clear()
+                stdscr.erase()
 
                 # ASCII title
                 for i, line in enumerate(art_lines):
@@ -77,14 +89,11 @@ class Menu:
                     except curses.error:
                         pass
 
-                stdscr.refresh()
+                present(stdscr, screen="menu")
                 need_redraw = False
 
             changed = False
-            while True:
-                key = stdscr.getch()
-                if key == -1:
-                    break
+            for key in scheduler.keys():
                 changed = True
 
                 if key in (curses.KEY_UP, ord("k")):
@@ -94,7 +103,6 @@ class Menu:
                 elif key in (curses.KEY_LEFT, ord("h")):
                     curses.flash()
                 elif is_quit_request(key):
-                    stdscr.nodelay(False)
                     if key in (ord("q"), ord("Q")):
                         raise SystemExit
                     return
@@ -111,6 +119,8 @@ class Menu:
                                 part.sections[0].lessons,
                                 doc_mode=self.doc_mode,
                                 source_file=course.source_file,
+                                course=course,
+                                index=self.index,
                             )
                             sequencer.run(stdscr)
                         else:
@@ -118,7 +128,6 @@ class Menu:
                     else:
                         self.run_part_menu(stdscr, course)
 
-                    stdscr.nodelay(True)
                     curses.curs_set(0)
                     need_redraw = True
 
@@ -135,89 +144,13 @@ class Menu:
                             target_lesson,
                         ) = result
 
-                        found = False
-                        for course in self.courses:
-                            if course.name != target_course_name:
-                                continue
-
-                            # Case 1: Full hierarchy known — launch directly at section level
-                            if target_part and target_section:
-                                for part in course.parts:
-                                    if part.name != target_part:
-                                        continue
-                                    for section in part.sections:
-                                        if section.name != target_section:
-                                            continue
-                                        from .lesson_sequencer import LessonSequencer
-
-                                        sequencer = LessonSequencer(
-                                            f"{course.name}: {part.name}: {section.name}",
-                                            section.lessons,
-                                            doc_mode=True,
-                                            source_file=course.source_file,
-                                        )
-                                        sequencer.target_lesson_name = target_lesson
-                                        sequencer.run(stdscr)
-                                        found = True
-                                        break
-                                    if found:
-                                        break
-                                if found:
-                                    break
-
-                            # Case 2: Only part known — open part menu
-                            elif target_part:
-                                for part in course.parts:
-                                    if part.name != target_part:
-                                        continue
-                                    if (
-                                        len(part.sections) == 1
-                                        and part.sections[0].name == "Main"
-                                    ):
-                                        from .lesson_sequencer import LessonSequencer
-
-                                        sequencer = LessonSequencer(
-                                            f"{course.name}: {part.name}",
-                                            part.sections[0].lessons,
-                                            doc_mode=True,
-                                            source_file=course.source_file,
-                                        )
-                                        sequencer.target_lesson_name = target_lesson
-                                        sequencer.run(stdscr)
-                                    else:
-                                        self.run_section_menu(stdscr, course, part)
-                                    found = True
-                                    break
-                                if found:
-                                    break
-
-                            # Case 3: Only course — open course normally
-                            else:
-                                if (
-                                    len(course.parts) == 1
-                                    and course.parts[0].name == "Main"
-                                ):
-                                    part = course.parts[0]
-                                    if (
-                                        len(part.sections) == 1
-                                        and part.sections[0].name == "Main"
-                                    ):
-                                        from .lesson_sequencer import LessonSequencer
-
-                                        sequencer = LessonSequencer(
-                                            course.name,
-                                            part.sections[0].lessons,
-                                            doc_mode=True,
-                                            source_file=course.source_file,
-                                        )
-                                        sequencer.target_lesson_name = target_lesson
-                                        sequencer.run(stdscr)
-                                    else:
-                                        self.run_section_menu(stdscr, course, part)
-                                else:
-                                    self.run_part_menu(stdscr, course)
-                                found = True
-                                break
+                        self._open_bookmark(
+                            stdscr,
+                            target_course_name,
+                            target_part,
+                            target_section,
+                            target_lesson,
+                        )
 
                         # After doc mode ends, return to main menu
                         need_redraw = True
@@ -225,28 +158,150 @@ class Menu:
                     else:
                         need_redraw = True
 
+                elif key == ord("/"):
+                    self._run_search(stdscr)
+                    curses.curs_set(0)
+                    need_redraw = True
+
+                elif key == ord("f"):
+                    from .fuzzy_finder import FinderScreen
+
+                    item = FinderScreen(self.index.paths()).run(stdscr)
+                    if item:
+                        self._open_path(stdscr, item)
+                    curses.curs_set(0)
+                    need_redraw = True
+
                 elif is_quit_request(key):
-                    stdscr.nodelay(False)
                     return
 
             if changed:
                 need_redraw = True
 
+    def _run_search(self, stdscr):
+        from .search_index import SearchIndex
+        from .search_screen import SearchScreen
+
+        # Re-index only when the library changed since the last visit, e.g.
+        # a course re-parsed in doc mode; the rest of it is kept as is.
+        if self.search is None:
+            self.search = SearchIndex()
+        courses = self.courses
+        if courses != self._searched:
+            self._searched = courses
+            self.search.start(courses)
+
+        result = SearchScreen(self.search, self.index).run(stdscr)
+        if result:
+            entry, hit = result
+            self._open_hit(stdscr, entry, hit)
+
+    def _open_hit(self, stdscr, entry, hit):
+        from .lesson_sequencer import LessonSequencer
+
+        course, part, section = entry.course, entry.part, entry.section
+        sequencer = LessonSequencer(
+            sequencer_name(course, part, section),
+            section.lessons,
+            doc_mode=True,
+            source_file=course.source_file,
+            course=course,
+            index=self.index,
+        )
+        sequencer.target_lesson_name = entry.lesson.name
+        sequencer.target_cursor = (hit.line, hit.col)
+        sequencer.run(stdscr)
+
+    def _open_path(self, stdscr, item):
+        from .lesson_sequencer import LessonSequencer
+
+        course, part, section = item.course, item.part, item.section
+        if part is None:
+            if len(course.parts) > 1 or course.parts[0].name != "Main":
+                self.run_part_menu(stdscr, course)
+                return
+            part = course.parts[0]
+        if section is None:
+            if len(part.sections) > 1 or part.sections[0].name != "Main":
+                self.run_section_menu(stdscr, course, part)
+                return
+            section = part.sections[0]
+
+        sequencer = LessonSequencer(
+            sequencer_name(course, part, section),
+            section.lessons,
+            doc_mode=self.doc_mode,
+            source_file=course.source_file,
+            course=course,
+            index=self.index,
+        )
+        if item.lesson is not None:
+            sequencer.target_lesson_name = item.lesson.name
+        sequencer.run(stdscr)
+
+    def _open_bookmark(self, stdscr, course_name, part_name, section_name, lesson):
+        from .lesson_sequencer import LessonSequencer
+
+        course = self.index.course(course_name)
+        if course is None:
+            return
+
+        def launch(name, lessons):
+            sequencer = LessonSequencer(
+                name,
+                lessons,
+                doc_mode=True,
+                source_file=course.source_file,
+                course=course,
+                index=self.index,
+            )
+            sequencer.target_lesson_name = lesson
+            sequencer.run(stdscr)
+
+        # Case 1: Full hierarchy known — launch directly at section level
+        if part_name and section_name:
+            section = self.index.node(course_name, part_name, section_name)
+            if section is not None:
+                launch(f"{course.name}: {part_name}: {section_name}", section.lessons)
+
+        # Case 2: Only part known — open part menu
+        elif part_name:
+            part = self.index.node(course_name, part_name)
+            if part is None:
+                return
+            if len(part.sections) == 1 and part.sections[0].name == "Main":
+                launch(f"{course.name}: {part.name}", part.sections[0].lessons)
+            else:
+                self.run_section_menu(stdscr, course, part)
+
+        # Case 3: Only course — open course normally
+        elif len(course.parts) == 1 and course.parts[0].name == "Main":
+            part = course.parts[0]
+            if len(part.sections) == 1 and part.sections[0].name == "Main":
+                launch(course.name, part.sections[0].lessons)
+            else:
+                self.run_section_menu(stdscr, course, part)
+        else:
+            self.run_part_menu(stdscr, course)
+
     def run_part_menu(self, stdscr, course):
         curses.curs_set(0)
-        stdscr.nodelay(True)
+        scheduler = InputScheduler(stdscr)
 
         selected = 0
         need_redraw = True
 
         while True:
+            # An edit in doc mode re-parses the course into a new tree.
+            course = self.index.course(course.name) or course
             max_y, max_x = stdscr.getmaxyx()
             total_items = len(course.parts)
+            selected = min(selected, max(0, total_items - 1))
             menu_start_y = 2
             menu_width = max((len(f"> {p.name}") for p in course.parts), default=0)
 
             if need_redraw:
-                stdscr.clear()
+                stdscr.erase()
 
                 title = f"> {course.name}"
                 try:
@@ -278,14 +333,11 @@ class Menu:
                     except curses.error:
                         pass
 
-                stdscr.refresh()
+                present(stdscr, screen="menu")
                 need_redraw = False
 
             changed = False
-            while True:
-                key = stdscr.getch()
-                if key == -1:
-                    break
+            for key in scheduler.keys():
                 changed = True
 
                 if key in (curses.KEY_UP, ord("k")):
@@ -295,7 +347,6 @@ class Menu:
                 elif key in (curses.KEY_LEFT, ord("h")):
                     return
                 elif is_quit_request(key):
-                    stdscr.nodelay(False)
                     if key in (ord("q"), ord("Q")):
                         raise SystemExit
                     return
@@ -310,12 +361,13 @@ class Menu:
                             part.sections[0].lessons,
                             doc_mode=self.doc_mode,
                             source_file=course.source_file,
+                            course=course,
+                            index=self.index,
                         )
                         sequencer.run(stdscr)
                     else:
                         self.run_section_menu(stdscr, course, part)
 
-                    stdscr.nodelay(True)
                     curses.curs_set(0)
                     need_redraw = True
 
@@ -324,19 +376,25 @@ class Menu:
 
     def run_section_menu(self, stdscr, course, part):
         curses.curs_set(0)
-        stdscr.nodelay(True)
+        scheduler = InputScheduler(stdscr)
 
         selected = 0
         need_redraw = True
 
         while True:
+            # An edit in doc mode re-parses the course into a new tree.
+            course = self.index.course(course.name) or course
+            part = self.index.node(course.name, part.name)
+            if part is None:
+                return
             max_y, max_x = stdscr.getmaxyx()
             total_items = len(part.sections)
+            selected = min(selected, max(0, total_items - 1))
             menu_start_y = 2
             menu_width = max((len(f"> {s.name}") for s in part.sections), default=0)
 
             if need_redraw:
-                stdscr.clear()
+                stdscr.erase()
 
                 title = f"> {course.name} > {part.name}"
                 try:
@@ -368,14 +426,11 @@ class Menu:
                     except curses.error:
                         pass
 
-                stdscr.refresh()
+                present(stdscr, screen="menu")
                 need_redraw = False
 
             changed = False
-            while True:
-                key = stdscr.getch()
-                if key == -1:
-                    break
+            for key in scheduler.keys():
                 changed = True
 
                 if key in (curses.KEY_UP, ord("k")):
@@ -385,7 +440,6 @@ class Menu:
                 elif key in (curses.KEY_LEFT, ord("h")):
                     return
                 elif is_quit_request(key):
-                    stdscr.nodelay(False)
                     if key in (ord("q"), ord("Q")):
                         raise SystemExit
                     return
@@ -398,9 +452,10 @@ class Menu:
                         section.lessons,
                         doc_mode=self.doc_mode,
                         source_file=course.source_file,
+                        course=course,
+                        index=self.index,
                     )
                     sequencer.run(stdscr)
-                    stdscr.nodelay(True)
                     curses.curs_set(0)
                     need_redraw = True
 
@@ -0,0 +1,327 @@
+# ~/Apps/worship/modules/search_index.py
+"""Library-wide full-text search (the menu's `/` screen and `worship search`)."""
+
+import hashlib
+import heapq
+import os
+import pickle
+import re
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque, namedtuple
+from itertools import chain, islice, repeat
+from operator import lshift, or_
+from pathlib import Path
+
+from .course_cache import default_cache_dir
+from .course_parser import reload_course
+from .lesson_body import StaleStoreError
+from .library_index import LibraryIndex, path_text
+from .viewport import lesson_lines
+
+WORD = re.compile(r"\w+")
+
+# While typing, a last word shorter than this matches whole words only:
+# "t" or "th" would expand to much of the vocabulary on every keystroke.
+PREFIX_MIN = 3
+
+# Line sets of the most recently searched words, reused as a query grows.
+LINE_SETS = 8
+
+# One line containing the query; position counts lessons across the course
+# as in LessonEntry, line and col index the lesson rows DocMode shows.
+Hit = namedtuple("Hit", "course position line col")
+
+
+def terms(text):
+    """The normalised (case-folded) words of text, in order."""
+    return [word.casefold() for word in WORD.findall(text)]
+
+
+def index_course(course):
+    """
+    Postings of every word in course: word -> array of flattened
+    (position, line, col) triples, in reading order.
+    """
+    postings = {}
+    position = 0
+    for part in course.parts:
+        for section in part.sections:
+            for lesson in section.lessons:
+                # Read past the shared LRU: this runs on a background thread
+                # over every lesson and must not evict what the UI shows.
+                text = lesson.read(resident=False)
+                for i, line in enumerate(lesson_lines(text)):
+                    for m in WORD.finditer(line):
+                        word = m.group().casefold()
+                        triples = postings.get(word)
+                        if triples is None:
+                            triples = postings[word] = array("I")
+                        triples.extend((position, i, m.start()))
+                position += 1
+    return postings
+
+
+class SearchIndex:
+    """
+    Inverted index over every loaded course, one postings table per course.
+
+    Each table is pickled under the cache dir with its source file's mtime
+    and size, so update() re-indexes only the course files that changed
+    since they were last indexed (by this run or an earlier one) and costs
+    one stat per file otherwise. start() runs it on a daemon thread; tables
+    are swapped in whole, so searching while it runs sees the old or the
+    new library, never half of one.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir=None):
+        root = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.cache_dir = root / "search"
+        self.ready = threading.Event()
+        # (tables, order), swapped in one assignment so a search on another
+        # thread never pairs one update's tables with another's order.
+        # tables: course name -> (course, stamp, postings, vocabulary);
+        # order: their names in the order results are listed.
+        self._library = ({}, [])
+        self.errors = {}  # course name -> why update() left it out
+        self._line_sets = OrderedDict()  # (course, word, prefix) -> lines
+        self._lock = threading.Lock()
+        self._reloaded = deque()  # courses update() re-parsed, see reloaded()
+
+    def _entry_path(self, filepath):
+        key = hashlib.sha1(os.path.abspath(filepath).encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.pickle"
+
+    def _stamp(self, course):
+        if not course.source_file:
+            return None
+        try:
+            st = os.stat(course.source_file)
+        except OSError:
+            return None
+        return (os.path.abspath(course.source_file), st.st_mtime_ns, st.st_size)
+
+    def _load(self, course, stamp):
+        try:
+            with open(self._entry_path(stamp[0]), "rb") as f:
+                header = pickle.load(f)
+                if header != {
+                    "version": self.VERSION,
+                    "course": course.name,
+                    "stamp": stamp,
+                }:
+                    return None
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _store(self, course, stamp, postings):
+        header = {"version": self.VERSION, "course": course.name, "stamp": stamp}
+        tmp = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(postings, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._entry_path(stamp[0]))
+        except Exception:
+            # Without a writable cache the index is rebuilt next run.
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+    def update(self, courses):
+        """Bring the index in line with courses, re-indexing changed files."""
+        with self._lock:
+            tables, errors = {}, {}
+            for course in courses:
+                stamp = self._stamp(course)
+                known = self._library[0].get(course.name)
+                if known and known[0] is course and known[1] == stamp:
+                    tables[course.name] = known
+                    continue
+                if stamp is not None and known and known[1] == stamp:
+                    # Same file, re-parsed tree.
+                    tables.setdefault(course.name, (course, *known[1:]))
+                    continue
+                postings = self._load(course, stamp) if stamp is not None else None
+                if postings is None:
+                    try:
+                        course, stamp, postings = self._index(course, stamp)
+                    except Exception as e:
+                        # One unreadable course must not leave the rest of
+                        # the library unsearchable (or ready never set).
+                        errors[course.name] = f"{type(e).__name__}: {e}"
+                        continue
+                    if stamp is not None:
+                        self._store(course, stamp, postings)
+                tables.setdefault(
+                    course.name, (course, stamp, postings, sorted(postings))
+                )
+            self._library = (tables, sorted(tables, key=str.lower))
+            self.errors = errors
+            self.ready.set()
+
+    def _index(self, course, stamp):
+        try:
+            return course, stamp, index_course(course)
+        except StaleStoreError:
+            # Its file changed since it was parsed: index it as it is now,
+            # and hand the new tree to the UI.
+            course = reload_course(course)
+            postings = index_course(course)
+            self._reloaded.append(course)
+            return course, self._stamp(course), postings
+
+    def start(self, courses):
+        """
+        Run update(courses) in the background; ready is set when the first
+        update ends, and later ones keep serving the old tables meanwhile.
+        """
+        thread = threading.Thread(target=self.update, args=(list(courses),))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def reloaded(self):
+        """
+        The courses update() re-parsed since the last call. Hits follow
+        those trees, so a LibraryIndex resolving them must replace() them.
+        """
+        courses = []
+        while self._reloaded:
+            courses.append(self._reloaded.popleft())
+        return courses
+
+    def _words(self, vocabulary, word, prefix):
+        if not prefix:
+            return [word]
+        start = bisect_left(vocabulary, word)
+        end = bisect_left(vocabulary, word + "\U0010ffff", start)
+        return vocabulary[start:end]
+
+    def search(self, query, prefix=False, limit=None):
+        """
+        Every line containing all words of query, as Hits in course order
+        then reading order; col is where the first word first occurs. With
+        prefix, a last word of PREFIX_MIN or more characters also matches
+        longer words, as while typing. With limit, only the first limit
+        Hits are found.
+        """
+        words = list(dict.fromkeys(terms(query)))
+        if not words:
+            return []
+        (tables, order), hits = self._library, []
+        for name in order:
+            if limit is not None and len(hits) >= limit:
+                break
+            _, _, postings, vocabulary = tables[name]
+            matched = []  # (cache key, postings of every word it matches)
+            for n, word in enumerate(words):
+                expand = prefix and n == len(words) - 1 and len(word) >= PREFIX_MIN
+                found = [
+                    postings[match]
+                    for match in self._words(vocabulary, word, expand)
+                    if match in postings
+                ]
+                if not found:
+                    break
+                matched.append(((name, word, expand), found))
+            else:
+                wanted = None if limit is None else limit - len(hits)
+                course_hits = self._course_hits(name, postings, matched, wanted)
+                hits.extend(islice(course_hits, wanted))
+        return hits
+
+    def _line_set(self, postings, key, found):
+        # The lines a word is on, kept for the next keystrokes of a query.
+        cached = self._line_sets.get(key)
+        if cached is None or cached[0] is not postings:
+            cached = (postings, set(chain.from_iterable(map(_lines, found))))
+            self._line_sets[key] = cached
+            while len(self._line_sets) > LINE_SETS:
+                self._line_sets.popitem(last=False)
+        else:
+            self._line_sets.move_to_end(key)
+        return cached[1]
+
+    def _course_hits(self, name, postings, matched, limit=None):
+        if len(matched) == 1:
+            # One word: its postings merged in reading order, so a capped
+            # search stops as soon as it has enough lines.
+            streams = [zip(*[iter(triples)] * 3) for triples in matched[0][1]]
+            last = None
+            for position, line, col in heapq.merge(*streams):
+                if (position, line) != last:
+                    last = position, line
+                    yield Hit(name, position, line, col)
+            return
+        # Several: intersect their line sets (built in C, and kept while
+        # the query grows), then find the first word's col on each line.
+        # Only the last word is expanded, so the first has one array.
+        sets = [self._line_set(postings, key, found) for key, found in matched]
+        first = matched[0][1][0]
+        lines = set.intersection(*sorted(sets, key=len))
+        if limit is None:
+            lines = sorted(lines)
+        else:
+            lines = heapq.nsmallest(limit, lines)
+        for key in lines:
+            position, line = key >> 32, key & 0xFFFFFFFF
+            yield Hit(name, position, line, _first_col(first, key))
+
+
+def _lines(triples):
+    """position << 32 | line of each flattened triple, as one int each."""
+    return map(or_, map(lshift, triples[0::3], repeat(32)), triples[1::3])
+
+
+def _first_col(triples, key):
+    """The col of the first triple on line key (position << 32 | line)."""
+    lo, hi = 0, len(triples) // 3
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if triples[3 * mid] << 32 | triples[3 * mid + 1] < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return triples[3 * lo + 2]
+
+
+def hit_path(entry):
+    """The LessonEntry's "Course > Part > Section > Lesson" path."""
+    return path_text(entry.course, entry.part, entry.section, entry.lesson)
+
+
+def run_search(courses, query, out=print, cache_dir=None):
+    """Print every line matching query as path:line: text; 1 when none match."""
+
+    if not terms(query):
+        out("Usage: worship search <terms>")
+        return 1
+    index = SearchIndex(cache_dir)
+    index.update(courses)
+    library = LibraryIndex(courses)
+    for course in index.reloaded():
+        library.replace(course)
+    for name, error in index.errors.items():
+        out(f"Skipped {name}: {error}")
+    hits = index.search(query)
+    rows = {}  # lesson -> its rows, split once however many lines match
+    for hit in hits:
+        entry = library.at(hit.course, hit.position)
+        if entry.lesson not in rows:
+            rows[entry.lesson] = lesson_lines(entry.lesson.content)
+        text = rows[entry.lesson][hit.line].strip()
+        out(f"{hit_path(entry)}:{hit.line + 1}: {text}")
+    if not hits:
+        out(f"No match for '{query}'")
+        return 1
+    return 0
@@ -0,0 +1,153 @@
+# ~/Apps/worship/modules/search_screen.py
+import curses
+
+from .course_parser import CourseParseError, reload_course
+from .frame import present
+from .input_scheduler import InputScheduler
+from .lesson_body import StaleStoreError
+from .lesson_model import lesson_model
+from .search_index import hit_path
+
+ENTER_KEYS = (curses.KEY_ENTER, 10, 13)
+BACKSPACE_KEYS = (curses.KEY_BACKSPACE, 127, 8)
+
+
+class SearchScreen:
+    """
+    Search every course from one prompt. Results follow the query as it is
+    typed; while the index is still being built in the background the
+    screen says so and checks back every POLL_SEC.
+    """
+
+    POLL_SEC = 0.1
+    MAX_HITS = 500  # listed per query; the count then reads "500+"
+
+    def __init__(self, search, index):
+        self.search = search  # SearchIndex
+        self.index = index  # LibraryIndex resolving hits to lessons
+        self.query = ""
+        self.hits = []
+        self.selected = 0
+        self.top = 0
+
+    def _refresh_hits(self):
+        for course in self.search.reloaded():
+            self.index.replace(course)
+        self.hits = self.search.search(self.query, prefix=True, limit=self.MAX_HITS)
+        self.selected = 0
+        self.top = 0
+
+    def _hit_text(self, entry, hit):
+        try:
+            lines = lesson_model(entry.lesson).lines
+        except StaleStoreError:
+            # The file changed since the menu parsed it; the hits follow it
+            # as it is now, so re-parse to match them.
+            try:
+                self.index.replace(reload_course(entry.course))
+            except (OSError, CourseParseError):
+                return hit_path(entry)
+            entry = self.index.at(hit.course, hit.position)
+            if entry is None:
+                return ""
+            lines = lesson_model(entry.lesson).lines
+        text = lines[hit.line].strip() if hit.line < len(lines) else ""
+        return f"{hit_path(entry)}:{hit.line + 1}: {text}"
+
+    def _draw(self, stdscr):
+        stdscr.erase()
+        max_y, max_x = stdscr.getmaxyx()
+        height = max(0, max_y - 4)
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + height:
+            self.top = self.selected - height + 1
+
+        try:
+            stdscr.addstr(0, 0, "Search library"[:max_x], curses.color_pair(1))
+        except curses.error:
+            pass
+
+        for row, i in enumerate(
+            range(self.top, min(len(self.hits), self.top + height))
+        ):
+            hit = self.hits[i]
+            entry = self.index.at(hit.course, hit.position)
+            if entry is None:
+                continue
+            prefix = "> " if i == self.selected else "  "
+            attr = curses.color_pair(1) if i == self.selected else curses.color_pair(2)
+            try:
+                stdscr.addstr(
+                    3 + row, 0, (prefix + self._hit_text(entry, hit))[: max_x - 1], attr
+                )
+            except curses.error:
+                pass
+
+        if not self.search.ready.is_set():
+            status = "Indexing library..."
+        elif self.query.strip():
+            count = len(self.hits)
+            more = "+" if count >= self.MAX_HITS else ""
+            status = f"{count}{more} matches | Up/Down move | Enter open | Esc back"
+        else:
+            status = "Type words to find | Esc back"
+        if self.search.ready.is_set() and self.search.errors:
+            status += f" | {len(self.search.errors)} not indexed"
+        try:
+            stdscr.addstr(max_y - 1, 0, status[: max_x - 1], curses.color_pair(1))
+        except curses.error:
+            pass
+
+        prompt = f"/{self.query}"[-(max_x - 1) :] if max_x > 1 else ""
+        try:
+            stdscr.addstr(1, 0, prompt, curses.color_pair(2))
+        except curses.error:
+            pass
+        present(stdscr, screen="search")
+
+    def run(self, stdscr):
+        """Return (LessonEntry, Hit) of the chosen line, or None on Esc."""
+        scheduler = InputScheduler(stdscr)
+        curses.curs_set(1)
+        indexed = self.search.ready.is_set()
+        need_redraw = True
+
+        try:
+            while True:
+                if not indexed and self.search.ready.is_set():
+                    indexed = True
+                    self._refresh_hits()
+                    need_redraw = True
+                if not indexed:
+                    scheduler.schedule("index", self.POLL_SEC)
+
+                if need_redraw:
+                    self._draw(stdscr)
+                    need_redraw = False
+
+                query = self.query
+                for key in scheduler.keys():
+                    need_redraw = True
+                    if key == 27:  # Esc
+                        return None
+                    elif key in ENTER_KEYS:
+                        if self.hits:
+                            hit = self.hits[self.selected]
+                            entry = self.index.at(hit.course, hit.position)
+                            if entry is not None:
+                                return entry, hit
+                    elif key in (curses.KEY_DOWN, 14):  # Down / Ctrl+N
+                        if self.hits:
+                            self.selected = (self.selected + 1) % len(self.hits)
+                    elif key in (curses.KEY_UP, 16):  # Up / Ctrl+P
+                        if self.hits:
+                            self.selected = (self.selected - 1) % len(self.hits)
+                    elif key in BACKSPACE_KEYS:
+                        self.query = self.query[:-1]
+                    elif 32 <= key <= 126:
+                        self.query += chr(key)
+                if self.query != query and indexed:
+                    self._refresh_hits()
+        finally:
+            curses.curs_set(0)
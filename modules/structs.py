@@ -1,26 +1,79 @@
 # ~/Apps/rtutor/modules/structs.py
+import sys
 
 
-class Lesson:
-    def __init__(self, name, content):
-        self.name = name  # Lesson name, e.g., "Lesson1"
-        self.content = content  # Multiline string for typing practice
+class _Node:
+    """
+    Slotted, immutable base for the course tree. Fields are set once in
+    __init__; names are interned so the many repeated "Main" parts/sections
+    and lesson titles share one string.
+    """
 
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _set(self, name, value):
+        object.__setattr__(self, name, value)
+
+
+class Lesson(_Node):
+    __slots__ = ("name", "_content", "body", "__weakref__")
+
+    def __init__(self, name, content=None, body=None):
+        self._set("name", sys.intern(name))  # Lesson name, e.g., "Lesson1"
+        self._set("_content", content)  # Multiline string for typing practice
+        self._set("body", body)  # LessonBody read on demand when content is None
+
+    def __reduce__(self):
+        return Lesson, (self.name, self._content, self.body)
+
+    @property
+    def content(self):
+        return self.read()
+
+    def read(self, resident=True):
+        """The content; resident=False keeps a lazy body out of the LRU."""
+        if self._content is not None:
+            return self._content
+        return self.body.read(resident) if self.body else ""
+
+
+class Section(_Node):
+    __slots__ = ("name", "lessons")
 
-class Section:
     def __init__(self, name, lessons):
-        self.name = name  # Section name, e.g., "Section 1: Basics"
-        self.lessons = lessons  # List of Lesson objects
+        self._set("name", sys.intern(name))  # Section name, e.g., "Section 1: Basics"
+        self._set("lessons", tuple(lessons))  # Lesson objects
+
+    def __reduce__(self):
+        return Section, (self.name, self.lessons)
 
 
-class Part:
+class Part(_Node):
+    __slots__ = ("name", "sections")
+
     def __init__(self, name, sections):
-        self.name = name  # Part name, e.g., "Part IA: Chapter 1"
-        self.sections = sections  # List of Section objects
+        self._set("name", sys.intern(name))  # Part name, e.g., "Part IA: Chapter 1"
+        self._set("sections", tuple(sections))  # Section objects
+
+    def __reduce__(self):
+        return Part, (self.name, self.sections)
+
+
+class Course(_Node):
+    __slots__ = ("name", "parts", "source_file", "source_map")
 
+    def __init__(self, name, parts, source_file=None, source_map=None):
+        self._set("name", sys.intern(name))  # Course name, e.g., "Basic Typing"
+        self._set("parts", tuple(parts))  # Part objects
+        self._set("source_file", source_file)  # Path to the original .md file
+        # LessonSpan per lesson, in file order
+        self._set("source_map", tuple(source_map) if source_map is not None else None)
 
-class Course:
-    def __init__(self, name, parts, source_file=None):
-        self.name = name  # Course name, e.g., "Basic Typing"
-        self.parts = parts  # List of Part objects
-        self.source_file = source_file  # Path to the original .md file
+    def __reduce__(self):
+        return Course, (self.name, self.parts, self.source_file, self.source_map)
@@ -3,6 +3,11 @@
 import curses
 import sys
 from .boom import Boom
+from .input_scheduler import InputScheduler
+from .lesson_model import lesson_model
+from .typing_engine import TypingEngine
+from .typing_view import DirtyRows, draw_typing_line
+from .frame import present
 
 
 class TouchTypeMode:
@@ -12,7 +17,7 @@ class TouchTypeMode:
         self.current_idx = start_idx
 
     def run(self, stdscr):
-        stdscr.nodelay(True)
+        scheduler = InputScheduler(stdscr)
 
         def safe_curs_set(val):
             try:
@@ -24,24 +29,18 @@ class TouchTypeMode:
 
         while self.current_idx < len(self.lessons):
             lesson = self.lessons[self.current_idx]
-            stdscr.clear()
-            stdscr.refresh()
+            stdscr.erase()
             safe_curs_set(2)
-            lines = lesson.content.splitlines() or [""]
+            model = lesson_model(lesson)
+            lines = model.lines
             total_lines = len(lines)
-
-            processed_lines = []
-            is_skip = []
-            for line in lines:
-                non_tabs = [c for c in line if c != "\t"]
-                processed_lines.append(non_tabs)
-                is_skip.append(line.lstrip().startswith(("#!", "//!", "--!")))
+            targets = model.targets
 
             offset = 0
-            current_line = 0
-            user_inputs = [[] for _ in lines]
+            engine = TypingEngine(model)
             lesson_finished = False
             need_redraw = True
+            dirty = DirtyRows()
             completed = False
 
             while not completed:
@@ -55,7 +54,7 @@ class TouchTypeMode:
                 if total_lines > available_height:
                     visible_top = offset
                     visible_bottom = offset + available_height - 1
-                    current_visible_row = current_line - offset
+                    current_visible_row = engine.line - offset
 
                     scroll_trigger_row = int(available_height * 0.6)
 
@@ -63,10 +62,10 @@ class TouchTypeMode:
                         scroll_amount = current_visible_row - scroll_trigger_row
                         offset += scroll_amount
 
-                    lines_below = total_lines - 1 - current_line
+                    lines_below = total_lines - 1 - engine.line
                     if lines_below <= 20:
                         desired_offset = max(
-                            0, current_line - int(available_height * 0.3)
+                            0, engine.line - int(available_height * 0.3)
                         )
                         offset = max(offset, desired_offset)
 
@@ -79,102 +78,64 @@ class TouchTypeMode:
                 visible_range = range(start_idx, end_idx)
 
                 if need_redraw:
-                    # Title on two lines
-                    line1 = self.sequencer_name
-                    line2 = f"TOUCH_TYPE_MODE: {lesson.name}"
-                    try:
-                        stdscr.addstr(
-                            0, 0, line1[:max_x], curses.color_pair(1) | curses.A_BOLD
-                        )
-                        stdscr.addstr(
-                            1, 0, line2[:max_x], curses.color_pair(1) | curses.A_BOLD
-                        )
-                        stdscr.clrtoeol()
-                    except curses.error:
-                        pass
-
-                    # Empty line
-                    try:
-                        stdscr.move(2, 0)
-                        stdscr.clrtoeol()
-                    except curses.error:
-                        pass
-
-                    # Render visible lines
-                    for local_i, global_i in enumerate(visible_range):
-                        row = content_start_y + local_i
-                        line = lines[global_i]
-                        user_input = user_inputs[global_i]
-                        display_pos = 0
-                        input_pos = 0
-
-                        for char in line:
-                            if char == "\t":
-                                for _ in range(4):
-                                    try:
-                                        stdscr.addch(
-                                            row, display_pos, " ", curses.color_pair(1)
-                                        )
-                                    except:
-                                        pass
-                                    display_pos += 1
-                            else:
-                                ch = char
-                                if input_pos < len(user_input):
-                                    if (
-                                        input_pos < len(processed_lines[global_i])
-                                        and user_input[input_pos]
-                                        == processed_lines[global_i][input_pos]
-                                    ):
-                                        ch = user_input[input_pos]
-                                    else:
-                                        ch = "█"
-                                    input_pos += 1
-                                if ch == "\n":
-                                    ch = "↵"
-                                try:
-                                    stdscr.addch(
-                                        row, display_pos, ch, curses.color_pair(1)
-                                    )
-                                except:
-                                    pass
-                                display_pos += 1
-
-                        while input_pos < len(user_input):
-                            try:
-                                stdscr.addch(
-                                    row, display_pos, "█", curses.color_pair(1)
-                                )
-                            except:
-                                pass
-                            display_pos += 1
-                            input_pos += 1
+                    full = dirty.sync((offset, max_y, max_x))
+                    if full:
+                        # Title on two lines
+                        line1 = self.sequencer_name
+                        line2 = f"TOUCH_TYPE_MODE: {lesson.name}"
+                        try:
+                            stdscr.addstr(
+                                0,
+                                0,
+                                line1[:max_x],
+                                curses.color_pair(1) | curses.A_BOLD,
+                            )
+                            stdscr.addstr(
+                                1,
+                                0,
+                                line2[:max_x],
+                                curses.color_pair(1) | curses.A_BOLD,
+                            )
+                            stdscr.clrtoeol()
+                        except curses.error:
+                            pass
 
+                        # Empty line
                         try:
-                            stdscr.move(row, display_pos)
+                            stdscr.move(2, 0)
                             stdscr.clrtoeol()
-                        except:
+                        except curses.error:
                             pass
 
+                    # Render visible lines
+                    for local_i, global_i in enumerate(visible_range):
+                        if not dirty.needs(global_i):
+                            continue
+                        draw_typing_line(
+                            stdscr,
+                            content_start_y + local_i,
+                            lines[global_i],
+                            targets[global_i],
+                            engine.inputs[global_i],
+                            max_x,
+                        )
+
                     # Clear remaining lines below content to footer
                     content_end_row = content_start_y + (end_idx - start_idx)
                     clear_start = content_end_row
                     clear_end = max_y - footer_rows
 
-                    for r in range(clear_start, clear_end):
-                        try:
-                            stdscr.move(r, 0)
-                            stdscr.clrtoeol()
-                        except curses.error:
-                            pass
+                    if full:
+                        for r in range(clear_start, clear_end):
+                            try:
+                                stdscr.move(r, 0)
+                                stdscr.clrtoeol()
+                            except curses.error:
+                                pass
 
                     # Stats
-                    typed = sum(
-                        len(ui) for i, ui in enumerate(user_inputs) if not is_skip[i]
-                    )
-                    total = sum(
-                        len(p) for i, p in enumerate(processed_lines) if not is_skip[i]
-                    )
+                    typed = engine.typed
+                    total = model.total_chars
                     stats = f"Typed {typed}/{total} chars"
 
                     scroll_info = ""
@@ -204,19 +165,11 @@ class TouchTypeMode:
 
                     # Cursor
                     if not lesson_finished:
-                        cursor_row = content_start_y + (current_line - offset)
-                        cursor_col = 0
-                        input_pos = 0
-                        for char in lines[current_line]:
-                            if char == "\t":
-                                cursor_col += 4
-                            else:
-                                if input_pos < len(user_inputs[current_line]):
-                                    input_pos += 1
-                                    cursor_col += 1
-                                else:
-                                    break
-                        cursor_col += len(user_inputs[current_line]) - input_pos
+                        cursor_row = content_start_y + (engine.line - offset)
+                        cols = model.target_cols(engine.line)
+                        typed_here = len(engine.inputs[engine.line])
+                        cursor_col = cols[min(typed_here, len(cols) - 1)]
+                        cursor_col += max(0, typed_here - (len(cols) - 1))
                         safe_curs_set(2)
                         try:
                             stdscr.move(cursor_row, cursor_col)
@@ -225,16 +178,15 @@ class TouchTypeMode:
                     else:
                         safe_curs_set(0)
 
-                    stdscr.refresh()
+                    present(stdscr, screen="touch")
                     need_redraw = False
+                    dirty.clean()
 
                 # Input handling
                 changed = False
-                while True:
-                    key = stdscr.getch()
-                    if key == -1:
-                        break
+                for key in scheduler.keys():
                     changed = True
+                    dirty.mark(engine.line)
 
                     if key == 3:  # Ctrl+C
                         sys.exit(0)
@@ -255,48 +207,16 @@ class TouchTypeMode:
                             raise SystemExit
                     else:
                         if key == 18:  # Ctrl+R
-                            user_inputs = [[] for _ in lines]
-                            current_line = 0
+                            dirty.mark_all()
+                            engine.reset()
                             lesson_finished = False
-                        elif is_skip[current_line]:
-                            if key in (curses.KEY_ENTER, 10, 13):
-                                if current_line < total_lines - 1:
-                                    current_line += 1
                         else:
-                            if key in (curses.KEY_BACKSPACE, 127, 8):
-                                if user_inputs[current_line]:
-                                    user_inputs[current_line].pop()
-                            elif key in (curses.KEY_ENTER, 10, 13):
-                                if (
-                                    user_inputs[current_line]
-                                    == processed_lines[current_line]
-                                ):
-                                    if current_line < total_lines - 1:
-                                        current_line += 1
-                            elif key == 9:  # Tab
-                                cur_len = len(user_inputs[current_line])
-                                req_len = len(processed_lines[current_line])
-                                if cur_len < req_len:
-                                    remaining = "".join(
-                                        processed_lines[current_line][cur_len:]
-                                    )
-                                    if remaining.startswith("    "):
-                                        user_inputs[current_line].extend(
-                                            [" ", " ", " ", " "]
-                                        )
-                            else:
-                                if 32 <= key <= 126:
-                                    ch = chr(key)
-                                    if len(user_inputs[current_line]) < len(
-                                        processed_lines[current_line]
-                                    ):
-                                        user_inputs[current_line].append(ch)
+                            engine.press(key)
+
+                dirty.mark(engine.line)
 
                 # Check completion
-                if all(
-                    is_skip[i] or user_inputs[i] == processed_lines[i]
-                    for i in range(total_lines)
-                ):
+                if engine.finished:
                     lesson_finished = True
                     changed = True
 
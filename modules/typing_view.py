@@ -0,0 +1,46 @@
+# ~/Apps/worship/modules/typing_view.py
+import curses
+
+from .line_renderer import draw_runs, typed_text
+
+
+class DirtyRows:
+    """
+    Which lesson lines the typing screens must repaint on the next frame.
+
+    A keystroke only ever touches the line under the cursor (and the one it
+    moves to), so the modes mark those and leave every other row as curses
+    already has it. The whole viewport is repainted only when the scroll
+    offset or the terminal size changed, or when a mode asks for it.
+    """
+
+    def __init__(self):
+        self.full = True
+        self.rows = set()
+        self._viewport = None
+
+    def mark(self, line):
+        self.rows.add(line)
+
+    def mark_all(self):
+        self.full = True
+
+    def sync(self, viewport):
+        """Note the (offset, height, width) being drawn; True means repaint all."""
+        if viewport != self._viewport:
+            self._viewport = viewport
+            self.full = True
+        return self.full
+
+    def needs(self, line):
+        return self.full or line in self.rows
+
+    def clean(self):
+        self.full = False
+        self.rows.clear()
+
+
+def draw_typing_line(stdscr, row, line, target, user_input, width):
+    """Paint one lesson line with the user's progress typed over it."""
+    text = typed_text(line, target, user_input)
+    draw_runs(stdscr, row, ((text, 0),), width, curses.color_pair(1))
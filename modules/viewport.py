@@ -0,0 +1,55 @@
+# ~/Apps/worship/modules/viewport.py
+import curses
+
+# Blank rows laid out under a lesson's last line so it can be scrolled up
+# away from the status lines at the bottom of the screen.
+PADDING_ROWS = 7
+
+
+def lesson_lines(content):
+    """Split lesson content into the rows the typing and doc views show."""
+    return (content + "\n" * PADDING_ROWS).splitlines()
+
+
+class ScrollingBody:
+    """
+    The lesson rows between a screen's header and footer. It remembers what
+    the last frame showed, so when only the scroll offset moved the rows
+    already on screen are shifted with the terminal's scrolling region and
+    only the rows scrolled into view need painting.
+    """
+
+    def __init__(self):
+        self._shown = None  # (frame, offset) of the last frame painted
+
+    def invalidate(self):
+        """Forget the screen contents, e.g. after another screen drew over it."""
+        self._shown = None
+
+    def rows_to_paint(self, stdscr, top, height, frame, offset):
+        """
+        Scroll the body if that is all this frame needs and return the body
+        rows (0-based) left to paint. frame is any value describing what the
+        rows show apart from the offset; when it differs from the previous
+        frame's, None is returned and the caller repaints the whole screen.
+        """
+        last = self._shown
+        self._shown = (frame, offset)
+        if last is None or last[0] != frame or height <= 0:
+            return None
+        shift = offset - last[1]
+        if shift == 0:
+            return range(0)
+        if abs(shift) >= height:
+            return range(height)
+        try:
+            stdscr.setscrreg(top, top + height - 1)
+            stdscr.scrollok(True)
+            stdscr.scroll(shift)
+        except curses.error:
+            return range(height)
+        finally:
+            stdscr.scrollok(False)
+        if shift > 0:
+            return range(height - shift, height)
+        return range(-shift)
@@ -0,0 +1,77 @@
+# ~/Apps/worship/modules/wrap_layout.py
+from bisect import bisect_right
+from itertools import accumulate
+
+
+def row_starts(line, cols, width):
+    """
+    Character indices where the soft-wrapped rows of line begin. Rows break
+    after the last space that fits in width columns (a space landing on the
+    break hangs off the end of its row), or mid-word when a word is wider
+    than the pane.
+    """
+    starts = [0]
+    start = 0
+    n = len(line)
+    while cols[n] - cols[start] > width:
+        end = bisect_right(cols, cols[start] + width, start, n + 1) - 1
+        if end <= start:
+            end = start + 1  # a tab wider than the pane still gets a row
+        elif line[end] == " ":
+            end += 1
+        else:
+            space = line.rfind(" ", start, end)
+            if space > start:
+                end = space + 1
+        if end >= n:
+            break
+        starts.append(end)
+        start = end
+    return starts
+
+
+class WrapLayout:
+    """
+    The rows a LessonModel occupies when soft-wrapped at one pane width.
+
+    Lines no wider than the pane are a single row and cost one comparison
+    against the model's cached row widths; only wider lines are broken up,
+    so laying out a long lesson again after a resize stays cheap.
+    """
+
+    def __init__(self, model, width):
+        self.model = model
+        self.width = max(1, width)
+        self._starts = {}  # line -> row_starts() for lines wider than the pane
+        counts = []
+        for i, line_width in enumerate(model.widths()):
+            if line_width <= self.width:
+                counts.append(1)
+            else:
+                starts = row_starts(model.lines[i], model.display_cols(i), self.width)
+                self._starts[i] = starts
+                counts.append(len(starts))
+        self.first_row = list(accumulate(counts, initial=0))
+
+    @property
+    def total_rows(self):
+        return self.first_row[-1]
+
+    def starts(self, line):
+        return self._starts.get(line, (0,))
+
+    def row_of(self, line, col):
+        """Visual row showing character col of line (its end counts as the last row)."""
+        starts = self.starts(line)
+        return self.first_row[line] + bisect_right(starts, col) - 1
+
+    def locate(self, row):
+        """(line, k): visual row is the k-th row of line."""
+        line = bisect_right(self.first_row, row) - 1
+        return line, row - self.first_row[line]
+
+    def span(self, line, k):
+        """(start, end) characters of the k-th row of line; end is exclusive."""
+        starts = self.starts(line)
+        end = starts[k + 1] if k + 1 < len(starts) else len(self.model.lines[line])
+        return starts[k], end
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+for path in (ROOT, ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from bench_suite import compare
+from corpus import parse_size, write_course
+from modules.course_parser import CourseParser
+
+
+@pytest.mark.parametrize(
+    "style, part, section",
+    [
+        ("flat", "Main", "Main"),
+        ("mid", "Part 1", "Main"),
+        ("full", "Part 1", "Section 1"),
+    ],
+)
+def test_generated_courses_parse_in_their_style(tmp_path, style, part, section):
+    path = tmp_path / "course.md"
+    lessons = write_course(path, style, parse_size("64KB"))
+
+    course = CourseParser(tmp_path)._parse_md_file(str(path))
+
+    assert path.stat().st_size >= 64 * 1024
+    assert sum(len(s.lessons) for p in course.parts for s in p.sections) == lessons
+    assert course.parts[0].name == part
+    assert course.parts[0].sections[0].name == section
+
+
+def test_compare_flags_cases_past_the_threshold():
+    baseline = {"results": [{"case": "a", "best_s": 1.0, "peak_bytes": 100}]}
+    results = [{"case": "a", "best_s": 1.05, "peak_bytes": 130}]
+
+    assert compare(results, baseline, 0.10) == ["a: peak_bytes 100 -> 130 (+30%)"]
+    assert compare(results, baseline, 0.50) == []
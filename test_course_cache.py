@@ -0,0 +1,110 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.course_cache import CourseCache
+from modules.course_parser import CourseParser
+
+COURSE = """# Cached
+
+## Lesson 1
+
+    In the beginning
+"""
+
+
+def _counting_parser(courses_dir, cache, monkeypatch):
+    parser = CourseParser(courses_dir, cache=cache)
+    calls = []
+    original = parser._parse_md_file
+
+    def counting(filepath):
+        calls.append(filepath)
+        return original(filepath)
+
+    monkeypatch.setattr(parser, "_parse_md_file", counting)
+    return parser, calls
+
+
+def test_unchanged_file_is_served_from_cache(tmp_path, monkeypatch):
+    courses = tmp_path / "courses"
+    courses.mkdir()
+    (courses / "cached.md").write_text(COURSE, encoding="utf-8")
+    cache = CourseCache(tmp_path / "cache")
+
+    parser, calls = _counting_parser(courses, cache, monkeypatch)
+    first = parser.parse_courses()
+    second = parser.parse_courses()
+
+    assert len(calls) == 1
+    assert [c.name for c in second] == [c.name for c in first] == ["Cached"]
+    assert second[0].parts[0].sections[0].lessons[0].name == "Lesson 1"
+
+
+def test_touched_file_with_same_content_is_not_reparsed(tmp_path, monkeypatch):
+    courses = tmp_path / "courses"
+    courses.mkdir()
+    path = courses / "cached.md"
+    path.write_text(COURSE, encoding="utf-8")
+    cache = CourseCache(tmp_path / "cache")
+
+    parser, calls = _counting_parser(courses, cache, monkeypatch)
+    parser.parse_courses()
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    parser.parse_courses()
+    parser.parse_courses()
+
+    assert len(calls) == 1
+
+
+def test_changed_content_is_reparsed(tmp_path, monkeypatch):
+    courses = tmp_path / "courses"
+    courses.mkdir()
+    path = courses / "cached.md"
+    path.write_text(COURSE, encoding="utf-8")
+    cache = CourseCache(tmp_path / "cache")
+
+    parser, calls = _counting_parser(courses, cache, monkeypatch)
+    parser.parse_courses()
+    path.write_text(COURSE.replace("Cached", "Edited"), encoding="utf-8")
+    courses_after = parser.parse_courses()
+
+    assert len(calls) == 2
+    assert courses_after[0].name == "Edited"
+
+
+def test_lazy_courses_round_trip_through_cache(tmp_path):
+    courses = tmp_path / "courses"
+    courses.mkdir()
+    (courses / "cached.md").write_text(COURSE, encoding="utf-8")
+    cache = CourseCache(tmp_path / "cache")
+
+    CourseParser(courses, cache=cache, lazy=True).parse_courses()
+    (course,) = CourseParser(courses, cache=cache, lazy=True).parse_courses()
+
+    lesson = course.parts[0].sections[0].lessons[0]
+    assert lesson.body is not None
+    assert lesson.content == "In the beginning"
+
+
+def test_touched_file_still_reads_from_lazy_cache(tmp_path):
+    courses = tmp_path / "courses"
+    courses.mkdir()
+    path = courses / "cached.md"
+    path.write_text(COURSE, encoding="utf-8")
+    cache = CourseCache(tmp_path / "cache")
+
+    CourseParser(courses, cache=cache, lazy=True).parse_courses()
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    # Once re-stamped by the digest check, then straight off the header.
+    for _ in range(2):
+        (course,) = CourseParser(courses, cache=cache, lazy=True).parse_courses()
+        lesson = course.parts[0].sections[0].lessons[0]
+        assert lesson.read(resident=False) == "In the beginning"
@@ -0,0 +1,55 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import modules.course_check as course_check
+from modules.course_check import check_file, run_check
+
+
+def _write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_problems_carry_line_numbers(tmp_path):
+    path = _write(
+        tmp_path,
+        "a.md",
+        "# A\n## P\n### S\n#### L\n    ok\n#### Empty\nprose\n### S2\n",
+    )
+    assert check_file(path) == (
+        path,
+        [],
+        [(6, "lesson has no indented lines"), (8, "section has no lessons")],
+    )
+
+    path = _write(tmp_path, "b.md", "# B\n## P\n#### L\n    x\n### S\n")
+    assert check_file(path)[1] == [(3, "lesson without section")]
+
+
+def test_run_check_reports_and_fails_on_errors(tmp_path):
+    _write(tmp_path, "good.md", "# Good\n## One\n    x\n")
+    bad = _write(tmp_path, "bad.md", "# Bad\n## One\n    x\n# Again\n")
+    lines = []
+
+    assert run_check([str(tmp_path)], out=lines.append) == 1
+    assert lines == [
+        f"{bad}:4: error: multiple course names",
+        "2 files checked: 1 errors, 0 warnings",
+    ]
+    assert run_check([str(ROOT / "courses")], out=lines.append) == 0
+
+
+def test_parallel_check_keeps_file_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(course_check, "available_cpus", lambda: 2)
+    monkeypatch.setattr(course_check, "PARALLEL_MIN_FILES", 2)
+    paths = [_write(tmp_path, f"c{i}.md", f"# C{i}\n## L\n    x\n") for i in range(5)]
+
+    results = course_check.check_files(paths)
+
+    assert [r[0] for r in results] == paths
+    assert all(r[1] == [] and r[2] == [] for r in results)
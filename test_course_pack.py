@@ -0,0 +1,141 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import main as worship_main
+from modules import course_pack
+from modules.course_pack import PackError, compile_courses, load_pack
+from modules.course_parser import CourseParser, reload_course
+from modules.lesson_body import StaleStoreError
+
+
+def _tree(courses):
+    return [
+        (
+            c.name,
+            [
+                (
+                    p.name,
+                    [
+                        (s.name, [(l.name, l.content) for l in s.lessons])
+                        for s in p.sections
+                    ],
+                )
+                for p in c.parts
+            ],
+        )
+        for c in courses
+    ]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_pack_round_trips_bundled_courses(tmp_path, compress):
+    pack = tmp_path / "courses.pack"
+    compile_courses(ROOT / "courses", pack, compress=compress)
+
+    courses = load_pack(pack, ROOT / "courses")
+
+    assert _tree(courses) == _tree(CourseParser(ROOT / "courses").parse_courses())
+    assert courses[0].source_file == str(ROOT / "courses" / "anchor.md")
+    assert courses[0].parts[0].sections[0].lessons[0].body is not None
+
+
+def test_pack_is_stale_once_a_source_changes(tmp_path):
+    courses_dir = tmp_path / "courses"
+    courses_dir.mkdir()
+    course = courses_dir / "a.md"
+    course.write_text("# A\n## One\n    x\n", encoding="utf-8")
+    pack = tmp_path / "courses.pack"
+    compile_courses(courses_dir, pack)
+    assert load_pack(pack, courses_dir) is not None
+
+    (courses_dir / "b.md").write_text("# B\n## Two\n    y\n", encoding="utf-8")
+    assert load_pack(pack, courses_dir) is None
+
+    os.unlink(courses_dir / "b.md")
+    course.write_text("# A\n## One\n    changed\n", encoding="utf-8")
+    assert load_pack(pack, courses_dir) is None
+
+
+def test_stale_or_corrupt_pack_closes_its_map(tmp_path, monkeypatch):
+    courses_dir = tmp_path / "courses"
+    courses_dir.mkdir()
+    (courses_dir / "a.md").write_text("# A\n## One\n    x\n", encoding="utf-8")
+    pack = tmp_path / "courses.pack"
+    compile_courses(courses_dir, pack)
+    stores = []
+
+    class PackStore(course_pack.PackStore):
+        def __init__(self, *args):
+            super().__init__(*args)
+            stores.append(self)
+
+    monkeypatch.setattr(course_pack, "PackStore", PackStore)
+    (courses_dir / "b.md").write_text("# B\n## Two\n    y\n", encoding="utf-8")
+    assert load_pack(pack, courses_dir) is None
+    pack.write_bytes(pack.read_bytes()[:-4])
+    with pytest.raises(PackError):
+        load_pack(pack)
+
+    assert len(stores) == 2 and all(store._map is None for store in stores)
+
+
+def test_recompiled_pack_is_stale_for_courses_loaded_before(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    courses_dir = tmp_path / "courses"
+    courses_dir.mkdir()
+    source = courses_dir / "a.md"
+    source.write_text("# A\n## One\n    x\n", encoding="utf-8")
+    pack = tmp_path / "courses.pack"
+    compile_courses(courses_dir, pack)
+    (course,) = load_pack(pack, courses_dir)
+
+    source.write_text("# A\n## One\n    longer\n", encoding="utf-8")
+    compile_courses(courses_dir, pack)
+    lesson = course.parts[0].sections[0].lessons[0]
+    with pytest.raises(StaleStoreError):
+        lesson.read(resident=False)
+    assert reload_course(course).parts[0].sections[0].lessons[0].content == "longer"
+
+
+def test_not_a_pack_is_rejected(tmp_path):
+    bogus = tmp_path / "courses.pack"
+    bogus.write_bytes(b"# just markdown\n" * 8)
+    with pytest.raises(PackError):
+        load_pack(bogus)
+
+
+def test_corrupt_packs_raise_pack_error_only(tmp_path):
+    courses_dir = tmp_path / "courses"
+    courses_dir.mkdir()
+    (courses_dir / "a.md").write_text("# A\n## P\n### One\n    x\n", encoding="utf-8")
+    pack = tmp_path / "courses.pack"
+    compile_courses(courses_dir, pack)
+    good = pack.read_bytes()
+
+    # Every byte of the header and tables, set to values that break offsets,
+    # counts, kinds and UTF-8 in turn; bodies are only read on demand.
+    for i in range(len(good)):
+        for value in (0x00, 0x7F, 0xFF):
+            pack.write_bytes(good[:i] + bytes([value]) + good[i + 1 :])
+            try:
+                load_pack(pack)
+            except PackError:
+                pass
+
+
+def test_compile_subcommand_writes_pack(tmp_path, capsys):
+    pack = tmp_path / "out.pack"
+    rc = worship_main._compile(
+        [str(ROOT / "courses"), "-o", str(pack), "-z"], "unused", "unused"
+    )
+
+    assert rc == 0
+    assert "Packed 2 courses" in capsys.readouterr().out
+    assert [c.name for c in load_pack(pack)] == ["Oil", "X"]
@@ -0,0 +1,177 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.course_parser import CourseParseError, CourseParser
+from modules.lesson_body import (
+    DEFAULT_MAX_RESIDENT,
+    RESIDENT,
+    ResidentBodies,
+    StaleStoreError,
+)
+
+
+def _parse(text, tmp_path):
+    parser = CourseParser(tmp_path)
+    return parser._parse_stream(io.BytesIO(text.encode()), "course.md")
+
+
+def _shape(course):
+    return [
+        (p.name, [(s.name, [l.name for l in s.lessons]) for s in p.sections])
+        for p in course.parts
+    ]
+
+
+def test_flat_hierarchy(tmp_path):
+    course = _parse("# Flat\n\n## One\n\n    a\n\n## Two\n\n\tb\n", tmp_path)
+    assert course.name == "Flat"
+    assert _shape(course) == [("Main", [("Main", ["One", "Two"])])]
+    assert course.parts[0].sections[0].lessons[1].content == "b"
+
+
+def test_mid_hierarchy(tmp_path):
+    course = _parse("# Mid\n## P1\n### L1\n    a\n## P2\n### L2\n    b\n", tmp_path)
+    assert _shape(course) == [("P1", [("Main", ["L1"])]), ("P2", [("Main", ["L2"])])]
+
+
+def test_full_hierarchy_keeps_code_block_blank_lines(tmp_path):
+    text = "# Full\n## P\n### S\n#### L\n    a\n\n    b\nprose\n\n    c\n"
+    course = _parse(text, tmp_path)
+    assert _shape(course) == [("P", [("S", ["L"])])]
+    assert course.parts[0].sections[0].lessons[0].content == "a\n\nb\nc"
+
+
+def test_lessons_without_content_are_dropped(tmp_path):
+    course = _parse("# Flat\n## Empty\nprose only\n## Full\n    x\n", tmp_path)
+    assert _shape(course) == [("Main", [("Main", ["Full"])])]
+
+
+@pytest.mark.parametrize(
+    "text, lineno, reason",
+    [
+        ("# A\n## L\n    x\n# B\n", 4, "multiple course names"),
+        ("# A\n### S\n#### L\n    x\n", 2, "section without part"),
+        ("# A\n## P\n#### L\n    x\n### S\n", 3, "lesson without section"),
+        ("# A\n### L\n    x\n## P\n", 2, "lesson without part"),
+        ("## L\n    x\n", None, "missing '# ' course title"),
+    ],
+)
+def test_structural_errors_report_line(tmp_path, text, lineno, reason):
+    with pytest.raises(CourseParseError) as excinfo:
+        _parse(text, tmp_path)
+    assert excinfo.value.lineno == lineno
+    assert excinfo.value.reason == reason
+
+
+def test_bundled_courses_parse():
+    courses = CourseParser(ROOT / "courses").parse_courses()
+    assert {c.name for c in courses} >= {"Oil", "X"}
+
+
+def test_lazy_mode_reads_bodies_on_demand_with_lru_bound(tmp_path):
+    path = tmp_path / "lazy.md"
+    lessons = "".join(f"#### L{i}\n\n    verse {i}\n\n    amen\n" for i in range(6))
+    path.write_text(f"# Lazy\n## P\n### S\n{lessons}", encoding="utf-8")
+
+    eager = CourseParser(tmp_path)._parse_md_file(str(path))
+    lazy = CourseParser(tmp_path, lazy=True, max_resident_lessons=2)._parse_md_file(
+        str(path)
+    )
+    try:
+        lazy_lessons = lazy.parts[0].sections[0].lessons
+        assert all(lesson.body is not None for lesson in lazy_lessons)
+        assert [l.content for l in lazy_lessons] == [
+            l.content for l in eager.parts[0].sections[0].lessons
+        ]
+        assert len(RESIDENT) == 2
+    finally:
+        RESIDENT.resize(DEFAULT_MAX_RESIDENT)
+
+
+def test_parallel_parse_matches_serial_order(tmp_path, monkeypatch):
+    import modules.course_parser as course_parser
+
+    for i in range(5):
+        (tmp_path / f"c{i}.md").write_text(
+            f"# Course {i}\n## Lesson\n    line {i}\n", encoding="utf-8"
+        )
+    serial = CourseParser(tmp_path).parse_courses()
+
+    monkeypatch.setattr(course_parser, "available_cpus", lambda: 2)
+    monkeypatch.setattr(course_parser, "PARALLEL_MIN_FILES", 2)
+    parallel = CourseParser(tmp_path, lazy=True).parse_courses()
+
+    assert [c.name for c in parallel] == [c.name for c in serial]
+    assert [c.name for c in serial] == [f"Course {i}" for i in range(5)]
+    assert parallel[3].parts[0].sections[0].lessons[0].content.startswith("line 3")
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_reparse_keeps_unchanged_lessons(tmp_path, lazy):
+    path = tmp_path / "edit.md"
+    lessons = "".join(f"#### L{i}\n\n    verse {i}\n" for i in range(4))
+    path.write_text(f"# Edit\n## P\n### S\n{lessons}", encoding="utf-8")
+    parser = CourseParser(tmp_path, lazy=lazy)
+    course = parser._parse_md_file(str(path))
+    before = course.parts[0].sections[0].lessons
+
+    text = path.read_text(encoding="utf-8")
+    path.write_text(text.replace("verse 1", "verse one, longer"), encoding="utf-8")
+    after = parser.reparse(course).parts[0].sections[0].lessons
+    fresh = CourseParser(tmp_path)._parse_md_file(str(path))
+
+    assert [after[i] is before[i] for i in range(4)] == [True, False, True, True]
+    assert [l.content for l in after] == [
+        l.content for l in fresh.parts[0].sections[0].lessons
+    ]
+
+
+def test_changed_file_is_never_sliced_with_old_offsets(tmp_path):
+    path = tmp_path / "stale.md"
+    path.write_text("# Stale\n## One\n    alpha\n## Two\n    beta\n", encoding="utf-8")
+    parser = CourseParser(tmp_path, lazy=True)
+    course = parser._parse_md_file(str(path))
+    old_one, old_two = course.parts[0].sections[0].lessons
+
+    path.write_text(
+        "# Stale\n## One\n    alpha line two, now longer\n## Two\n    beta\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(StaleStoreError):
+        old_one.content
+
+    new_one, new_two = parser.reparse(course).parts[0].sections[0].lessons
+    assert new_one.content == "alpha line two, now longer"
+    assert new_two is old_two and old_two.content == "beta"
+    with pytest.raises(StaleStoreError):
+        old_one.content
+
+
+def test_resident_bodies_survive_readers_on_two_threads():
+    import threading
+
+    resident = ResidentBodies(max_resident=4)
+    errors = []
+
+    def churn(offset):
+        try:
+            for i in range(20000):
+                key = (offset, i % 9)
+                if resident.get(key) is None:
+                    resident.put(key, "body")
+        except Exception as e:  # e.g. KeyError from an unlocked move_to_end
+            errors.append(e)
+
+    threads = [threading.Thread(target=churn, args=(n,)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and len(resident) == 4
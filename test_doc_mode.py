@@ -0,0 +1,283 @@
+import curses
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.bookmarks import Bookmarks
+from modules.course_parser import CourseParser
+from modules.doc_mode import MATCH_ATTR, DocMode
+from modules.input_scheduler import InputScheduler
+from modules.lesson_model import LessonModel
+from modules.lesson_sequencer import LessonSequencer
+from modules.library_index import LibraryIndex
+from modules.structs import Course, Lesson, Part, Section
+
+
+class Sequencer:
+    def __init__(self, *contents):
+        self.name = "Course"
+        self.lessons = [Lesson(f"L{i}", text) for i, text in enumerate(contents)]
+        self.source_file = None
+        self.course = None
+        self.index = LibraryIndex([])
+
+
+@pytest.fixture
+def doc(tmp_path, monkeypatch):
+    monkeypatch.setattr(Bookmarks, "BOOKMARKS_FILE", tmp_path / "bookmarks.conf")
+
+    def make(content):
+        mode = DocMode(Sequencer(content))
+        mode.model = LessonModel(content)
+        mode.layout = mode.model.layout(80)
+        return mode
+
+    return make
+
+
+def _walk_to_desired(line, desired):
+    # The column rule DocMode has always used, one character at a time.
+    display = col = 0
+    for i, ch in enumerate(line):
+        if display > desired:
+            break
+        col = i
+        display += 4 if ch == "\t" else 1
+    else:
+        col = len(line)
+    return col
+
+
+def test_set_col_to_desired_matches_character_walk(doc):
+    rng = random.Random(3)
+    rows = [
+        "".join(rng.choice("ab\t ") for _ in range(rng.randrange(12)))
+        for _ in range(60)
+    ]
+    mode = doc("\n".join(rows))
+
+    for i, row in enumerate(rows):
+        for desired in range(0, 30):
+            mode.desired_display_col = desired
+            mode.set_col_to_desired(i)
+            assert mode.cursor_col == _walk_to_desired(row, desired)
+            assert mode.desired_display_col == mode.get_display_col(i, mode.cursor_col)
+
+
+def test_half_page_motion_jumps_straight_to_target_row(doc):
+    mode = doc("\n".join(f"\tverse {i}" for i in range(100)))
+    lines = mode.model.lines
+    mode.desired_display_col = 6
+
+    mode.move_down(lines, len(lines), 40)
+    assert (mode.cursor_line, mode.cursor_col) == (40, 3)
+    mode.move_down(lines, len(lines), 500)
+    assert mode.cursor_line == len(lines) - 1
+    mode.move_up(lines, len(lines), 500)
+    assert mode.cursor_line == 0
+
+
+class FakeScreen:
+    """A 24x80 window that paints nothing and replays scripted keys."""
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.frames = 0
+
+    def __getattr__(self, name):
+        return lambda *args: None
+
+    def getmaxyx(self):
+        return (24, 80)
+
+    def getch(self):
+        return self.keys.pop(0) if self.keys else 27
+
+    def noutrefresh(self):
+        self.frames += 1
+
+
+def test_key_burst_is_applied_before_a_single_redraw(doc, monkeypatch):
+    monkeypatch.setattr(curses, "curs_set", lambda n: None)
+    monkeypatch.setattr(curses, "color_pair", lambda n: 0)
+    monkeypatch.setattr(curses, "doupdate", lambda: None)
+    mode = doc("\n".join(f"verse {i}" for i in range(100)))
+    seen = []
+    handle = mode._handle_key
+    monkeypatch.setattr(
+        mode, "_handle_key", lambda s, k: seen.append(mode.cursor_line) or handle(s, k)
+    )
+    # -1 ends a burst: eight j's, then a ",j" chord arriving together.
+    screen = FakeScreen([ord("j")] * 8 + [-1, ord(","), ord("j"), -1])
+
+    assert mode.run(screen) is False
+    assert screen.frames == 3
+    assert seen[:9] == list(range(8)) + [8]
+    assert mode.cursor_line == len(mode.model.lines) - 1
+
+
+def test_selection_spans_cover_each_row_once_in_either_direction(doc):
+    mode = doc("abcdef\n\tghi\njkl")
+    mode.mode = "visual"
+    mode.visual_start_line, mode.visual_start_col = 2, 2
+    mode.cursor_line, mode.cursor_col = 0, 3
+
+    assert mode._selection_spans(0, 3) == {0: (3, 6), 1: (0, 7), 2: (0, 2)}
+    assert mode._selection_spans(1, 2) == {1: (0, 7)}
+    assert mode.get_selected_text(mode.model.lines) == "def\n\tghi\njk"
+
+    mode.visual_start_line, mode.visual_start_col = 0, 4
+    mode.cursor_line, mode.cursor_col = 0, 1
+    assert mode._selection_spans(0, 3) == {0: (1, 4)}
+    assert mode.get_selected_text(mode.model.lines) == "bcd"
+
+
+def test_vertical_motion_walks_soft_wrapped_rows(doc):
+    mode = doc("the lord is my shepherd\nend")
+    mode.layout = mode.model.layout(10)
+    lines = mode.model.lines
+
+    mode.move_right(lines, len(lines))
+    mode.move_down(lines, len(lines))
+    assert (mode.cursor_line, mode.cursor_col) == (0, 10)  # "is my " row
+    mode.move_down(lines, len(lines))
+    assert (mode.cursor_line, mode.cursor_col) == (0, 16)  # "shepherd" row
+    mode.move_down(lines, len(lines))
+    assert (mode.cursor_line, mode.cursor_col) == (1, 1)
+    mode.move_up(lines, len(lines), 3)
+    assert (mode.cursor_line, mode.cursor_col) == (0, 1)
+
+
+def test_search_moves_as_typed_and_steps_through_cached_spans(doc, monkeypatch):
+    monkeypatch.setattr(curses, "curs_set", lambda n: None)
+    mode = doc("\n".join(["in the beginning", "shade", "the shadow", "shadows"]))
+    mode.scheduler = None
+    screen = FakeScreen([])
+
+    for key in [ord("/"), ord("s"), ord("h")]:
+        mode._handle_key(screen, key)
+    assert (mode.cursor_line, mode.cursor_col) == (1, 0)
+    for key in [ord("a"), ord("d"), ord("o")]:
+        mode._handle_key(screen, key)
+    assert (mode.cursor_line, mode.cursor_col) == (2, 4)
+    assert mode._marks(0, 4) == {
+        2: ((4, 9, MATCH_ATTR),),
+        3: ((0, 5, MATCH_ATTR),),
+    }
+
+    mode._handle_key(screen, ord("\n"))
+    assert mode.last_search_term == "shado"
+    mode._handle_key(screen, ord("n"))
+    assert (mode.cursor_line, mode.cursor_col) == (3, 0)
+    mode._handle_key(screen, ord("n"))
+    assert (mode.cursor_line, mode.cursor_col) == (2, 4)
+    mode._handle_key(screen, ord("N"))
+    assert (mode.cursor_line, mode.cursor_col) == (3, 0)
+
+    # Esc goes back to where / was pressed and to the last term's matches.
+    for key in [ord("/"), ord("b"), ord("e"), 27]:
+        mode._handle_key(screen, key)
+    assert (mode.cursor_line, mode.cursor_col) == (3, 0)
+    assert mode.search.term == "shado"
+
+
+def test_n_steps_into_the_next_lesson_with_a_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(Bookmarks, "BOOKMARKS_FILE", tmp_path / "bookmarks.conf")
+    monkeypatch.setattr(curses, "curs_set", lambda n: None)
+    mode = DocMode(Sequencer("the shade", "no match here", "sun\nand shade"))
+    mode.scheduler = None
+    screen = FakeScreen([])
+
+    for key in [ord("/"), ord("s"), ord("h"), ord("\n")]:
+        mode._handle_key(screen, key)
+    assert (mode.idx, mode.cursor_line, mode.cursor_col) == (0, 0, 4)
+    assert mode._match_info() == "  [1/2 matches]"
+
+    mode._handle_key(screen, ord("n"))
+    assert (mode.idx, mode.cursor_line, mode.cursor_col) == (2, 1, 4)
+    assert mode._marks(0, 2) == {1: ((4, 6, MATCH_ATTR),)}
+    assert mode._match_info() == "  [2/2 matches]"
+    mode._handle_key(screen, ord("n"))
+    assert mode.idx == 0
+    mode._handle_key(screen, ord("N"))
+    assert (mode.idx, mode.cursor_line, mode.cursor_col) == (2, 1, 4)
+
+    mode._handle_key(screen, ord("p"))  # lesson keys keep the search
+    assert mode.idx == 1
+    assert mode.last_search_term == "sh"
+
+    assert mode._handle_key(screen, 27) is None  # clears the search first
+    assert mode._marks(0, 2) == {}
+    mode._handle_key(screen, ord("n"))
+    assert mode.idx == 2
+    assert mode._handle_key(screen, 27) is False
+
+
+def test_bookmark_resolves_through_the_sequencers_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(Bookmarks, "BOOKMARKS_FILE", tmp_path / "bookmarks.conf")
+    sequencer = Sequencer("the shade", "sun")
+    course = Course("Psalms", [Part("Main", [Section("Main", sequencer.lessons)])])
+    sequencer.name = "Psalms"
+    sequencer.index = LibraryIndex([course])
+    mode = DocMode(sequencer)
+    screen = FakeScreen([])
+    mode.scheduler = InputScheduler(screen)
+    mode.idx = 1
+
+    mode._handle_key(screen, ord("b"))
+
+    assert Bookmarks()._parse_bookmarks() == [
+        ("Psalms > Main > Main > L1", "Psalms", "Main", "Main", "L1")
+    ]
+    assert mode.toast == "Bookmarked!"
+
+
+def test_file_changed_under_lazy_lessons_is_reloaded(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(Bookmarks, "BOOKMARKS_FILE", tmp_path / "bookmarks.conf")
+    monkeypatch.setattr(curses, "curs_set", lambda n: None)
+    monkeypatch.setattr(curses, "color_pair", lambda n: 0)
+    monkeypatch.setattr(curses, "doupdate", lambda: None)
+    path = tmp_path / "psalms.md"
+    path.write_text("# Psalms\n## One\n    alpha\n## Two\n    beta\n", encoding="utf-8")
+    (course,) = CourseParser(tmp_path, lazy=True).parse_courses()
+    index = LibraryIndex([course])
+    lessons = course.parts[0].sections[0].lessons
+    sequencer = LessonSequencer(
+        "Psalms", lessons, index, True, str(path), course=course
+    )
+    mode = DocMode(sequencer)
+    mode.idx = 1
+    path.write_text(
+        "# Psalms\n## Zero\n    first\n## One\n    alpha\n## Two\n    beta, longer\n",
+        encoding="utf-8",
+    )
+
+    assert mode.run(FakeScreen([])) is False  # reloads, then Esc leaves
+    assert [lesson.name for lesson in sequencer.lessons] == ["Zero", "One", "Two"]
+    assert mode.idx == 2 and mode.model.lines[0] == "beta, longer"
+    assert index.course("Psalms") is sequencer.course
+    assert mode.toast == "Course file changed on disk; reloaded"
+
+
+def test_esc_leaves_visual_mode_before_dropping_the_search(doc, monkeypatch):
+    monkeypatch.setattr(curses, "curs_set", lambda n: None)
+    mode = doc("the shade\nand the shadow")
+    screen = FakeScreen([])
+    mode.scheduler = InputScheduler(screen)
+    for key in [ord("/"), ord("s"), ord("h"), ord("\n"), ord("v"), ord("l")]:
+        mode._handle_key(screen, key)
+    assert mode.mode == "visual" and mode.last_search_term == "sh"
+
+    assert mode._handle_key(screen, 27) is None
+    assert (mode.mode, mode.visual_start_line) == ("normal", None)
+    assert mode.last_search_term == "sh"
+    assert mode._handle_key(screen, 27) is None
+    assert mode.last_search_term == ""
+    assert mode._handle_key(screen, 27) is False
@@ -0,0 +1,47 @@
+import curses
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules import frame
+
+
+class Window:
+    def __init__(self, log):
+        self.log = log
+
+    def noutrefresh(self):
+        self.log.append("stage")
+
+
+def test_present_stages_every_window_before_one_update(monkeypatch):
+    log = []
+    monkeypatch.setattr(frame, "STATS", None)
+    monkeypatch.setattr(curses, "doupdate", lambda: log.append("update"))
+
+    frame.present(Window(log), Window(log))
+
+    assert log == ["stage", "stage", "update"]
+
+
+@pytest.mark.skipif(frame.bytes_written() is None, reason="needs /proc/self/io")
+def test_frame_stats_log_bytes_written_during_update(tmp_path, monkeypatch):
+    stats = frame.FrameStats(tmp_path / "frames.log")
+    monkeypatch.setattr(frame, "STATS", stats)
+    fd = os.open(os.devnull, os.O_WRONLY)
+    try:
+        monkeypatch.setattr(curses, "doupdate", lambda: os.write(fd, b"x" * 300))
+        frame.present(Window([]), screen="doc")
+        frame.present(Window([]), screen="menu")
+    finally:
+        os.close(fd)
+
+    assert stats.frames == 2
+    assert stats.total == 600
+    assert (tmp_path / "frames.log").read_text() == "doc\t300\nmenu\t300\n"
@@ -0,0 +1,86 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import modules.fuzzy_finder as fuzzy_finder
+from modules.fuzzy_finder import FuzzyMatcher
+
+PATHS = [
+    "Bible: KJV",
+    "Bible: KJV > Psalms > Chapter 23 > Verses 1-6",
+    "Bible: KJV > Proverbs > Chapter 3 > Verses 1-10",
+    "Bible: KJV > John > Chapter 3 > Verses 11-20",
+    "Oil > Psalms 23",
+]
+
+
+def _texts(matcher, limit=10):
+    return [matcher.texts[i] for i, _ in matcher.best(limit)]
+
+
+def test_typing_narrows_the_survivors_and_backspace_restores_them():
+    matcher = FuzzyMatcher(PATHS)
+
+    assert matcher.update("P") == 4
+    assert matcher.update("ps") == 4
+    assert matcher.update("ps23") == 2
+    assert matcher.update("ps23v") == 1
+    assert matcher.update("ps") == 4
+    assert matcher.update("jn3") == 1
+    assert matcher.update("") == 0
+    assert matcher.best(10) == []
+    assert matcher.update("zz") == 0
+
+
+def test_repeated_letters_must_each_match():
+    matcher = FuzzyMatcher(["abc", "aabc", "a-a"])
+
+    assert matcher.update("aa") == 2
+    assert matcher.update("aab") == 1
+
+
+def test_tight_word_start_matches_rank_first_and_positions_mark_them():
+    matcher = FuzzyMatcher(PATHS)
+
+    matcher.update("ps23")
+    assert _texts(matcher) == [PATHS[4], PATHS[1]]
+    i, end = matcher.best(1)[0]
+    assert [PATHS[4][k] for k in matcher.positions(i, end)] == list("Ps23")
+
+    matcher.update("john")
+    assert _texts(matcher, 1) == [PATHS[3]]
+
+
+def test_large_survivor_sets_rank_by_match_width(monkeypatch):
+    monkeypatch.setattr(fuzzy_finder, "RESCORE_MAX", 0)
+    matcher = FuzzyMatcher(["p-x-s", "ps", "p-s", "psalm", "p--s"])
+
+    matcher.update("ps")
+    assert _texts(matcher, 3) == ["ps", "psalm", "p-s"]
+    assert matcher.best(10)[-1] == (0, 4)
+
+
+def test_near_universal_queries_narrow_lazily_and_refine_settles(monkeypatch):
+    monkeypatch.setattr(fuzzy_finder, "CHUNK", 8)
+    monkeypatch.setattr(fuzzy_finder, "RESCORE_MAX", 4)
+    monkeypatch.setattr(fuzzy_finder, "RANK_MAX", 32)
+    matcher = FuzzyMatcher([f"a-b {i}" for i in range(100)] + ["ab"])
+
+    matcher.update("a")
+    assert _texts(matcher, 3) == ["a-b 0", "a-b 1", "a-b 2"]
+    assert matcher.count == 8 and not matcher.complete
+
+    # No gapless match in the first RANK_MAX: ranked from those for now,
+    # and from the whole library once refine() has walked it.
+    matcher.update("ab")
+    assert _texts(matcher, 1) == ["a-b 0"]
+    assert matcher.count < 101
+    assert matcher.refine(1.0)
+    assert matcher.count == 101
+    assert _texts(matcher, 1) == ["ab"]
+
+    assert matcher.update("a") == 101  # walked on the way
+    assert matcher.complete
@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.input_scheduler import InputScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeScreen:
+    def __init__(self, keys, clock):
+        self.keys = list(keys)
+        self.clock = clock
+        self.timeouts = []
+
+    def timeout(self, ms):
+        self.timeouts.append(ms)
+
+    def getch(self):
+        if self.keys:
+            return self.keys.pop(0)
+        # Simulate curses sleeping for the whole timeout before giving up.
+        if self.timeouts[-1] > 0:
+            self.clock.now += self.timeouts[-1] / 1000
+        return -1
+
+
+def test_wait_blocks_indefinitely_without_timers():
+    clock = FakeClock()
+    screen = FakeScreen([ord("j")], clock)
+    scheduler = InputScheduler(screen, clock=clock)
+
+    assert scheduler.wait() == ord("j")
+    assert screen.timeouts == [-1, 0]
+
+
+def test_wait_wakes_for_earliest_timer_and_reports_it():
+    clock = FakeClock()
+    screen = FakeScreen([], clock)
+    scheduler = InputScheduler(screen, clock=clock)
+    scheduler.schedule("toast", 0.8)
+    scheduler.schedule("comma", 0.35)
+
+    assert scheduler.wait() == -1
+    assert screen.timeouts[0] == 350
+    assert scheduler.fired == {"comma"}
+    assert scheduler.active("toast")
+    assert not scheduler.active("comma")
+
+
+def test_keys_drains_queue_after_first_blocking_read():
+    clock = FakeClock()
+    screen = FakeScreen([ord("j"), ord("j"), ord("k")], clock)
+    scheduler = InputScheduler(screen, clock=clock)
+
+    assert list(scheduler.keys()) == [ord("j"), ord("j"), ord("k")]
+    assert screen.timeouts[0] == -1
+    assert all(ms == 0 for ms in screen.timeouts[1:])
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules import lesson_model as lesson_model_module
+from modules.lesson_model import LessonModel, lesson_model
+from modules.structs import Lesson
+from modules.viewport import PADDING_ROWS
+
+
+def test_rows_targets_and_totals():
+    model = LessonModel("ab\n\tcd\n#! skip me\nef")
+
+    assert model.lines[:4] == ["ab", "\tcd", "#! skip me", "ef"]
+    assert len(model) == 4 + PADDING_ROWS - 1
+    assert model.targets[1] == "cd"
+    assert model.skip[:4] == [False, False, True, False]
+    assert model.total_chars == 6
+
+
+def test_display_and_target_columns_expand_tabs():
+    model = LessonModel("a\tb\t\nplain")
+
+    assert list(model.display_cols(0)) == [0, 1, 5, 6, 10]
+    # After typing "a" the cursor jumps over the tab onto "b".
+    assert list(model.target_cols(0)) == [0, 5, 10]
+    assert model.display_cols(1) == range(6)
+    assert model.display_cols(1) is model.display_cols(1)
+
+
+def test_models_are_memoised_per_lesson_with_lru_bound(monkeypatch):
+    monkeypatch.setattr(lesson_model_module, "MAX_MODELS", 2)
+    monkeypatch.setattr(
+        lesson_model_module, "_models", type(lesson_model_module._models)()
+    )
+    first, second, third = (Lesson(f"L{i}", f"line {i}") for i in range(3))
+
+    model = lesson_model(first)
+    assert lesson_model(first) is model
+    lesson_model(second)
+    lesson_model(third)
+
+    assert lesson_model(first) is not model
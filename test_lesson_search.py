@@ -0,0 +1,104 @@
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import modules.lesson_search as lesson_search
+from modules.course_parser import CourseParser
+from modules.lesson_body import RESIDENT
+from modules.lesson_search import LessonSearch, SectionSearch
+from modules.structs import Lesson
+
+
+def test_growing_term_only_rechecks_previous_spans():
+    search = LessonSearch(["Shadow of the Almighty", "the shade", "shh shadow"])
+
+    assert search.update("sh") == [
+        (0, 0, 2),
+        (1, 4, 6),
+        (2, 0, 2),
+        (2, 4, 6),
+    ]
+    checked = []
+    line = search._line
+    search._line = lambda i: checked.append(i) or line(i)
+    assert search.update("sha") == [(0, 0, 3), (1, 4, 7), (2, 4, 7)]
+    assert checked == [0, 1, 2, 2]
+
+    checked.clear()
+    assert search.update("SHADOW") == [(0, 0, 6), (2, 4, 10)]
+    assert search.update("sh") == [(0, 0, 2), (1, 4, 6), (2, 0, 2), (2, 4, 6)]
+    assert checked == [0, 1, 2]  # "sh" came back from the stack
+    assert search.on_line(2) == [(2, 0, 2), (2, 4, 6)]
+    assert search.on_line(3) == []
+
+
+def test_step_wraps_round_the_lesson_both_ways():
+    search = LessonSearch(["aa a", "b", "a"])
+    search.update("a")
+
+    assert search.spans == [(0, 0, 1), (0, 1, 2), (0, 3, 4), (2, 0, 1)]
+    assert search.step(0, 0) == (0, 1, 2)
+    assert search.step(1, 0) == (2, 0, 1)
+    assert search.step(2, 0) == (0, 0, 1)
+    assert search.step(0, 1, forward=False) == (0, 0, 1)
+    assert search.step(0, 0, forward=False) == (2, 0, 1)
+    search.update("z")
+    assert search.step(0, 0) is None
+
+
+def test_section_search_steps_across_lessons_searching_each_once(monkeypatch):
+    lessons = [Lesson("A", "shade\nx"), Lesson("B", "none"), Lesson("C", "a shade")]
+    searched = []
+    lesson_lines = lesson_search.lesson_lines
+    monkeypatch.setattr(
+        lesson_search,
+        "lesson_lines",
+        lambda content: searched.append(content) or lesson_lines(content),
+    )
+    section = SectionSearch(lessons, "SHA", known={0: [(0, 0, 3)]})
+
+    assert section.step(0, 0, 0) == (2, (0, 2, 5))
+    assert searched == ["none", "a shade"]
+    assert section.count() == (2, True)
+    assert section.step(2, 0, 2) == (0, (0, 0, 3))  # wraps round
+    assert section.step(0, 0, 0, forward=False) == (2, (0, 2, 5))
+    assert section.ordinal(2, 0, 2) == 2
+    assert section.ordinal(2, 0, 3) is None
+    assert len(searched) == 2
+    assert SectionSearch(lessons, "zz").step(1, 0, 0) is None
+
+
+def test_large_sections_are_searched_in_the_background(monkeypatch):
+    monkeypatch.setattr(lesson_search, "BACKGROUND_MIN_LESSONS", 3)
+    lessons = [Lesson(str(i), "shade " * i) for i in range(5)]
+    section = SectionSearch(lessons, "shade")
+
+    assert section.background
+    for _ in range(1000):
+        found, complete = section.count()
+        if complete:
+            break
+        time.sleep(0.01)
+    assert (found, complete) == (10, True)
+
+
+def test_background_search_reads_lazy_bodies_past_the_shared_lru(tmp_path, monkeypatch):
+    monkeypatch.setattr(lesson_search, "BACKGROUND_MIN_LESSONS", 3)
+    body = "".join(f"## L{i}\n    shade {i}\n" for i in range(8))
+    (tmp_path / "lazy.md").write_text(f"# Lazy\n{body}", encoding="utf-8")
+    course = CourseParser(tmp_path, lazy=True).parse_courses()[0]
+    resident = len(RESIDENT)
+
+    section = SectionSearch(course.parts[0].sections[0].lessons, "shade")
+    for _ in range(1000):
+        found, complete = section.count()
+        if complete:
+            break
+        time.sleep(0.01)
+
+    assert (found, complete) == (8, True)
+    assert len(RESIDENT) == resident
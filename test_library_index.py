@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.bookmarks import Bookmarks
+from modules.library_index import LibraryIndex
+from modules.structs import Course, Lesson, Part, Section
+
+
+def _library():
+    def chapter(name):
+        return Section(
+            name, [Lesson("Verses 1-10", name), Lesson("Verses 11-20", name)]
+        )
+
+    bible = Course("Bible: KJV", [Part("Genesis", [chapter("1"), chapter("2")])])
+    flat = Course("Flat", [Part("Main", [Section("Main", [Lesson("Only", "x")])])])
+    return bible, flat, LibraryIndex([bible, flat])
+
+
+def test_paths_and_lessons_resolve_to_nodes_and_positions():
+    bible, flat, index = _library()
+    genesis = bible.parts[0]
+
+    assert index.course("Flat") is flat
+    assert index.node("Bible: KJV", "Genesis") is genesis
+    assert index.node("Bible: KJV", "Genesis", "2") is genesis.sections[1]
+    assert index.node("Bible: KJV", "Exodus") is None
+
+    entry = index.find("Bible: KJV", "Verses 11-20", "Genesis", "2")
+    assert entry.lesson is genesis.sections[1].lessons[1]
+    assert entry.position == 3
+    assert index.find("Bible: KJV", "Verses 11-20").section is genesis.sections[0]
+    assert index.find("Flat", "Missing") is None
+
+
+def test_paths_list_every_level_without_main_and_reset_on_replace():
+    bible, flat, index = _library()
+
+    assert [entry.text for entry in index.paths()] == [
+        "Bible: KJV",
+        "Bible: KJV > Genesis",
+        "Bible: KJV > Genesis > 1",
+        "Bible: KJV > Genesis > 1 > Verses 1-10",
+        "Bible: KJV > Genesis > 1 > Verses 11-20",
+        "Bible: KJV > Genesis > 2",
+        "Bible: KJV > Genesis > 2 > Verses 1-10",
+        "Bible: KJV > Genesis > 2 > Verses 11-20",
+        "Flat",
+        "Flat > Only",
+    ]
+    assert index.paths()[2].section is bible.parts[0].sections[0]
+    assert index.paths()[2].lesson is None
+    assert index.paths() is index.paths()
+
+    edited = Course("Flat", [Part("Main", [Section("Main", [Lesson("New", "y")])])])
+    index.replace(edited)
+    assert index.paths()[-1].text == "Flat > New"
+    assert index.paths()[-1].course is edited
+
+
+def test_display_names_with_colons_find_their_course():
+    bible, flat, index = _library()
+
+    assert index.course_for_display("Bible: KJV: Genesis: 2") is bible
+    assert index.course_for_display("Bible: KJV") is bible
+    assert index.course_for_display("Flat") is flat
+    assert index.course_for_display("Nope: Genesis") is None
+
+
+def test_bookmark_records_the_exact_lesson(tmp_path, monkeypatch):
+    monkeypatch.setattr(Bookmarks, "BOOKMARKS_FILE", tmp_path / "bookmarks.conf")
+    bible, _, index = _library()
+    lesson = bible.parts[0].sections[1].lessons[0]
+
+    Bookmarks().add(index, "Bible: KJV: Genesis: 2", lesson.name, lesson=lesson)
+
+    assert Bookmarks()._parse_bookmarks() == [
+        (
+            "Bible: KJV > Genesis > 2 > Verses 1-10",
+            "Bible: KJV",
+            "Genesis",
+            "2",
+            "Verses 1-10",
+        )
+    ]
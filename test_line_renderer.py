@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.line_renderer import MISMATCH, draw_runs, span_runs, typed_text
+
+
+class RecordingScreen:
+    def __init__(self):
+        self.calls = []
+
+    def addstr(self, y, x, text, attr=0):
+        self.calls.append((y, x, text, attr))
+
+    def move(self, y, x):
+        pass
+
+    def clrtoeol(self):
+        pass
+
+
+def test_draw_runs_joins_equal_attrs_and_clips_to_width():
+    screen = RecordingScreen()
+    runs = [("ab", 0), ("cd", 0), ("", 4), ("ef", 4), ("gh", 0)]
+
+    end = draw_runs(screen, 2, runs, 7, base_attr=1)
+
+    assert screen.calls == [(2, 0, "abcd", 1), (2, 4, "ef", 5), (2, 6, "g", 1)]
+    assert end == 7
+
+
+def test_span_runs_combines_overlapping_attrs():
+    assert span_runs("abcdef", ()) == [("abcdef", 0)]
+    assert span_runs("abcdef", [(1, 4, 1), (3, 9, 2)]) == [
+        ("a", 0),
+        ("bc", 1),
+        ("d", 3),
+        ("ef", 2),
+    ]
+
+
+def test_typed_text_overlays_input_with_and_without_tabs():
+    assert typed_text("hello", "hello", list("hex")) == "he" + MISMATCH + "lo"
+    assert typed_text("hi", "hi", list("hiya")) == "hi" + MISMATCH * 2
+    assert typed_text("\ta\tb", "ab", list("x")) == "    " + MISMATCH + "    b"
+    assert typed_text("\tab", "ab", []) == "    ab"
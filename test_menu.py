@@ -0,0 +1,57 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.course_parser import CourseParser
+from modules.menu import Menu
+
+
+def test_menu_opens_the_tree_a_doc_mode_edit_reparsed(tmp_path):
+    path = tmp_path / "psalms.md"
+    path.write_text("# Psalms\n## Psalm 1\n    Blessed\n", encoding="utf-8")
+    (tmp_path / "john.md").write_text("# John\n## One\n    Word\n", encoding="utf-8")
+    parser = CourseParser(tmp_path, lazy=True)
+    menu = Menu(parser.parse_courses())
+    psalms = menu.courses[1]
+
+    path.write_text("# Psalms\n## Psalm 1\n    Blessed is the man\n", encoding="utf-8")
+    edited = parser.reparse(psalms)
+    menu.index.replace(edited)  # as DocMode does after DocEditor saves
+
+    assert [course.name for course in menu.courses] == ["John", "Psalms"]
+    assert menu.courses[1] is edited
+    lesson = menu.courses[1].parts[0].sections[0].lessons[0]
+    assert lesson.content == "Blessed is the man"
+
+
+def test_search_is_only_restarted_when_the_library_changed(tmp_path, monkeypatch):
+    import modules.search_screen as search_screen
+
+    path = tmp_path / "psalms.md"
+    path.write_text("# Psalms\n## Psalm 1\n    Blessed\n", encoding="utf-8")
+    parser = CourseParser(tmp_path, lazy=True)
+    started = []
+
+    class Search:
+        def start(self, courses):
+            started.append(courses)
+
+    class Screen:
+        def __init__(self, search, index):
+            pass
+
+        def run(self, stdscr):
+            return None
+
+    monkeypatch.setattr(search_screen, "SearchScreen", Screen)
+    menu = Menu(parser.parse_courses(), search=Search())
+    menu._run_search(None)
+    menu._run_search(None)
+    assert len(started) == 1
+
+    menu.index.replace(parser.reparse(menu.courses[0]))
+    menu._run_search(None)
+    assert len(started) == 2 and started[1] == menu.courses
@@ -0,0 +1,162 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import modules.search_index as search_index
+from modules.course_parser import CourseParser
+from modules.lesson_body import RESIDENT
+from modules.library_index import LibraryIndex
+from modules.search_index import Hit, SearchIndex, run_search
+
+PSALMS = (
+    "# Psalms\n"
+    "## Psalm 23\n"
+    "    The LORD is my shepherd;\n"
+    "    yea, though I walk through the valley of the shadow of death\n"
+    "## Psalm 91\n"
+    "    \tabide under the Shadow of the Almighty.\n"
+)
+JOHN = "# John\n## Chapter 1\n    In the beginning was the Word\n"
+
+
+def _courses(tmp_path, lazy=False):
+    src = tmp_path / "courses"
+    if not src.exists():
+        src.mkdir()
+        (src / "psalms.md").write_text(PSALMS, encoding="utf-8")
+        (src / "john.md").write_text(JOHN, encoding="utf-8")
+    return CourseParser(str(src), lazy=lazy).parse_courses()
+
+
+def test_search_finds_lines_holding_every_word(tmp_path):
+    index = SearchIndex(tmp_path / "cache")
+    index.update(_courses(tmp_path))
+
+    assert index.ready.is_set()
+    assert index.search("SHADOW") == [
+        Hit("Psalms", 0, 1, 45),
+        Hit("Psalms", 1, 0, 17),
+    ]
+    assert index.search("death, shadow") == [Hit("Psalms", 0, 1, 55)]
+    assert index.search("the") == [
+        Hit("John", 0, 0, 3),
+        Hit("Psalms", 0, 0, 0),
+        Hit("Psalms", 0, 1, 27),
+        Hit("Psalms", 1, 0, 13),
+    ]
+    assert index.search("shadow word") == []
+    assert index.search("the shad", prefix=True) == [
+        Hit("Psalms", 0, 1, 27),
+        Hit("Psalms", 1, 0, 13),
+    ]
+    assert index.search("the shad") == []
+    assert index.search("...") == []
+
+
+def test_short_prefixes_match_whole_words_and_limit_caps_hits(tmp_path):
+    index = SearchIndex(tmp_path / "cache")
+    index.update(_courses(tmp_path))
+
+    assert index.search("sh", prefix=True) == []
+    assert index.search("sha", prefix=True) == index.search("shadow")
+    assert index.search("the", limit=2) == [
+        Hit("John", 0, 0, 3),
+        Hit("Psalms", 0, 0, 0),
+    ]
+    assert index.search("the, th", prefix=True) == []
+    assert index.search("valley the", limit=1) == [Hit("Psalms", 0, 1, 31)]
+
+
+def test_only_changed_course_files_are_indexed_again(tmp_path, monkeypatch):
+    indexed = []
+    index_course = search_index.index_course
+    monkeypatch.setattr(
+        search_index,
+        "index_course",
+        lambda course: indexed.append(course.name) or index_course(course),
+    )
+    courses = _courses(tmp_path)
+    SearchIndex(tmp_path / "cache").update(courses)
+    assert sorted(indexed) == ["John", "Psalms"]
+
+    # A new run loads both tables from disk; an edited file is redone.
+    indexed.clear()
+    index = SearchIndex(tmp_path / "cache")
+    index.update(courses)
+    assert indexed == []
+
+    john = tmp_path / "courses" / "john.md"
+    john.write_text(JOHN + "    and the Word was with God\n", encoding="utf-8")
+    os.utime(john, ns=(1, 1))
+    index.update(_courses(tmp_path))
+    assert indexed == ["John"]
+    assert index.search("god") == [Hit("John", 0, 1, 22)]
+
+
+def test_run_search_prints_paths_and_fails_without_matches(tmp_path):
+    courses = _courses(tmp_path)
+    lines = []
+
+    assert run_search(courses, "shadow", lines.append, tmp_path / "cache") == 0
+    assert lines == [
+        "Psalms > Psalm 23:2: yea, though I walk through the valley of the "
+        "shadow of death",
+        "Psalms > Psalm 91:1: abide under the Shadow of the Almighty.",
+    ]
+    assert run_search(courses, "leviathan", [].append, tmp_path / "cache") == 1
+
+    entry = LibraryIndex(courses).at("Psalms", 1)
+    assert entry.lesson.name == "Psalm 91"
+    assert LibraryIndex(courses).at("Psalms", 2) is None
+
+
+def test_indexing_lazy_courses_leaves_the_resident_bodies_alone(tmp_path):
+    courses = _courses(tmp_path, lazy=True)
+    resident = len(RESIDENT)
+
+    index = SearchIndex(tmp_path / "cache")
+    index.update(courses)
+
+    assert len(RESIDENT) == resident
+    assert index.search("almighty") == [Hit("Psalms", 1, 0, 31)]
+
+
+def test_file_changed_under_lazy_course_is_reparsed_and_indexed(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    courses = _courses(tmp_path, lazy=True)
+    (tmp_path / "courses" / "john.md").write_text(
+        JOHN + "## Chapter 2\n    And the third day\n", encoding="utf-8"
+    )
+    library = LibraryIndex(courses)
+
+    index = SearchIndex(tmp_path / "cache")
+    index.update(courses)
+    for course in index.reloaded():
+        library.replace(course)
+
+    assert index.reloaded() == []
+    (hit,) = index.search("third")
+    assert library.at(hit.course, hit.position).lesson.name == "Chapter 2"
+
+
+def test_a_course_that_fails_to_index_is_skipped(tmp_path, monkeypatch):
+    courses = _courses(tmp_path)
+    index_course = search_index.index_course
+
+    def failing(course):
+        if course.name == "John":
+            raise ValueError("bad bytes")
+        return index_course(course)
+
+    monkeypatch.setattr(search_index, "index_course", failing)
+    index = SearchIndex(tmp_path / "cache")
+    index.start(courses).join()
+
+    assert index.ready.is_set()
+    assert index.errors == {"John": "ValueError: bad bytes"}
+    assert index.search("beginning") == []
+    assert index.search("almighty") == [Hit("Psalms", 1, 0, 31)]
@@ -0,0 +1,68 @@
+import gc
+import pickle
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.course_parser import CourseParser
+from modules.structs import Course, Lesson, Part, Section
+
+LESSONS = 4000
+# Bytes of tree per lesson, content strings included. The lazy index is what
+# the app keeps resident, so it gets the tighter budget.
+EAGER_BUDGET = 640
+LAZY_BUDGET = 560
+
+
+def _write_course(tmp_path):
+    path = tmp_path / "budget.md"
+    lessons = "".join(
+        f"#### Verses {i % 30 * 10 + 1}-{i % 30 * 10 + 10}\n\n    verse {i}\n"
+        for i in range(LESSONS)
+    )
+    path.write_text(f"# Budget\n## Part\n### Section\n{lessons}", encoding="utf-8")
+    return path
+
+
+def _bytes_per_lesson(parser, path):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        course = parser._parse_md_file(str(path))
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(course.parts[0].sections[0].lessons) == LESSONS
+    return size / LESSONS
+
+
+@pytest.mark.parametrize("lazy, budget", [(False, EAGER_BUDGET), (True, LAZY_BUDGET)])
+def test_memory_budget_per_lesson(tmp_path, lazy, budget):
+    path = _write_course(tmp_path)
+    assert _bytes_per_lesson(CourseParser(tmp_path, lazy=lazy), path) < budget
+
+
+def test_nodes_are_slotted_and_immutable():
+    lesson = Lesson("One", "a")
+    course = Course("C", [Part("Main", [Section("Main", [lesson])])])
+
+    for node in (lesson, course, course.parts[0], course.parts[0].sections[0]):
+        assert not hasattr(node, "__dict__")
+        with pytest.raises(AttributeError):
+            node.name = "renamed"
+    assert course.parts[0].sections[0].lessons == (lesson,)
+
+
+def test_names_are_interned_and_survive_pickling():
+    name = "".join(["Verses ", "1-10"])
+    lesson = pickle.loads(pickle.dumps(Lesson(name, "a")))
+
+    assert lesson.name is sys.intern("Verses 1-10")
+    assert lesson.content == "a"
@@ -0,0 +1,80 @@
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.lesson_model import LessonModel
+from modules.typing_engine import TypingEngine
+
+
+def _type(engine, text):
+    for ch in text:
+        engine.press(10 if ch == "\n" else ord(ch))
+
+
+def test_lesson_finishes_once_every_row_matches():
+    engine = TypingEngine(LessonModel("ab\n#! skip\n\tcd"))
+    assert not engine.finished
+
+    _type(engine, "ab\n\ncd")
+
+    assert engine.line == 2
+    assert (engine.typed, engine.correct) == (4, 4)
+    assert engine.finished
+
+
+def test_enter_waits_for_a_correct_row_and_backspace_clears_mismatch():
+    engine = TypingEngine(LessonModel("abc\ndef"))
+    _type(engine, "axc\n")
+
+    assert engine.line == 0
+    assert engine.mismatch[0] == 1
+    assert not engine.line_complete(0)
+
+    engine.press(127)
+    engine.press(127)
+    assert engine.mismatch[0] is None
+    _type(engine, "bc\n")
+    assert engine.line == 1
+    assert engine.line_complete(0)
+
+
+def test_tab_types_an_indent_only_where_the_target_has_one():
+    engine = TypingEngine(LessonModel("        x"))
+    engine.press(9)
+    engine.press(9)
+    engine.press(9)
+
+    assert engine.inputs[0] == [" "] * 8
+
+
+def test_counters_match_a_full_recount_after_random_keys():
+    rng = random.Random(7)
+    model = LessonModel("in the beginning\n#! note\n\n    god created\nthe heaven")
+    engine = TypingEngine(model)
+    keys = [ord(c) for c in "abcdefghint "] + [127, 10, 9]
+
+    for _ in range(2000):
+        engine.press(rng.choice(keys))
+        if rng.random() < 0.01:
+            engine.reset()
+
+        typed = sum(len(ui) for ui in engine.inputs)
+        correct = sum(
+            1
+            for ui, target in zip(engine.inputs, model.targets)
+            for ch, want in zip(ui, target)
+            if ch == want
+        )
+        done = sum(
+            skip or "".join(ui) == target
+            for ui, target, skip in zip(engine.inputs, model.targets, model.skip)
+        )
+        assert (engine.typed, engine.correct, engine.lines_done) == (
+            typed,
+            correct,
+            done,
+        )
@@ -0,0 +1,100 @@
+import curses
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.rote_mode import RoteMode
+from modules.structs import Lesson
+from modules.typing_view import DirtyRows, draw_typing_line
+
+
+class FakeScreen:
+    """Just enough of a curses window to record what gets painted where."""
+
+    def __init__(self, keys=(), rows=20, cols=40):
+        self.keys = list(keys)
+        self.size = (rows, cols)
+        self.grid = [[" "] * cols for _ in range(rows)]
+        self.y = self.x = 0
+        self.painted = []  # rows touched by addch/addstr, in order
+
+    def getmaxyx(self):
+        return self.size
+
+    def timeout(self, ms):
+        pass
+
+    def getch(self):
+        return self.keys.pop(0) if self.keys else -1
+
+    def move(self, y, x):
+        self.y, self.x = y, x
+
+    def addch(self, y, x, ch, attr=0):
+        self.addstr(y, x, ch, attr)
+
+    def addstr(self, y, x, text, attr=0):
+        self.painted.append(y)
+        for i, ch in enumerate(text):
+            if x + i < self.size[1]:
+                self.grid[y][x + i] = ch
+        self.y, self.x = y, x + len(text)
+
+    def clrtoeol(self):
+        self.grid[self.y][self.x :] = [" "] * (self.size[1] - self.x)
+
+    def noutrefresh(self):
+        pass
+
+    def row(self, y):
+        return "".join(self.grid[y]).rstrip()
+
+
+def test_dirty_rows_repaint_everything_only_when_viewport_moves():
+    dirty = DirtyRows()
+    assert dirty.sync((0, 24, 80))
+    dirty.clean()
+
+    dirty.mark(3)
+    assert not dirty.sync((0, 24, 80))
+    assert dirty.needs(3) and not dirty.needs(4)
+    dirty.clean()
+
+    assert dirty.sync((1, 24, 80))
+    assert dirty.needs(4)
+
+
+def test_draw_typing_line_overlays_input_and_clears_tail(monkeypatch):
+    monkeypatch.setattr(curses, "color_pair", lambda n: 0)
+    screen = FakeScreen(cols=20)
+    screen.addstr(0, 0, "x" * 20)
+
+    draw_typing_line(screen, 0, "\tabc", "abc", ["a", "z"], 20)
+
+    assert screen.row(0) == "    a█c"
+
+
+def test_keystrokes_only_repaint_the_line_being_typed(monkeypatch):
+    monkeypatch.setattr(curses, "color_pair", lambda n: 0)
+    monkeypatch.setattr(curses, "curs_set", lambda n: None)
+    lesson = Lesson("L", "ab\ncd\nef")
+    # -1 ends a batch, so every key below gets a frame of its own.
+    screen = FakeScreen(keys=[ord("a"), -1, ord("b"), -1, 10, -1, ord("c"), -1, 27])
+
+    painted = []
+
+    def doupdate():
+        painted.append(set(screen.painted))
+        screen.painted.clear()
+
+    monkeypatch.setattr(curses, "doupdate", doupdate)
+    assert RoteMode("Course", lesson).run(screen) is False
+
+    content_rows = [{r for r in frame if 3 <= r < 18} for frame in painted]
+    assert content_rows[0] == {3, 4, 5}  # first frame paints the whole lesson
+    assert content_rows[1:] == [{3}, {3}, {3, 4}, {4}]
+    assert screen.row(3) == "ab"
+    assert screen.row(4) == "cd"
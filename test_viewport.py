@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.viewport import ScrollingBody
+
+
+class ScrollScreen:
+    def __init__(self):
+        self.calls = []
+
+    def setscrreg(self, top, bottom):
+        self.calls.append(("setscrreg", top, bottom))
+
+    def scrollok(self, flag):
+        self.calls.append(("scrollok", flag))
+
+    def scroll(self, n):
+        self.calls.append(("scroll", n))
+
+
+def test_scrolling_paints_only_exposed_rows():
+    screen = ScrollScreen()
+    body = ScrollingBody()
+
+    assert body.rows_to_paint(screen, 3, 10, "psalm", 0) is None
+    assert list(body.rows_to_paint(screen, 3, 10, "psalm", 2)) == [8, 9]
+    assert list(body.rows_to_paint(screen, 3, 10, "psalm", 1)) == [0]
+    assert list(body.rows_to_paint(screen, 3, 10, "psalm", 1)) == []
+    assert screen.calls == [
+        ("setscrreg", 3, 12),
+        ("scrollok", True),
+        ("scroll", 2),
+        ("scrollok", False),
+        ("setscrreg", 3, 12),
+        ("scrollok", True),
+        ("scroll", -1),
+        ("scrollok", False),
+    ]
+
+
+def test_changed_frame_or_long_jump_repaints():
+    screen = ScrollScreen()
+    body = ScrollingBody()
+    body.rows_to_paint(screen, 3, 10, "psalm", 0)
+
+    assert list(body.rows_to_paint(screen, 3, 10, "psalm", 40)) == list(range(10))
+    assert body.rows_to_paint(screen, 3, 10, "proverbs", 40) is None
+    body.invalidate()
+    assert body.rows_to_paint(screen, 3, 10, "proverbs", 41) is None
+    assert screen.calls == []
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from modules.lesson_model import LessonModel
+from modules.wrap_layout import row_starts
+
+
+def _rows(line, width):
+    model = LessonModel(line)
+    starts = row_starts(line, model.display_cols(0), width) + [len(line)]
+    return [line[a:b] for a, b in zip(starts, starts[1:])]
+
+
+def test_rows_break_after_the_last_space_that_fits():
+    assert _rows("the lord is my shepherd", 10) == ["the lord ", "is my ", "shepherd"]
+    # A space right at the break hangs off the end of its row.
+    assert _rows("abcd efgh", 4) == ["abcd ", "efgh"]
+    assert _rows("abcdefghij", 4) == ["abcd", "efgh", "ij"]
+    assert _rows("\tab cd", 6) == ["\tab ", "cd"]
+
+
+def test_layout_maps_lines_to_visual_rows_and_back():
+    model = LessonModel("short\nthe lord is my shepherd\nend")
+    layout = model.layout(10)
+
+    assert layout.first_row[:4] == [0, 1, 4, 5]
+    assert layout.locate(2) == (1, 1)
+    assert layout.span(1, 1) == (9, 15)
+    assert layout.row_of(1, 8) == 1
+    assert layout.row_of(1, 9) == 2
+    assert layout.row_of(1, 23) == 3  # the end of a line is on its last row
+    assert model.layout(10) is layout
+    assert model.layout(80).total_rows == len(model)